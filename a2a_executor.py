@@ -0,0 +1,142 @@
+import asyncio
+from typing import Any, Dict, Optional, Set
+
+from a2a.server.agent_execution import RequestContext
+from a2a.server.events import EventQueue
+from a2a.server.tasks import TaskUpdater
+from a2a.types import InternalError, Part, TextPart
+from a2a.utils import new_task
+from a2a.utils.errors import ServerError
+from strands.multiagent.a2a.executor import StrandsA2AExecutor
+
+from deadlines import deadline_scope, metadata_budget, time_left
+from metrics import MetricsRegistry
+from session_pool import AgentSessionPool
+from worker_pool import AgentWorkerPool, PoolSaturatedError, QueueTimeoutError
+
+
+class PooledA2AExecutor(StrandsA2AExecutor):
+    """
+    A2A executor that runs every task on the agent of its ``context_id``.
+
+    Agents come from an ``AgentSessionPool`` keyed by the A2A context id, so tasks of different
+    conversations run in parallel on separate histories while tasks of one conversation run one
+    at a time. Tasks run through an ``AgentWorkerPool``: at most ``max_concurrency`` at once, and
+    once its wait queue is full new tasks are rejected straight away (``TaskState.rejected``) so
+    callers can back off instead of piling up.
+
+    ``tasks/cancel`` stops a queued or running turn, so no further model or MCP calls are made for
+    it, and rolls the agent's history back to before the turn so the conversation can continue.
+
+    A task gets the time its caller said it would wait (the ``deadline_ms`` message metadata),
+    capped by ``task_timeout``. Its model and MCP calls only get the time that is left, and a task
+    still running at the deadline is stopped and reported as failed: nobody is waiting for it.
+    """
+
+    def __init__(
+        self,
+        session_pool: AgentSessionPool,
+        worker_pool: AgentWorkerPool,
+        task_timeout: Optional[float] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        # The base class serves a single agent; here every task gets its context's agent from the pool
+        super().__init__(agent=None)
+        self.session_pool = session_pool
+        self.worker_pool = worker_pool
+        self.task_timeout = task_timeout
+        self._running: Dict[str, asyncio.Task] = {}
+        self._cancelling: Set[str] = set()
+        self.rejected = 0
+        self.cancelled = 0
+        self.deadline_exceeded = 0
+        self._outcomes = metrics.counter(
+            "a2a_tasks_total", "A2A tasks by outcome", ["outcome"]
+        ) if metrics is not None else None
+
+    def _count(self, outcome: str) -> None:
+        if self._outcomes is not None:
+            self._outcomes.inc(outcome=outcome)
+
+    async def execute(self, context: RequestContext, event_queue: EventQueue) -> None:
+        task = context.current_task
+        if not task:
+            task = new_task(context.message)
+            await event_queue.enqueue_event(task)
+        updater = TaskUpdater(event_queue, task.id, task.context_id)
+
+        # The turn runs as its own task so tasks/cancel can stop it whether it is queued or running.
+        # The task copies the deadline when it is created, and so do the agent's tool calls.
+        budget = metadata_budget(context.message.metadata if context.message else None)
+        with deadline_scope(self.task_timeout), deadline_scope(budget):
+            work = asyncio.create_task(self._run_until_deadline(context, updater))
+        self._running[task.id] = work
+        try:
+            await work
+            self._count("completed")
+        except (PoolSaturatedError, QueueTimeoutError) as e:
+            self.rejected += 1
+            self._count("rejected")
+            await updater.reject(updater.new_agent_message([Part(root=TextPart(text=f"Agent is busy, retry later: {e}"))]))
+        except TimeoutError as e:
+            self.deadline_exceeded += 1
+            self._count("deadline_exceeded")
+            await updater.failed(updater.new_agent_message([Part(root=TextPart(text=str(e) or "Deadline exceeded"))]))
+        except asyncio.CancelledError:
+            if task.id not in self._cancelling:
+                raise
+            # tasks/cancel also cancels this producer, but the request handler needs it to finish
+            # normally to close the task's queue, so the cancellation ends here with the canceled state
+            asyncio.current_task().uncancel()
+            await asyncio.wait({work})
+            self._cancelling.discard(task.id)
+            self.cancelled += 1
+            self._count("cancelled")
+            await updater.cancel()
+        except Exception as e:
+            self._count("failed")
+            raise ServerError(error=InternalError()) from e
+        finally:
+            self._running.pop(task.id, None)
+
+    async def _run_until_deadline(self, context: RequestContext, updater: TaskUpdater) -> None:
+        await asyncio.wait_for(self.worker_pool.run(self._run_turn, context, updater), time_left())
+
+    async def _run_turn(self, context: RequestContext, updater: TaskUpdater) -> None:
+        if not context.message or not getattr(context.message, "parts", None):
+            raise ValueError("No content blocks available")
+        content_blocks = self._convert_a2a_parts_to_content_blocks(context.message.parts)
+        if not content_blocks:
+            raise ValueError("No content blocks available")
+
+        context_id = updater.context_id
+        agent, lock = await self.session_pool.acquire(context_id)
+        history = list(agent.messages)
+        try:
+            async for event in agent.stream_async(content_blocks):
+                await self._handle_streaming_event(event, updater)
+        except asyncio.CancelledError:
+            # A cancelled turn can stop between a tool call and its result, which the model would reject next turn
+            agent.messages = history
+            raise
+        finally:
+            await self.session_pool.release(context_id, lock)
+
+    async def cancel(self, context: RequestContext, event_queue: EventQueue) -> None:
+        """Stop the task's turn; ``execute`` then publishes the canceled state on the task's own queue."""
+        work = self._running.get(context.task_id)
+        if work is None or work.done():
+            await TaskUpdater(event_queue, context.task_id, context.context_id).cancel()
+            return
+        self._cancelling.add(context.task_id)
+        work.cancel()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "running": len(self._running),
+            "rejected": self.rejected,
+            "cancelled": self.cancelled,
+            "deadline_exceeded": self.deadline_exceeded,
+            "workers": self.worker_pool.stats(),
+            "contexts": self.session_pool.stats(),
+        }
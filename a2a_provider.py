@@ -0,0 +1,346 @@
+import asyncio
+import contextvars
+import logging
+import time
+from typing import Any, Callable, Dict, List, Optional
+from uuid import uuid4
+
+from a2a.client import ClientConfig, ClientFactory
+from a2a.types import AgentCard, Message, Part, Role, TaskArtifactUpdateEvent, TaskStatusUpdateEvent, TextPart
+from strands import tool
+from strands_tools.a2a_client import A2AClientToolProvider
+
+from agent_registry import AgentCardRegistry
+from deadlines import DEADLINE_METADATA_KEY, CircuitBreakers, DeadlineExceeded, deadline_scope, time_left
+from metrics import MetricsRegistry
+
+logger = logging.getLogger(__name__)
+
+# Set by streaming endpoints. When a sink is present, A2A sends use the streaming transport and
+# every task update from the remote agent is forwarded to it as it arrives.
+a2a_event_sink: contextvars.ContextVar[Optional[Callable[[Dict[str, Any]], None]]] = contextvars.ContextVar(
+    "a2a_event_sink", default=None
+)
+
+
+FAN_OUT_STRATEGIES = ("gather", "first")
+
+
+def _parts_text(parts: Optional[List[Part]]) -> str:
+    return "".join(part.root.text for part in parts or [] if isinstance(part.root, TextPart))
+
+
+def is_good_answer(result: Dict[str, Any]) -> bool:
+    """Whether a send result is a usable answer: sent successfully and, for tasks, completed."""
+    if result.get("status") != "success":
+        return False
+    task = (result.get("response") or {}).get("task")
+    if task is None:
+        return True
+    return task.get("status", {}).get("state") == "completed"
+
+
+def extract_answer_text(result: Dict[str, Any]) -> str:
+    """Pull the agent's answer text out of a send result (task artifacts, or a direct message)."""
+    response = result.get("response") or {}
+    task = response.get("task")
+    blocks = []
+    if task is not None:
+        for artifact in task.get("artifacts") or []:
+            blocks.extend(artifact.get("parts") or [])
+    else:
+        blocks = response.get("parts") or []
+    return "".join(part.get("text", "") for part in blocks if part.get("kind") == "text").strip()
+
+
+class OrchestratorA2AToolProvider(A2AClientToolProvider):
+    """
+    A2A client tool provider used by the orchestrator.
+
+    Behaves like ``A2AClientToolProvider`` with two additions:
+
+    - When a ``registry`` is given, agent cards come from the registry cache (prefetched at
+      startup and refreshed in the background) and each remote agent is reached through the
+      registry's pooled HTTP client, so discovery never happens on the request path.
+    - When an ``a2a_event_sink`` is set for the current context, messages are sent over the
+      streaming transport and each task status/artifact update is pushed to the sink before the
+      final result is returned to the model.
+
+    It also exposes ``a2a_send_message_parallel``, which sends one message to several agents
+    concurrently instead of one round trip after another. When ``metrics`` is given, every send is
+    timed as the ``a2a_send`` hop.
+
+    Every send is bounded by ``send_timeout`` and by the request's deadline, whichever is sooner,
+    and the time left travels in the message metadata so the remote agent stops working when the
+    caller stops waiting. With ``breakers``, an agent that keeps failing is skipped until its
+    circuit breaker lets a probe through.
+    """
+
+    def __init__(
+        self,
+        *args: Any,
+        registry: Optional[AgentCardRegistry] = None,
+        fan_out_timeout: float = 120.0,
+        agent_timeouts: Optional[Dict[str, float]] = None,
+        send_timeout: Optional[float] = None,
+        breakers: Optional[CircuitBreakers] = None,
+        metrics: Optional[MetricsRegistry] = None,
+        **kwargs: Any,
+    ):
+        super().__init__(*args, **kwargs)
+        self.registry = registry
+        self.metrics = metrics
+        self.send_timeout = send_timeout
+        self.breakers = breakers
+        self.fan_out_timeout = fan_out_timeout
+        self.agent_timeouts = {url.rstrip("/"): timeout for url, timeout in (agent_timeouts or {}).items()}
+        self._client_factories: Dict[Any, ClientFactory] = {}
+
+    async def _discover_known_agents(self) -> None:
+        if self.registry is None:
+            await super()._discover_known_agents()
+            return
+        self._discovered_agents.update(self.registry.cards())
+        self._initial_discovery_done = True
+
+    async def _discover_agent_card(self, url: str) -> AgentCard:
+        if self.registry is None:
+            return await super()._discover_agent_card(url)
+        agent_card = await self.registry.get_card(url)
+        self._discovered_agents[url] = agent_card
+        return agent_card
+
+    async def _get_client_factory(self, url: str, streaming: bool) -> ClientFactory:
+        """One client factory per remote agent and transport mode, bound to that agent's pooled client."""
+        key = (self.registry.get_client(url) if self.registry is not None else None, streaming)
+        factory = self._client_factories.get(key)
+        if factory is None:
+            httpx_client = key[0] if key[0] is not None else await self._ensure_httpx_client()
+            config = ClientConfig(
+                httpx_client=httpx_client,
+                streaming=streaming,
+                push_notification_configs=[self._push_config] if self._push_config else [],
+            )
+            factory = ClientFactory(config)
+            self._client_factories[key] = factory
+        return factory
+
+    async def _send_message(
+        self, message_text: str, target_agent_url: str, message_id: Optional[str] = None
+    ) -> Dict[str, Any]:
+        # Called by the base class's a2a_send_message tool
+        return await self.send(message_text, target_agent_url, message_id)
+
+    async def send(self, message_text: str, target_agent_url: str, message_id: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Send one message to an A2A agent, outside of any agent tool call (e.g. for the fast path).
+
+        Returns:
+            dict: ``status`` ("success", "error" or "timeout"), ``target_agent_url`` and either
+            ``response`` or ``error``, like the a2a_send_message tool
+        """
+        target = target_agent_url.rstrip("/")
+        if self.breakers is not None and not self.breakers.allow(target):
+            return {
+                "status": "error",
+                "error": f"Circuit open for {target_agent_url}, retry in {self.breakers.get(target).retry_after():.0f}s",
+                "target_agent_url": target_agent_url,
+            }
+        started = time.perf_counter()
+        # Whether the agent answered well; None when the send says nothing about the agent
+        verdict = None
+        try:
+            timeout = time_left(self.send_timeout)
+            result = await asyncio.wait_for(self._send(message_text, target_agent_url, message_id, timeout), timeout)
+            verdict = is_good_answer(result)
+        except DeadlineExceeded as e:
+            # The caller ran out of time before anything was sent
+            result = {"status": "timeout", "error": str(e), "target_agent_url": target_agent_url}
+        except asyncio.TimeoutError:
+            result = {"status": "timeout", "error": f"No answer within {timeout:g}s", "target_agent_url": target_agent_url}
+            # Only the agent missing this hop's own send_timeout counts against it, not a shorter caller deadline
+            if self.send_timeout and timeout >= self.send_timeout:
+                verdict = False
+        except asyncio.CancelledError:
+            # e.g. the losing sends of a "first" fan-out: no verdict on the agent
+            if self.breakers is not None:
+                self.breakers.get(target).release()
+            raise
+        if self.breakers is not None:
+            if verdict is None:
+                self.breakers.get(target).release()
+            else:
+                self.breakers.record(target, verdict)
+        if self.metrics is not None:
+            self.metrics.hop_seconds.observe(time.perf_counter() - started, hop="a2a_send")
+            if result["status"] != "success":
+                self.metrics.hop_errors.inc(hop="a2a_send")
+        return result
+
+    async def _send(
+        self, message_text: str, target_agent_url: str, message_id: Optional[str], timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        sink = a2a_event_sink.get()
+        if message_id is None:
+            message_id = uuid4().hex
+
+        try:
+            await self._ensure_discovered_known_agents()
+            agent_card = await self._discover_agent_card(target_agent_url)
+            client = (await self._get_client_factory(target_agent_url, streaming=sink is not None)).create(agent_card)
+
+            message = Message(
+                kind="message",
+                role=Role.user,
+                parts=[Part(TextPart(kind="text", text=message_text))],
+                message_id=message_id,
+                # The remote agent gives up when this send times out instead of finishing unseen work
+                metadata={DEADLINE_METADATA_KEY: int(timeout * 1000)} if timeout else None,
+            )
+
+            logger.info(f"Sending message to {target_agent_url}")
+
+            task, update_event = None, None
+            async for event in client.send_message(message):
+                if isinstance(event, Message):
+                    if sink is not None:
+                        sink({"type": "a2a_message", "agent_url": target_agent_url, "text": _parts_text(event.parts)})
+                    return {
+                        "status": "success",
+                        "response": event.model_dump(mode="python", exclude_none=True),
+                        "message_id": message_id,
+                        "target_agent_url": target_agent_url,
+                    }
+
+                task, update_event = event
+                if sink is None:
+                    # Without streaming the first (Task, UpdateEvent) tuple is already the final one
+                    break
+                if isinstance(update_event, TaskStatusUpdateEvent):
+                    status_message = update_event.status.message
+                    sink({
+                        "type": "a2a_status",
+                        "agent_url": target_agent_url,
+                        "task_id": update_event.task_id,
+                        "state": update_event.status.state.value,
+                        "text": _parts_text(status_message.parts) if status_message else "",
+                    })
+                elif isinstance(update_event, TaskArtifactUpdateEvent):
+                    sink({
+                        "type": "a2a_artifact",
+                        "agent_url": target_agent_url,
+                        "task_id": update_event.task_id,
+                        "text": _parts_text(update_event.artifact.parts),
+                    })
+
+            if task is None:
+                return {
+                    "status": "error",
+                    "error": "No response received from agent",
+                    "message_id": message_id,
+                    "target_agent_url": target_agent_url,
+                }
+
+            return {
+                "status": "success",
+                "response": {
+                    "task": task.model_dump(mode="python", exclude_none=True),
+                    "update": update_event.model_dump(mode="python", exclude_none=True) if update_event else None,
+                },
+                "message_id": message_id,
+                "target_agent_url": target_agent_url,
+            }
+
+        except Exception as e:
+            logger.exception(f"Error sending message to {target_agent_url}")
+            return {
+                "status": "error",
+                "error": str(e),
+                "message_id": message_id,
+                "target_agent_url": target_agent_url,
+            }
+
+    @tool
+    async def a2a_send_message_parallel(
+        self,
+        message_text: str,
+        target_agent_urls: List[str],
+        strategy: str = "gather",
+        timeout_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        """
+        Send the same message to several A2A agents at once instead of one after another.
+
+        Use this whenever a question needs more than one agent. Never guess URLs; take them from
+        a2a_list_discovered_agents or from the user.
+
+        Args:
+            message_text: The message content to send to every agent
+            target_agent_urls: The exact URLs of the target A2A agents
+            strategy: "gather" waits for every agent and returns all answers (partial results are
+                kept when some agents fail or time out); "first" returns the first good answer and
+                cancels the remaining calls
+            timeout_seconds: Optional per-agent timeout, overriding the configured default
+
+        Returns:
+            dict: Fan-out result including:
+                - status: "success" if at least one agent answered, "error" otherwise
+                - strategy: The strategy used
+                - winner: URL of the agent whose answer won ("first" strategy only)
+                - results: One entry per agent with its status, response or error, and elapsed seconds
+        """
+        return await self._send_message_parallel(message_text, target_agent_urls, strategy, timeout_seconds)
+
+    async def _send_message_parallel(
+        self,
+        message_text: str,
+        target_agent_urls: List[str],
+        strategy: str = "gather",
+        timeout_seconds: Optional[float] = None,
+    ) -> Dict[str, Any]:
+        if strategy not in FAN_OUT_STRATEGIES:
+            return {"status": "error", "error": f"Unknown strategy {strategy!r}, use one of {FAN_OUT_STRATEGIES}"}
+        urls = list(dict.fromkeys(target_agent_urls))
+        if not urls:
+            return {"status": "error", "error": "No target agents given"}
+
+        started = time.perf_counter()
+
+        async def send_one(url: str) -> Dict[str, Any]:
+            timeout = timeout_seconds or self.agent_timeouts.get(url.rstrip("/"), self.fan_out_timeout)
+            # The per-agent timeout becomes that send's deadline, so it is also passed on to the agent
+            with deadline_scope(timeout):
+                result = await self.send(message_text, url)
+            result["elapsed_seconds"] = time.perf_counter() - started
+            return result
+
+        tasks = {asyncio.create_task(send_one(url)): url for url in urls}
+        results: Dict[str, Dict[str, Any]] = {}
+        winner = None
+
+        if strategy == "first":
+            pending = set(tasks)
+            while pending and winner is None:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for finished in done:
+                    url = tasks[finished]
+                    results[url] = finished.result()
+                    if winner is None and is_good_answer(results[url]):
+                        winner = url
+            for unfinished in pending:
+                unfinished.cancel()
+                results[tasks[unfinished]] = {"status": "cancelled", "target_agent_url": tasks[unfinished]}
+            await asyncio.gather(*pending, return_exceptions=True)
+        else:
+            for url, result in zip(urls, await asyncio.gather(*tasks)):
+                results[url] = result
+
+        answered = [url for url in urls if is_good_answer(results[url])]
+        return {
+            "status": "success" if answered else "error",
+            "strategy": strategy,
+            "winner": winner,
+            "answered": len(answered),
+            "total": len(urls),
+            "results": [results[url] for url in urls],
+        }
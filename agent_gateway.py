@@ -0,0 +1,327 @@
+import asyncio
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import JSONResponse, PlainTextResponse
+from pydantic import BaseModel
+from dotenv import load_dotenv
+from a2a.server.apps import A2AFastAPIApplication
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore, TaskStore
+from a2a.types import AgentCapabilities, AgentCard, AgentSkill
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH, PREV_AGENT_CARD_WELL_KNOWN_PATH
+from strands import Agent
+
+from a2a_executor import PooledA2AExecutor
+from dinamic_agent import AgentConfigManager, create_config_store
+from metrics import CONTENT_TYPE, MetricsMiddleware, MetricsRegistry
+from session_pool import AgentSessionPool
+from startup import serve, timer as startup_timer
+from strands_patches import patch_strands_a2a_executor
+from ttl_cache import TTLCache
+from worker_pool import AgentWorkerPool, PoolSaturatedError, QueueTimeoutError
+
+patch_strands_a2a_executor()
+
+load_dotenv() # init from env vars
+
+
+class HostedAgent:
+    """
+    A gateway agent: its card, one Agent per conversation and the A2A app serving them.
+
+    Every conversation (A2A ``context_id`` or HTTP ``session_id``) gets its own Agent from
+    ``sessions``, built from the same constructor arguments, so conversations share the model
+    client and tool providers but never a history, and different conversations run in parallel.
+    """
+
+    def __init__(
+        self,
+        version: str,
+        card: AgentCard,
+        agent_kwargs: Dict[str, Any],
+        worker_pool: AgentWorkerPool,
+        task_store: TaskStore,
+        max_contexts: int = 256,
+        context_ttl_seconds: float = 1800.0,
+        task_timeout: Optional[float] = None,
+    ):
+        self.version = version
+        self.card = card
+        self.sessions = AgentSessionPool(
+            agent_factory=lambda session_id: Agent(**agent_kwargs),
+            max_sessions=max_contexts,
+            ttl_seconds=context_ttl_seconds,
+        )
+        self.app = A2AFastAPIApplication(
+            agent_card=card,
+            http_handler=DefaultRequestHandler(
+                agent_executor=PooledA2AExecutor(self.sessions, worker_pool, task_timeout=task_timeout),
+                task_store=task_store,
+            ),
+        ).build()
+
+
+class AgentGateway:
+    """
+    Serves every agent of an ``AgentConfigManager`` from one process.
+
+    Agent cards are generated from the agent's configuration (``get_agent_info``), so discovery
+    never builds an agent. An agent's model and tools are built on its first message, off the event
+    loop and once however many requests arrive together, and its ``HostedAgent`` is kept in a
+    size-bounded LRU whose entries expire after ``ttl_seconds``. A configuration change rebuilds it
+    on its next request, and its conversations start over. Turns of every agent run through one
+    ``worker_pool`` and A2A tasks are kept in one task store, so they outlive a rebuild.
+    """
+
+    def __init__(
+        self,
+        config_manager: AgentConfigManager,
+        public_url: str,
+        worker_pool: AgentWorkerPool,
+        max_agents: int = 64,
+        ttl_seconds: float = 900.0,
+        max_contexts: int = 256,
+        context_ttl_seconds: float = 1800.0,
+        task_timeout: Optional[float] = None,
+    ):
+        self.config_manager = config_manager
+        self.public_url = public_url.rstrip("/")
+        self.worker_pool = worker_pool
+        self.max_contexts = max_contexts
+        self.context_ttl_seconds = context_ttl_seconds
+        self.task_timeout = task_timeout
+        self.hosted = TTLCache(max_size=max_agents, ttl_seconds=ttl_seconds)
+        self.task_store = InMemoryTaskStore()
+        self._building: Dict[Tuple[str, str], asyncio.Task] = {}
+        self.agents_built = 0
+
+    def agent_url(self, agent_id: str) -> str:
+        return f"{self.public_url}/a2a/{agent_id}/"
+
+    def card(self, agent_id: str) -> AgentCard:
+        """Build the A2A card of an agent from its configuration; raises ValueError for unknown agents."""
+        info = self.config_manager.get_agent_info(agent_id)
+        return AgentCard(
+            name=info["name"],
+            description=info["description"],
+            url=self.agent_url(agent_id),
+            version="0.0.1",
+            skills=[AgentSkill(id=agent_id, name=info["name"], description=info["description"], tags=[info["model_type"]])],
+            default_input_modes=["text"],
+            default_output_modes=["text"],
+            capabilities=AgentCapabilities(streaming=True),
+        )
+
+    async def _build(self, agent_id: str, config: Dict[str, Any], version: str) -> HostedAgent:
+        # Building the model client and reading the card's configuration can block, so both run off the loop
+        agent_kwargs, card = await asyncio.to_thread(
+            lambda: (self.config_manager.agent_kwargs(agent_id, config), self.card(agent_id))
+        )
+        hosted = HostedAgent(
+            version, card, agent_kwargs, self.worker_pool, self.task_store,
+            max_contexts=self.max_contexts, context_ttl_seconds=self.context_ttl_seconds, task_timeout=self.task_timeout,
+        )
+        self.hosted.set(agent_id, hosted)
+        self.agents_built += 1
+        print(f"Built agent {agent_id}")
+        return hosted
+
+    async def get(self, agent_id: str) -> HostedAgent:
+        """Get the hosted agent, building it on first use; raises ValueError for unknown agents."""
+        # Loading the configuration can read the config store (file or SQLite), so it stays off the loop
+        config, version = await asyncio.to_thread(self.config_manager.load_versioned_config, agent_id)
+        if version is None:
+            raise ValueError(f"No configuration found for agent: {agent_id}")
+        hosted = self.hosted.get(agent_id)
+        if hosted is not None and hosted.version == version:
+            return hosted
+
+        key = (agent_id, version)
+        task = self._building.get(key)
+        if task is None:
+            task = asyncio.create_task(self._build(agent_id, config, version))
+            self._building[key] = task
+            task.add_done_callback(lambda _: self._building.pop(key, None))
+        return await asyncio.shield(task)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "hosted": self.hosted.stats(),
+            "agents_built": self.agents_built,
+            "building": len(self._building),
+            "workers": self.worker_pool.stats(),
+            "config_store": self.config_manager.config_store.stats(),
+            "shared_clients": self.config_manager.clients.stats(),
+        }
+
+
+class TenantA2AApp:
+    """ASGI app, mounted at /a2a, routing /a2a/{agent_id}/... to that agent's A2A app."""
+
+    def __init__(self, gateway: AgentGateway):
+        self.gateway = gateway
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] != "http":
+            return
+        root_path = scope.get("root_path", "")
+        path = scope["path"][len(root_path):] if scope["path"].startswith(root_path) else scope["path"]
+        agent_id, _, rest = path.lstrip("/").partition("/")
+        if not agent_id:
+            await JSONResponse({"detail": "Not Found"}, status_code=404)(scope, receive, send)
+            return
+
+        try:
+            if "/" + rest in (AGENT_CARD_WELL_KNOWN_PATH, PREV_AGENT_CARD_WELL_KNOWN_PATH):
+                card = self.gateway.card(agent_id)
+                await JSONResponse(card.model_dump(mode="json", by_alias=True, exclude_none=True))(scope, receive, send)
+                return
+            hosted = await self.gateway.get(agent_id)
+        except ValueError as e:
+            await JSONResponse({"detail": str(e)}, status_code=404)(scope, receive, send)
+            return
+        await hosted.app(dict(scope, root_path=f"{root_path}/{agent_id}"), receive, send)
+
+
+# Initialize FastAPI app
+app = FastAPI(
+    title="Agent Gateway",
+    description="Serves every configured dynamic agent over A2A and HTTP from one process",
+    version="1.0.0"
+)
+
+# Per-hop timings and gateway counters, exported on GET /metrics
+metrics = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# Agent configurations: "memory" (the sample configurations), "file" (JSON file) or "sqlite"
+config_store = create_config_store(
+    os.getenv("AGENT_CONFIG_BACKEND", "memory"),
+    path=os.getenv("AGENT_CONFIG_PATH") or None,
+    refresh_interval=float(os.getenv("AGENT_CONFIG_REFRESH_INTERVAL", "5")),
+)
+
+config_manager = AgentConfigManager(config_store)
+
+# Turns of every hosted agent, over A2A and HTTP: at most this many at once, and a bounded queue behind them
+gateway_workers = AgentWorkerPool(
+    max_concurrency=int(os.getenv("GATEWAY_MAX_CONCURRENCY", "16")),
+    max_queue=int(os.getenv("GATEWAY_MAX_QUEUE", "64")),
+    queue_timeout=float(os.getenv("GATEWAY_QUEUE_TIMEOUT", "30")),
+)
+gateway = AgentGateway(
+    config_manager,
+    # Public base URL of the gateway, used in the agent cards
+    public_url=os.getenv("GATEWAY_URL", "http://localhost:8082"),
+    worker_pool=gateway_workers,
+    # Maximum agents held in memory at once; the least recently used is evicted first
+    max_agents=int(os.getenv("GATEWAY_MAX_AGENTS", "64")),
+    ttl_seconds=float(os.getenv("GATEWAY_AGENT_TTL", "900")),
+    # Conversations kept per agent, and seconds an idle one is kept
+    max_contexts=int(os.getenv("GATEWAY_MAX_CONTEXTS", "256")),
+    context_ttl_seconds=float(os.getenv("GATEWAY_CONTEXT_TTL_SECONDS", "1800")),
+    # Longest an A2A task may run; callers that send a deadline in the message metadata get the time they have left
+    task_timeout=float(os.getenv("GATEWAY_TASK_TIMEOUT", "120")),
+)
+metrics.add_collector("gateway", gateway.stats)
+app.mount("/a2a", TenantA2AApp(gateway))
+
+
+class InvocationRequest(BaseModel):
+    input: str
+    # Conversation to continue; without it the turn runs on a fresh agent
+    session_id: Optional[str] = None
+
+
+class InvocationResponse(BaseModel):
+    agent_id: str
+    response: str
+    session_id: Optional[str] = None
+
+
+def agent_entry(agent_id: str) -> Dict[str, Any]:
+    return {
+        **config_manager.get_agent_info(agent_id),
+        "url": gateway.agent_url(agent_id),
+        "hosted": gateway.hosted.get(agent_id) is not None,
+    }
+
+
+@app.get("/")
+async def root():
+    """Health check endpoint"""
+    return {"message": "Agent Gateway is running"}
+
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: startup has finished. Reports how long each startup phase took"""
+    report = startup_timer.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/stats")
+async def stats():
+    """Hosted agents, agent cache, config store and shared client counters"""
+    return {"gateway": gateway.stats(), "startup": startup_timer.report()}
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """HTTP latency histograms, in-flight gauges and gateway counters in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.get("/agents")
+async def list_agents() -> List[Dict[str, Any]]:
+    """Every configured agent with its A2A URL and whether it is currently in memory"""
+    return [agent_entry(agent_id) for agent_id in config_manager.list_available_agents()]
+
+@app.get("/agents/{agent_id}")
+async def get_agent(agent_id: str):
+    try:
+        return agent_entry(agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+
+@app.post("/agents/{agent_id}/invocation", response_model=InvocationResponse)
+async def invocation(agent_id: str, request: InvocationRequest):
+    try:
+        hosted = await gateway.get(agent_id)
+    except ValueError as e:
+        raise HTTPException(status_code=404, detail=str(e))
+    try:
+        with metrics.time_hop("gateway_agent"):
+            agent, lock = await hosted.sessions.acquire(request.session_id)
+            try:
+                result = await gateway_workers.run(agent.invoke_async, request.input)
+            finally:
+                await hosted.sessions.release(request.session_id, lock)
+        return InvocationResponse(agent_id=agent_id, response=str(result), session_id=request.session_id)
+    except PoolSaturatedError as e:
+        raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+    except QueueTimeoutError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        print(f"Error invoking agent {agent_id}: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+@app.on_event("startup")
+async def startup():
+    startup_timer.mark_ready()
+
+def create_app() -> FastAPI:
+    """
+    App factory for process managers, e.g. ``uvicorn agent_gateway:create_app --factory --workers 4``.
+    Every worker builds its own agents; point AGENT_CONFIG_BACKEND at a shared file or SQLite store.
+    """
+    return app
+
+def main():
+    serve("agent_gateway:create_app", 8082, app=create_app())
+
+if __name__ == "__main__":
+    main()
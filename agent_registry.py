@@ -0,0 +1,172 @@
+import asyncio
+import logging
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+import httpx
+from a2a.types import AgentCard
+from a2a.utils.constants import AGENT_CARD_WELL_KNOWN_PATH
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class _CardEntry:
+    """A cached agent card with its HTTP validator and expiry."""
+
+    card: AgentCard
+    etag: Optional[str]
+    expires_at: float
+    fetched_at: float
+
+
+class AgentCardRegistry:
+    """
+    Cache of A2A agent cards with startup prefetch and background refresh.
+
+    All known agents are fetched in parallel by ``start()``, then re-validated in the background
+    every ``refresh_interval`` seconds with ``If-None-Match`` so unchanged cards cost a 304. Cards
+    stay usable for ``ttl_seconds`` after the last successful fetch, so a remote agent being briefly
+    unreachable does not drop it. One pooled ``httpx.AsyncClient`` is kept per remote agent and
+    reused for both discovery and messaging, so discovery never sits on the request path.
+    """
+
+    def __init__(
+        self,
+        known_agent_urls: List[str],
+        ttl_seconds: float = 600.0,
+        refresh_interval: float = 60.0,
+        timeout: float = 300.0,
+        httpx_client_args: Optional[Dict[str, Any]] = None,
+    ):
+        self.known_agent_urls = list(dict.fromkeys(url.rstrip("/") for url in known_agent_urls if url))
+        self.ttl_seconds = ttl_seconds
+        self.refresh_interval = refresh_interval
+        self.timeout = timeout
+        self._httpx_client_args = dict(httpx_client_args or {})
+        self._httpx_client_args.setdefault("timeout", timeout)
+
+        self._entries: Dict[str, _CardEntry] = {}
+        self._clients: Dict[str, httpx.AsyncClient] = {}
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self._refresh_task: Optional[asyncio.Task] = None
+
+        self.fetches = 0
+        self.not_modified = 0
+        self.failures = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return url.rstrip("/")
+
+    def get_client(self, url: str) -> httpx.AsyncClient:
+        """Return the pooled HTTP client for a remote agent, creating it on first use."""
+        key = self._key(url)
+        client = self._clients.get(key)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(**self._httpx_client_args)
+            self._clients[key] = client
+        return client
+
+    async def start(self) -> None:
+        """Prefetch every known agent card in parallel and start the background refresher."""
+        await self.refresh_all()
+        if self.refresh_interval and self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(self._refresh_loop())
+
+    async def stop(self) -> None:
+        """Stop the background refresher and close every pooled client."""
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except asyncio.CancelledError:
+                pass
+            self._refresh_task = None
+        clients, self._clients = list(self._clients.values()), {}
+        await asyncio.gather(*(client.aclose() for client in clients), return_exceptions=True)
+
+    async def refresh_all(self) -> None:
+        urls = set(self.known_agent_urls) | set(self._entries)
+        results = await asyncio.gather(*(self._fetch(url) for url in urls), return_exceptions=True)
+        for url, result in zip(urls, results):
+            if isinstance(result, Exception):
+                logger.error(f"Failed to refresh agent card for {url}: {result}")
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            await self.refresh_all()
+
+    async def get_card(self, url: str) -> AgentCard:
+        """
+        Return the agent card for ``url``, fetching it only if it was never fetched or has expired.
+
+        Args:
+            url: Base URL of the A2A agent
+
+        Returns:
+            The cached or freshly fetched AgentCard
+        """
+        key = self._key(url)
+        entry = self._entries.get(key)
+        if entry is not None and entry.expires_at > time.monotonic():
+            self.hits += 1
+            return entry.card
+        self.misses += 1
+        return await self._fetch(key)
+
+    async def _fetch(self, url: str) -> AgentCard:
+        key = self._key(url)
+        lock = self._locks.setdefault(key, asyncio.Lock())
+        async with lock:
+            entry = self._entries.get(key)
+            headers = {"If-None-Match": entry.etag} if entry is not None and entry.etag else {}
+            try:
+                response = await self.get_client(key).get(f"{key}{AGENT_CARD_WELL_KNOWN_PATH}", headers=headers)
+                self.fetches += 1
+                now = time.monotonic()
+                if response.status_code == 304 and entry is not None:
+                    self.not_modified += 1
+                    entry.expires_at = now + self.ttl_seconds
+                    entry.fetched_at = now
+                    return entry.card
+                response.raise_for_status()
+                card = AgentCard.model_validate(response.json())
+            except Exception:
+                self.failures += 1
+                # A stale card beats no card while the remote agent is briefly unreachable
+                if entry is not None:
+                    return entry.card
+                raise
+
+            self._entries[key] = _CardEntry(
+                card=card,
+                etag=response.headers.get("ETag"),
+                expires_at=now + self.ttl_seconds,
+                fetched_at=now,
+            )
+            logger.info(f"Agent card cached for {key}")
+            return card
+
+    def cards(self) -> Dict[str, AgentCard]:
+        """Every cached card keyed by agent URL, expired or not."""
+        return {url: entry.card for url, entry in self._entries.items()}
+
+    def stats(self) -> Dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "agents": {
+                url: {"name": entry.card.name, "age_seconds": now - entry.fetched_at, "etag": entry.etag}
+                for url, entry in self._entries.items()
+            },
+            "pooled_clients": len(self._clients),
+            "fetches": self.fetches,
+            "not_modified": self.not_modified,
+            "failures": self.failures,
+            "hits": self.hits,
+            "misses": self.misses,
+        }
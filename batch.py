@@ -0,0 +1,264 @@
+"""
+Batch runner for JSONL files of ``/invocation`` requests, one ``InvocationRequest`` per line.
+
+Results are written as NDJSON in completion order, one line per record with its ``index`` (the
+line number in the input, from 0), so an interrupted run can be resumed:
+
+    python batch.py schedules.jsonl --output results.jsonl --concurrency 8 --rate 5
+    python batch.py schedules.jsonl --output results.jsonl --resume
+    python batch.py schedules.jsonl --url http://localhost:8081 --output results.jsonl
+
+Without ``--url`` the orchestrator runs in this process; with it the file is streamed to the
+running orchestrator's ``POST /invocations/batch`` in a single request.
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+
+class RateLimiter:
+    """
+    Token bucket shared by every record that goes through it, whichever route (orchestrator or
+    direct A2A call) the record then takes. ``rate`` is in records per second; 0 disables it.
+    """
+
+    def __init__(self, rate: float = 0.0, burst: Optional[int] = None):
+        self.rate = rate
+        self.burst = burst or max(1, int(rate))
+        self._tokens = float(self.burst)
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+        self.waited_seconds = 0.0
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        # The lock makes waiters take tokens in arrival order
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await asyncio.sleep(wait)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"rate": self.rate, "burst": self.burst, "waited_seconds": round(self.waited_seconds, 3)}
+
+
+async def iter_lines(chunks: AsyncIterable[bytes]) -> AsyncIterator[str]:
+    """Split a byte stream (e.g. a request body) into text lines as it arrives."""
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            yield line.decode("utf-8")
+    if buffer:
+        yield buffer.decode("utf-8")
+
+
+async def iter_records(lines: AsyncIterable[str], offset: int = 0) -> AsyncIterator[Tuple[int, Any]]:
+    """
+    Number the non-blank lines from 0 and parse them, skipping the first ``offset`` records.
+    Yields (index, record), where record is the parsed object or the ``ValueError`` of a bad line.
+    """
+    index = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        if index >= offset:
+            try:
+                yield index, json.loads(line)
+            except ValueError as e:
+                yield index, e
+        index += 1
+
+
+async def run_batch(
+    records: AsyncIterable[Tuple[int, Any]],
+    handler: Callable[[Dict[str, Any]], Awaitable[Dict[str, Any]]],
+    concurrency: int = 4,
+    limiter: Optional[RateLimiter] = None,
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Run ``handler`` over the records with at most ``concurrency`` in flight and yield one result
+    per record, ``{"index": ..., "status": "success" | "error", ...}``, as each one completes.
+    Input is read only as fast as slots free up, so arbitrarily long inputs use bounded memory.
+    """
+    async def run(index: int, record: Any) -> Dict[str, Any]:
+        if isinstance(record, Exception) or not isinstance(record, dict):
+            return {"index": index, "status": "error", "status_code": 400, "error": f"Invalid record: {record}"}
+        if limiter is not None:
+            await limiter.acquire()
+        try:
+            return {"index": index, "status": "success", **await handler(record)}
+        except Exception as e:
+            return {"index": index, "status": "error", "status_code": getattr(e, "status_code", 500), "error": str(getattr(e, "detail", e))}
+
+    pending: Set[asyncio.Task] = set()
+    iterator = records.__aiter__()
+    exhausted = False
+    try:
+        while pending or not exhausted:
+            while not exhausted and len(pending) < concurrency:
+                try:
+                    index, record = await iterator.__anext__()
+                except StopAsyncIteration:
+                    exhausted = True
+                    break
+                pending.add(asyncio.create_task(run(index, record)))
+            if not pending:
+                break
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                yield task.result()
+    finally:
+        # The consumer went away (client disconnect, Ctrl-C): stop the records still running
+        for task in pending:
+            task.cancel()
+
+
+def is_invalid(result: Dict[str, Any]) -> bool:
+    """Whether a record failed because it is not a valid request (bad JSON or schema), so a retry would fail too."""
+    return result.get("status") == "error" and result.get("status_code") == 400
+
+
+def is_done(result: Dict[str, Any]) -> bool:
+    """Whether a record needs no retry: it succeeded, or it is invalid."""
+    return result.get("status") == "success" or is_invalid(result)
+
+
+def summarize_results(results: List[Dict[str, Any]], started: float, offset: int = 0) -> Dict[str, Any]:
+    """
+    The final NDJSON line of a batch, with the offset to resume from. Like ``--resume``, successes
+    and invalid records count as done, so resuming from ``next_offset`` retries the records that
+    failed for any other reason and never gets stuck on a record that can never run.
+    """
+    done = {result["index"] for result in results if is_done(result)}
+    # Every record before next_offset succeeded or is invalid; later ones may be done too
+    next_offset = offset
+    while next_offset in done:
+        next_offset += 1
+    return {
+        "type": "summary",
+        "records": len(results),
+        "succeeded": sum(1 for result in results if result["status"] == "success"),
+        "failed": sum(1 for result in results if result["status"] != "success"),
+        "invalid": sum(1 for result in results if is_invalid(result)),
+        "next_offset": next_offset,
+        "seconds": round(time.perf_counter() - started, 3),
+    }
+
+
+def read_done_indices(path: str) -> Set[int]:
+    """Indices of an output file that need no retry (succeeded or invalid), for --resume."""
+    done: Set[int] = set()
+    if not os.path.exists(path):
+        return done
+    with open(path) as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if isinstance(result, dict) and "index" in result and is_done(result):
+                done.add(result["index"])
+    return done
+
+
+async def _lines(items: Iterable[str]) -> AsyncIterator[str]:
+    for item in items:
+        yield item
+
+
+async def run_local(lines: List[str], args: argparse.Namespace) -> AsyncIterator[Dict[str, Any]]:
+    """Run the records through the orchestrator in this process."""
+    import multi_agent_strands
+
+    await multi_agent_strands.startup()
+    try:
+        limiter = RateLimiter(args.rate)
+        async for result in run_batch(iter_records(_lines(lines)), multi_agent_strands.run_batch_record, args.concurrency, limiter):
+            yield result
+    finally:
+        await multi_agent_strands.shutdown()
+
+
+async def run_remote(lines: List[str], args: argparse.Namespace) -> AsyncIterator[Dict[str, Any]]:
+    """Stream the records to a running orchestrator's /invocations/batch and yield its results."""
+    import httpx
+
+    async def body() -> AsyncIterator[bytes]:
+        for line in lines:
+            yield (line + "\n").encode("utf-8")
+
+    async with httpx.AsyncClient(timeout=None) as client:
+        async with client.stream(
+            "POST", f"{args.url.rstrip('/')}/invocations/batch",
+            params={"concurrency": args.concurrency}, content=body(),
+            headers={"Content-Type": "application/x-ndjson"},
+        ) as response:
+            response.raise_for_status()
+            async for line in response.aiter_lines():
+                if line.strip():
+                    result = json.loads(line)
+                    if result.get("type") != "summary":
+                        yield result
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file of InvocationRequest records")
+    parser.add_argument("--output", help="NDJSON result file (default: stdout)")
+    parser.add_argument("--url", help="Orchestrator base URL; runs the orchestrator in-process when omitted")
+    parser.add_argument("--concurrency", type=int, default=4, help="Records in flight at once")
+    parser.add_argument("--rate", type=float, default=0.0, help="Records started per second, 0 for no limit (in-process only; the server uses BATCH_RATE_LIMIT)")
+    parser.add_argument("--offset", type=int, default=0, help="Skip the first N records")
+    parser.add_argument("--resume", action="store_true", help="Skip records of --output that succeeded or are invalid, and append to it")
+    return parser.parse_args(argv)
+
+
+async def amain(args: argparse.Namespace) -> None:
+    with open(args.input) as f:
+        records = [line.rstrip("\n") for line in f if line.strip()]
+    skip = read_done_indices(args.output) if args.resume and args.output else set()
+    # Records are sent without the skipped ones, so results are mapped back to their input line
+    indices = [i for i in range(args.offset, len(records)) if i not in skip]
+    lines = [records[i] for i in indices]
+    print(f"Running {len(lines)} of {len(records)} records ({len(skip)} already done, offset {args.offset})", file=sys.stderr)
+
+    started = time.perf_counter()
+    results: List[Dict[str, Any]] = []
+    out = open(args.output, "a" if args.resume else "w") if args.output else sys.stdout
+    try:
+        source = run_remote(lines, args) if args.url else run_local(lines, args)
+        async for result in source:
+            result["index"] = indices[result["index"]]
+            results.append(result)
+            out.write(json.dumps(result, default=str) + "\n")
+            out.flush()
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    summary = summarize_results(results, started)
+    print(
+        f"{summary['succeeded']} succeeded, {summary['failed']} failed ({summary['invalid']} invalid) in {summary['seconds']}s",
+        file=sys.stderr,
+    )
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    asyncio.run(amain(parse_args(argv)))
+
+
+if __name__ == "__main__":
+    main()
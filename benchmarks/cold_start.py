@@ -0,0 +1,208 @@
+"""
+Cold start benchmark for the orchestrator and the calendar agent.
+
+For every service and startup mode it measures, in fresh processes:
+
+- import time: ``import <module>`` on its own, with nothing else in the process
+- time to port open: from spawning ``python startup.py ...`` until ``/healthz`` answers
+- time to first successful request: until a first real request (``POST /invocation`` or an A2A
+  ``message/send``) succeeds, sent as soon as the port is open
+- the startup phases the service reports on ``/ready`` (import, create_app, warmup)
+
+The services run against the fake Bedrock model and a local fake MCP server, as in
+``benchmarks.run``; the orchestrator talks to an already warm in-process calendar agent:
+
+    python -m benchmarks.cold_start --runs 5
+    python -m benchmarks.cold_start --services calendar --modes lazy
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import BackgroundServers, FakeBedrockModel, create_fake_mcp_app  # noqa: E402
+from benchmarks.run import fmt_ms, free_port, git_commit, summarize  # noqa: E402
+
+MODULES = {"orchestrator": "multi_agent_strands", "calendar": "nango_caller_agent"}
+
+
+def start_dependencies(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the fake MCP server and a warm calendar agent for the orchestrator to talk to."""
+    servers = BackgroundServers()
+    mcp_url = servers.serve(create_fake_mcp_app(latency_ms=args.mcp_latency_ms), free_port())
+    env = {"NANGO_MCP_URL": f"{mcp_url}/mcp", "NANGO_SECRET_KEY": os.getenv("NANGO_SECRET_KEY", "benchmark")}
+    calendar_url = None
+    if "orchestrator" in args.services:
+        FakeBedrockModel.first_token_ms = args.model_first_token_ms
+        FakeBedrockModel.token_ms = 0
+        import strands.models.bedrock
+        strands.models.bedrock.BedrockModel = FakeBedrockModel
+
+        calendar_port = free_port()
+        calendar_url = f"http://127.0.0.1:{calendar_port}"
+        os.environ.update(env)
+        os.environ["CALENDAR_AGENT_URL"] = calendar_url
+        import nango_caller_agent
+        servers.serve(nango_caller_agent.create_app(), calendar_port)
+    return {"servers": servers, "env": env, "calendar": calendar_url}
+
+
+def measure_import(module: str, env: Dict[str, str]) -> float:
+    code = f"import time; started = time.perf_counter(); import {module}; print(time.perf_counter() - started)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], cwd=ROOT, env=env, capture_output=True, text=True, check=True
+    )
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def first_request(client: httpx.Client, service: str, url: str) -> bool:
+    if service == "orchestrator":
+        response = client.post(f"{url}/invocation", json={"input": "What is on my calendar? connection_id bench-connection"})
+        return response.status_code == 200 and not (
+            isinstance(response.json().get("response"), dict) and "error" in response.json()["response"]
+        )
+    response = client.post(url, json={
+        "jsonrpc": "2.0",
+        "id": uuid.uuid4().hex,
+        "method": "message/send",
+        "params": {"message": {
+            "kind": "message",
+            "role": "user",
+            "messageId": uuid.uuid4().hex,
+            "parts": [{"kind": "text", "text": "List my events, connection_id bench-connection"}],
+        }},
+    })
+    return response.status_code == 200 and "result" in response.json()
+
+
+def measure_start(service: str, mode: str, env: Dict[str, str], timeout: float) -> Dict[str, Any]:
+    """Spawn the service once and time it up to its first successful request."""
+    port = free_port()
+    url = f"http://127.0.0.1:{port}"
+    env = {**env, "STARTUP_MODE": mode, "HOST": "127.0.0.1", "PORT": str(port), "WEB_CONCURRENCY": "1",
+           "COLD_START_MODULE": MODULES[service]}
+    if service == "calendar":
+        env["CALENDAR_AGENT_URL"] = url
+
+    started = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "startup.py", "benchmarks.cold_start_app:create_app", str(port)],
+        cwd=ROOT, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    result: Dict[str, Any] = {"port_open": None, "first_success": None, "ready": None}
+    try:
+        with httpx.Client(timeout=timeout) as client:
+            deadline = started + timeout
+            while result["port_open"] is None:
+                if process.poll() is not None or time.perf_counter() > deadline:
+                    raise RuntimeError(f"{service} ({mode}) did not open its port")
+                try:
+                    if client.get(f"{url}/healthz").status_code == 200:
+                        result["port_open"] = time.perf_counter() - started
+                except httpx.TransportError:
+                    time.sleep(0.01)
+            if first_request(client, service, url):
+                result["first_success"] = time.perf_counter() - started
+            result["ready"] = client.get(f"{url}/ready").json()
+    finally:
+        process.terminate()
+        try:
+            process.wait(10)
+        except subprocess.TimeoutExpired:
+            process.kill()
+    return result
+
+
+def phase_seconds(runs: List[Dict[str, Any]]) -> Dict[str, List[float]]:
+    phases: Dict[str, List[float]] = {}
+    for run in runs:
+        for phase in (run["ready"] or {}).get("phases", []):
+            phases.setdefault(phase["phase"], []).append(phase["seconds"])
+    return phases
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--services", default="orchestrator,calendar", help="Comma separated services to start")
+    parser.add_argument("--modes", default="eager,lazy", help="Comma separated STARTUP_MODE values to compare")
+    parser.add_argument("--runs", type=int, default=3, help="Cold starts per service and mode")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Seconds a start may take before it counts as failed")
+    parser.add_argument("--model-first-token-ms", type=float, default=50.0, help="Fake model latency before the first token of every turn")
+    parser.add_argument("--mcp-latency-ms", type=float, default=20.0, help="Fake MCP server latency per tool call")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/cold-start-<commit>-<timestamp>.json)")
+    args = parser.parse_args(argv)
+    args.services = [service for service in args.services.split(",") if service.strip()]
+    args.modes = [mode for mode in args.modes.split(",") if mode.strip()]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    dependencies = start_dependencies(args)
+    base_env = {**os.environ, **dependencies["env"], "COLD_START_MODEL_FIRST_TOKEN_MS": str(args.model_first_token_ms)}
+    if dependencies["calendar"]:
+        base_env["CALENDAR_AGENT_URL"] = dependencies["calendar"]
+
+    services = []
+    try:
+        for service in args.services:
+            imports = [measure_import(MODULES[service], base_env) for _ in range(args.runs)]
+            entry = {"service": service, "import": summarize(imports), "modes": {}}
+            print(f"{service}: import p50={fmt_ms(entry['import']['p50_ms'])}ms")
+            for mode in args.modes:
+                runs = [measure_start(service, mode, base_env, args.timeout) for _ in range(args.runs)]
+                entry["modes"][mode] = {
+                    "port_open": summarize([run["port_open"] for run in runs]),
+                    "first_success": summarize([run["first_success"] for run in runs if run["first_success"] is not None]),
+                    "failed_first_requests": sum(1 for run in runs if run["first_success"] is None),
+                    "phases": {phase: summarize(values) for phase, values in phase_seconds(runs).items()},
+                }
+                stats = entry["modes"][mode]
+                print(
+                    f"    {mode:<6} port_open p50={fmt_ms(stats['port_open']['p50_ms'])}ms "
+                    f"first_success p50={fmt_ms(stats['first_success']['p50_ms'])}ms "
+                    + " ".join(f"{phase}={fmt_ms(values['p50_ms'])}ms" for phase, values in stats["phases"].items())
+                )
+            services.append(entry)
+    finally:
+        dependencies["servers"].stop()
+
+    commit = git_commit()
+    timestamp = datetime.now(timezone.utc)
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "settings": {
+                "runs": args.runs,
+                "model_first_token_ms": args.model_first_token_ms,
+                "mcp_latency_ms": args.mcp_latency_ms,
+            },
+        },
+        "services": services,
+    }
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"cold-start-{commit or 'unknown'}-{timestamp.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,18 @@
+"""
+App factory used by ``benchmarks.cold_start`` in the service subprocess: swaps in the fake Bedrock
+model, then imports the service named by COLD_START_MODULE. Importing this module is therefore the
+service's own import plus the fakes, which is what the "import" startup phase measures.
+"""
+import importlib
+import os
+
+import strands.models.bedrock
+
+from benchmarks.fakes import FakeBedrockModel
+
+FakeBedrockModel.first_token_ms = float(os.getenv("COLD_START_MODEL_FIRST_TOKEN_MS", "50"))
+FakeBedrockModel.token_ms = 0
+FakeBedrockModel.a2a_target_url = os.getenv("CALENDAR_AGENT_URL")
+strands.models.bedrock.BedrockModel = FakeBedrockModel
+
+create_app = importlib.import_module(os.environ["COLD_START_MODULE"]).create_app
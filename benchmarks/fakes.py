@@ -0,0 +1,265 @@
+import asyncio
+import json
+import re
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Callable, Dict, List, Optional
+
+import uvicorn
+from mcp.server.fastmcp import FastMCP
+from strands.models.model import Model
+
+_CONNECTION_ID = re.compile(r"connection[_ ]id\W+([\w-]+)", re.IGNORECASE)
+
+
+class HopRecorder:
+    """Thread-safe collection of per-hop durations, shared by every in-process service."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._samples: Dict[str, List[float]] = {}
+
+    def record(self, hop: str, seconds: float) -> None:
+        with self._lock:
+            self._samples.setdefault(hop, []).append(seconds)
+
+    @contextmanager
+    def timed(self, hop: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(hop, time.perf_counter() - started)
+
+    def drain(self) -> Dict[str, List[float]]:
+        """Return every sample recorded so far and start over."""
+        with self._lock:
+            samples, self._samples = self._samples, {}
+        return samples
+
+
+recorder = HopRecorder()
+
+
+def _last_user_text(messages: List[Dict[str, Any]]) -> str:
+    for message in reversed(messages):
+        if message["role"] == "user":
+            texts = [block["text"] for block in message["content"] if "text" in block]
+            if texts:
+                return "".join(texts)
+    return ""
+
+
+def _tool_calls_this_turn(messages: List[Dict[str, Any]]) -> int:
+    """Tool calls made since the last plain user message, i.e. how far into its plan the model is."""
+    calls = 0
+    for message in reversed(messages):
+        if message["role"] == "user" and any("text" in block for block in message["content"]):
+            break
+        if message["role"] == "assistant":
+            calls += sum(1 for block in message["content"] if "toolUse" in block)
+    return calls
+
+
+def connection_id_from(text: str) -> str:
+    match = _CONNECTION_ID.search(text)
+    return match.group(1) if match else "bench-connection"
+
+
+class FakeBedrockModel(Model):
+    """
+    Stand-in for ``BedrockModel`` with configurable latency and a scripted tool plan.
+
+    Accepts every ``BedrockModel`` argument so it can be swapped in before the services are
+    imported. Each turn waits ``first_token_ms`` (``fast_first_token_ms`` for Haiku model ids, when
+    set), then emits either the next tool call of the plan matching the tools it was given, or
+    ``answer_tokens`` text tokens ``token_ms`` apart.
+
+    With ``cache_prompt`` / ``cache_tools`` in its configuration it mimics Bedrock prompt caching:
+    the first call with a given system prompt (and tool schemas) reports them as
+    ``cacheWriteInputTokens``, later calls as ``cacheReadInputTokens`` and wait ``cache_speedup``
+    less before the first token.
+
+    Plans, keyed by a tool the agent must have:
+
+    - orchestrator (``a2a_send_message``): forward the user input to ``a2a_target_url``
+    - calendar agent (``nango_mcp_calendar_call``): list the calendar tools, then call ``list_events``
+    """
+
+    first_token_ms: float = 300.0
+    token_ms: float = 10.0
+    answer_tokens: int = 40
+    a2a_target_url: Optional[str] = None
+    fast_first_token_ms: Optional[float] = None
+    cache_speedup: float = 0.5
+    # Prompt prefixes already written to the fake prompt cache, shared by every instance
+    _cached_prefixes: set = set()
+
+    def __init__(self, *args: Any, **config: Any):
+        self.config = dict(config)
+        self.config.setdefault("model_id", "fake-bedrock-model")
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, *args: Any, **kwargs: Any):
+        raise NotImplementedError("FakeBedrockModel does not support structured output")
+
+    def _plan(self, tool_names: set, user_text: str) -> tuple:
+        if "nango_mcp_calendar_call" in tool_names:
+            connection_id = connection_id_from(user_text)
+            return "calendar_model", [
+                ("nango_mcp_calendar_tools", {"connection_id": connection_id}),
+                ("nango_mcp_calendar_call", {
+                    "connection_id": connection_id,
+                    "tool_name": "list_events",
+                    "arguments": {"calendar_id": "primary"},
+                }),
+            ]
+        if "a2a_send_message" in tool_names and self.a2a_target_url:
+            return "orchestrator_model", [
+                ("a2a_send_message", {"message_text": user_text, "target_agent_url": self.a2a_target_url}),
+            ]
+        return "model", []
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        started = time.perf_counter()
+        user_text = _last_user_text(messages)
+        hop, plan = self._plan({spec["name"] for spec in tool_specs or []}, user_text)
+        step = _tool_calls_this_turn(messages)
+
+        first_token_ms = self.first_token_ms
+        if self.fast_first_token_ms is not None and "haiku" in self.config["model_id"]:
+            first_token_ms = self.fast_first_token_ms
+        prefix = (system_prompt or "") if self.config.get("cache_prompt") else ""
+        if self.config.get("cache_tools"):
+            prefix += json.dumps(tool_specs or [])
+        cache_key = (self.config["model_id"], prefix)
+        prefix_tokens = len(prefix) // 4
+        cache_hit = bool(prefix) and cache_key in self._cached_prefixes
+        if cache_hit:
+            first_token_ms *= 1 - self.cache_speedup
+        elif prefix:
+            self._cached_prefixes.add(cache_key)
+
+        await asyncio.sleep(first_token_ms / 1000)
+        yield {"messageStart": {"role": "assistant"}}
+        if step < len(plan):
+            name, tool_input = plan[step]
+            yield {"contentBlockStart": {"start": {"toolUse": {"toolUseId": uuid.uuid4().hex, "name": name}}}}
+            yield {"contentBlockDelta": {"delta": {"toolUse": {"input": json.dumps(tool_input)}}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "tool_use"}}
+            output_tokens = 20
+        else:
+            for i in range(self.answer_tokens):
+                if self.token_ms:
+                    await asyncio.sleep(self.token_ms / 1000)
+                yield {"contentBlockDelta": {"delta": {"text": f"token{i} "}}}
+            yield {"contentBlockStop": {}}
+            yield {"messageStop": {"stopReason": "end_turn"}}
+            output_tokens = self.answer_tokens
+
+        elapsed = time.perf_counter() - started
+        recorder.record(hop, elapsed)
+        input_tokens = len(json.dumps(messages)) // 4 + len(system_prompt or "") // 4 + len(json.dumps(tool_specs or [])) // 4
+        usage = {"inputTokens": input_tokens - prefix_tokens, "outputTokens": output_tokens, "totalTokens": input_tokens + output_tokens}
+        if prefix:
+            usage["cacheReadInputTokens" if cache_hit else "cacheWriteInputTokens"] = prefix_tokens
+        yield {"metadata": {"usage": usage, "metrics": {"latencyMs": int(elapsed * 1000)}}}
+
+
+def create_fake_mcp_app(latency_ms: float = 50.0, events: int = 5):
+    """
+    Local stand-in for the Nango MCP endpoint, serving a few Google Calendar tools over streamable HTTP.
+    Every tool call waits ``latency_ms`` before answering.
+    """
+    mcp = FastMCP("fake-nango-google-calendar")
+
+    @mcp.tool()
+    async def list_events(calendar_id: str = "primary", time_min: str = "", time_max: str = "") -> str:
+        """List the events of a calendar."""
+        await asyncio.sleep(latency_ms / 1000)
+        return json.dumps([
+            {"id": f"event-{i}", "calendar_id": calendar_id, "summary": f"Reading time {i}",
+             "start": f"2025-01-0{i + 1}T09:00:00-03:00", "end": f"2025-01-0{i + 1}T10:00:00-03:00"}
+            for i in range(events)
+        ])
+
+    @mcp.tool()
+    async def get_event(event_id: str, calendar_id: str = "primary") -> str:
+        """Get one event."""
+        await asyncio.sleep(latency_ms / 1000)
+        return json.dumps({"id": event_id, "calendar_id": calendar_id, "summary": "Reading time"})
+
+    @mcp.tool()
+    async def create_event(summary: str, start: str, end: str, calendar_id: str = "primary") -> str:
+        """Create an event."""
+        await asyncio.sleep(latency_ms / 1000)
+        return json.dumps({"id": uuid.uuid4().hex, "calendar_id": calendar_id, "summary": summary, "start": start, "end": end})
+
+    return mcp.streamable_http_app()
+
+
+class BackgroundServers:
+    """
+    Runs ASGI apps with uvicorn on one background thread and event loop.
+
+    All servers share the loop because sse-starlette keeps a module-level event bound to the first
+    loop that streams, so streaming servers on separate loops in one process break each other.
+    """
+
+    def __init__(self, host: str = "127.0.0.1"):
+        self.host = host
+        self.loop = asyncio.new_event_loop()
+        self.thread = threading.Thread(target=self.loop.run_forever, name="bench-servers", daemon=True)
+        self.thread.start()
+        self._servers: List[tuple] = []
+
+    def serve(self, app: Any, port: int, timeout: float = 30.0) -> str:
+        """Start serving ``app`` on ``port`` and return its base URL once it accepts connections."""
+        server = uvicorn.Server(uvicorn.Config(app, host=self.host, port=port, log_level="warning", lifespan="on"))
+        future = asyncio.run_coroutine_threadsafe(server.serve(), self.loop)
+        deadline = time.monotonic() + timeout
+        while not server.started:
+            if future.done() or time.monotonic() > deadline:
+                raise RuntimeError(f"Server on port {port} did not start")
+            time.sleep(0.05)
+        self._servers.append((server, future))
+        return f"http://{self.host}:{port}"
+
+    def stop(self, timeout: float = 10.0) -> None:
+        for server, _ in reversed(self._servers):
+            server.should_exit = True
+        for _, future in self._servers:
+            try:
+                future.result(timeout)
+            except Exception:
+                pass
+        self.loop.call_soon_threadsafe(self.loop.stop)
+        self.thread.join(timeout)
+
+
+def timed_sync(hop: str, fn: Callable) -> Callable:
+    def wrapper(*args: Any, **kwargs: Any):
+        with recorder.timed(hop):
+            return fn(*args, **kwargs)
+    return wrapper
+
+
+def timed_async(hop: str, fn: Callable) -> Callable:
+    async def wrapper(*args: Any, **kwargs: Any):
+        with recorder.timed(hop):
+            return await fn(*args, **kwargs)
+    return wrapper
@@ -0,0 +1,326 @@
+"""
+Latency/throughput benchmark for the orchestrator and the calendar agent.
+
+Runs ``multi_agent_strands.app`` and the ``nango_caller_agent`` A2A server in-process against
+local stand-ins (a fake Bedrock model with configurable latency and a fake Nango MCP server),
+replays a request corpus at fixed concurrency levels and writes the results as JSON:
+
+    python -m benchmarks.run --concurrency 1,4,16 --requests 64
+    python -m benchmarks.run --compare benchmarks/results/<previous>.json
+
+Every service setting (worker pool, caches, fast path, ...) is read from the environment as usual,
+so the same command benchmarks any configuration.
+"""
+import argparse
+import asyncio
+import json
+import os
+import platform
+import socket
+import subprocess
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import httpx
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if ROOT not in sys.path:
+    sys.path.insert(0, ROOT)
+
+from benchmarks.fakes import (  # noqa: E402
+    BackgroundServers,
+    FakeBedrockModel,
+    create_fake_mcp_app,
+    recorder,
+    timed_async,
+    timed_sync,
+)
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def percentile(values: List[float], pct: float) -> Optional[float]:
+    """Nearest-rank percentile."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(values: List[float]) -> Dict[str, Any]:
+    """Count and millisecond distribution of a list of durations in seconds."""
+    ms = [value * 1000 for value in values]
+    return {
+        "count": len(ms),
+        "mean_ms": sum(ms) / len(ms) if ms else None,
+        "p50_ms": percentile(ms, 50),
+        "p95_ms": percentile(ms, 95),
+        "p99_ms": percentile(ms, 99),
+        "max_ms": max(ms) if ms else None,
+    }
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def load_corpus(path: str) -> List[Dict[str, Any]]:
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def start_services(args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the fake MCP server, the calendar agent and the orchestrator, wired to each other."""
+    FakeBedrockModel.first_token_ms = args.model_first_token_ms
+    FakeBedrockModel.token_ms = args.model_token_ms
+    FakeBedrockModel.answer_tokens = args.answer_tokens
+    FakeBedrockModel.fast_first_token_ms = args.fast_model_first_token_ms
+    FakeBedrockModel.cache_speedup = args.prompt_cache_speedup
+
+    # Both services import BedrockModel from here, so swapping it first makes them use the fake
+    import strands.models.bedrock
+    strands.models.bedrock.BedrockModel = FakeBedrockModel
+
+    servers = BackgroundServers()
+    mcp_url = servers.serve(create_fake_mcp_app(latency_ms=args.mcp_latency_ms), free_port())
+    calendar_port = free_port()
+    calendar_url = f"http://127.0.0.1:{calendar_port}"
+    os.environ["NANGO_MCP_URL"] = f"{mcp_url}/mcp"
+    os.environ["CALENDAR_AGENT_URL"] = calendar_url
+    os.environ.setdefault("NANGO_SECRET_KEY", "benchmark")
+    FakeBedrockModel.a2a_target_url = calendar_url
+
+    import nango_caller_agent as calendar
+    calendar.call_calendar_tool = timed_sync("mcp_call", calendar.call_calendar_tool)
+    calendar.list_calendar_tool_specs = timed_sync("mcp_list_tools", calendar.list_calendar_tool_specs)
+    servers.serve(calendar.create_app(), calendar_port)
+
+    import multi_agent_strands
+    multi_agent_strands.provider.send = timed_async("a2a_send", multi_agent_strands.provider.send)
+    orchestrator_url = servers.serve(multi_agent_strands.create_app(), free_port())
+
+    return {"servers": servers, "orchestrator": orchestrator_url, "calendar": calendar_url}
+
+
+async def replay(
+    client: httpx.AsyncClient, url: str, corpus: List[Dict[str, Any]], concurrency: int, total: int, stream: bool, tag: str
+) -> Dict[str, Any]:
+    """Closed-loop replay: ``concurrency`` clients each send their next request as soon as the previous one finishes."""
+    latencies: List[float] = []
+    first_byte: List[float] = []
+    errors: Dict[str, int] = {}
+    next_index = 0
+
+    def next_request() -> Optional[Dict[str, Any]]:
+        nonlocal next_index
+        if next_index >= total:
+            return None
+        body = dict(corpus[next_index % len(corpus)])
+        if body.get("session_id"):
+            # A fresh conversation per corpus pass keeps histories from growing across the run
+            body["session_id"] = f"{body['session_id']}-{tag}-{next_index // len(corpus)}"
+        next_index += 1
+        return body
+
+    async def send(body: Dict[str, Any]) -> None:
+        started = time.perf_counter()
+        first_event = None
+        try:
+            if stream:
+                async with client.stream("POST", f"{url}/invocation/stream", json=body, params={"format": "ndjson"}) as response:
+                    failed = response.status_code != 200
+                    async for line in response.aiter_lines():
+                        if not line:
+                            continue
+                        if first_event is None:
+                            first_event = time.perf_counter() - started
+                        if json.loads(line).get("type") == "error":
+                            failed = True
+                    status = str(response.status_code) if response.status_code != 200 else ("error" if failed else "ok")
+            else:
+                response = await client.post(f"{url}/invocation", json=body)
+                payload = response.json() if response.status_code == 200 else {}
+                failed = isinstance(payload.get("response"), dict) and "error" in payload["response"]
+                status = str(response.status_code) if response.status_code != 200 else ("error" if failed else "ok")
+        except httpx.HTTPError as e:
+            status = type(e).__name__
+        if status == "ok":
+            latencies.append(time.perf_counter() - started)
+            if first_event is not None:
+                first_byte.append(first_event)
+        else:
+            errors[status] = errors.get(status, 0) + 1
+
+    async def worker() -> None:
+        while True:
+            body = next_request()
+            if body is None:
+                return
+            await send(body)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    wall = time.perf_counter() - started
+    result = {
+        "concurrency": concurrency,
+        "requests": total,
+        "succeeded": len(latencies),
+        "errors": errors,
+        "wall_seconds": wall,
+        "throughput_rps": len(latencies) / wall if wall else None,
+        "latency": summarize(latencies),
+    }
+    if stream:
+        result["time_to_first_event"] = summarize(first_byte)
+    return result
+
+
+def hop_breakdown(samples: Dict[str, List[float]], requests: int) -> Dict[str, Any]:
+    """Per-hop distributions plus the mean time each request spent in the hop."""
+    return {
+        hop: {**summarize(values), "per_request_ms": sum(values) * 1000 / requests if requests else None}
+        for hop, values in sorted(samples.items())
+    }
+
+
+async def run_levels(args: argparse.Namespace, orchestrator_url: str, calendar_url: str) -> List[Dict[str, Any]]:
+    corpus = load_corpus(args.corpus)
+    levels = []
+    async with httpx.AsyncClient(timeout=args.timeout, limits=httpx.Limits(max_connections=None)) as client:
+        for concurrency in args.concurrency:
+            if args.warmup:
+                await replay(client, orchestrator_url, corpus, concurrency, args.warmup, args.stream, f"warmup{concurrency}")
+            recorder.drain()
+            level = await replay(client, orchestrator_url, corpus, concurrency, args.requests, args.stream, f"c{concurrency}")
+            level["hops"] = hop_breakdown(recorder.drain(), args.requests)
+            level["service_stats"] = {
+                "orchestrator": (await client.get(f"{orchestrator_url}/stats")).json(),
+                "calendar": (await client.get(f"{calendar_url}/stats")).json(),
+            }
+            levels.append(level)
+            print_level(level)
+    return levels
+
+
+def fmt_ms(value: Optional[float]) -> str:
+    return "-" if value is None else f"{value:.1f}"
+
+
+def print_level(level: Dict[str, Any]) -> None:
+    latency = level["latency"]
+    print(
+        f"concurrency={level['concurrency']:<4} ok={level['succeeded']}/{level['requests']} "
+        f"rps={level['throughput_rps'] or 0:.2f} p50={fmt_ms(latency['p50_ms'])}ms "
+        f"p95={fmt_ms(latency['p95_ms'])}ms p99={fmt_ms(latency['p99_ms'])}ms errors={level['errors']}"
+    )
+    for hop, stats in level["hops"].items():
+        print(
+            f"    {hop:<20} n={stats['count']:<5} p50={fmt_ms(stats['p50_ms'])}ms "
+            f"p95={fmt_ms(stats['p95_ms'])}ms per_request={fmt_ms(stats['per_request_ms'])}ms"
+        )
+
+
+def compare(results: Dict[str, Any], baseline_path: str) -> None:
+    """Print the latency and throughput change of every concurrency level against an earlier result file."""
+    with open(baseline_path) as f:
+        baseline = {level["concurrency"]: level for level in json.load(f)["levels"]}
+    print(f"\nCompared with {baseline_path}:")
+    for level in results["levels"]:
+        before = baseline.get(level["concurrency"])
+        if before is None:
+            continue
+        changes = []
+        for key in ("p50_ms", "p95_ms", "p99_ms"):
+            old, new = before["latency"][key], level["latency"][key]
+            if old and new is not None:
+                changes.append(f"{key[:-3]} {(new - old) / old * 100:+.1f}%")
+        old_rps, new_rps = before["throughput_rps"], level["throughput_rps"]
+        if old_rps and new_rps is not None:
+            changes.append(f"rps {(new_rps - old_rps) / old_rps * 100:+.1f}%")
+        print(f"  concurrency={level['concurrency']:<4} " + "  ".join(changes))
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--corpus", default=os.path.join(ROOT, "benchmarks", "corpus.jsonl"), help="JSONL file of InvocationRequest bodies")
+    parser.add_argument("--concurrency", default="1,4,16", help="Comma separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=64, help="Measured requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=8, help="Unmeasured requests sent before each level")
+    parser.add_argument("--stream", action="store_true", help="Use /invocation/stream and also report time to first event")
+    parser.add_argument("--timeout", type=float, default=120.0, help="Client timeout per request, in seconds")
+    parser.add_argument("--model-first-token-ms", type=float, default=300.0, help="Fake model latency before the first token of every turn")
+    parser.add_argument("--model-token-ms", type=float, default=10.0, help="Fake model delay between answer tokens")
+    parser.add_argument("--fast-model-first-token-ms", type=float, help="Fake latency before the first token of Haiku (fast tier) turns, default same as the strong model")
+    parser.add_argument("--prompt-cache-speedup", type=float, default=0.5, help="Share of the first-token latency a fake prompt cache hit saves")
+    parser.add_argument("--answer-tokens", type=int, default=40, help="Tokens in every fake model answer")
+    parser.add_argument("--mcp-latency-ms", type=float, default=50.0, help="Fake MCP server latency per tool call")
+    parser.add_argument("--output", help="Result file (default benchmarks/results/<commit>-<timestamp>.json)")
+    parser.add_argument("--compare", help="Earlier result file to compare against")
+    args = parser.parse_args(argv)
+    args.concurrency = [int(level) for level in args.concurrency.split(",") if level.strip()]
+    return args
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    services = start_services(args)
+    try:
+        levels = asyncio.run(run_levels(args, services["orchestrator"], services["calendar"]))
+    finally:
+        services["servers"].stop()
+
+    commit = git_commit()
+    timestamp = datetime.now(timezone.utc)
+    results = {
+        "meta": {
+            "commit": commit,
+            "timestamp": timestamp.isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "endpoint": "/invocation/stream" if args.stream else "/invocation",
+            "corpus": os.path.relpath(args.corpus, ROOT),
+            "settings": {
+                "requests": args.requests,
+                "warmup": args.warmup,
+                "model_first_token_ms": args.model_first_token_ms,
+                "model_token_ms": args.model_token_ms,
+                "fast_model_first_token_ms": args.fast_model_first_token_ms,
+                "prompt_cache_speedup": args.prompt_cache_speedup,
+                "answer_tokens": args.answer_tokens,
+                "mcp_latency_ms": args.mcp_latency_ms,
+            },
+            # Service settings that change the numbers, so result files are comparable at a glance
+            "env": {key: value for key, value in sorted(os.environ.items()) if key.startswith((
+                "AGENT_", "SESSION_POOL_", "RESPONSE_CACHE_", "FAST_PATH_", "MCP_", "A2A_",
+                "PROMPT_CACHE", "MODEL_TIERING", "FAST_MODEL_ID", "TIERING_",
+            ))},
+        },
+        "levels": levels,
+    }
+
+    output = args.output or os.path.join(
+        ROOT, "benchmarks", "results", f"{commit or 'unknown'}-{timestamp.strftime('%Y%m%dT%H%M%SZ')}.json"
+    )
+    os.makedirs(os.path.dirname(output) or ".", exist_ok=True)
+    with open(output, "w") as f:
+        json.dump(results, f, indent=2, default=str)
+    print(f"\nResults written to {output}")
+
+    if args.compare:
+        compare(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,291 @@
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, Callable, Deque, Dict, Iterator, Optional
+
+from metrics import MetricsRegistry
+
+# A2A message metadata key carrying the caller's remaining budget, in milliseconds. A relative
+# budget rather than a wall-clock time, so clock skew between services does not matter.
+DEADLINE_METADATA_KEY = "deadline_ms"
+
+
+class DeadlineExceeded(TimeoutError):
+    """The request's deadline passed before a hop could start."""
+
+
+class Deadline:
+    """Point in time by which a request must be answered, on the monotonic clock."""
+
+    def __init__(self, seconds: float):
+        self.seconds = seconds
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+
+def metadata_budget(metadata: Optional[Dict[str, Any]]) -> Optional[float]:
+    """Seconds left to the caller of an incoming A2A message, or None when it did not say."""
+    value = (metadata or {}).get(DEADLINE_METADATA_KEY)
+    try:
+        # Already out of time still counts as a (tiny) budget, not as no deadline
+        return max(0.001, float(value) / 1000) if value is not None else None
+    except (TypeError, ValueError):
+        return None
+
+
+# Deadline of the request being served. Tasks and agent tool threads copy it, so every hop of the
+# request sees the same deadline without passing it around.
+current_deadline: contextvars.ContextVar[Optional[Deadline]] = contextvars.ContextVar("current_deadline", default=None)
+
+
+@contextmanager
+def deadline_scope(seconds: Optional[float]) -> Iterator[Optional[Deadline]]:
+    """
+    Run the block under a deadline ``seconds`` from now, or under the current one if it is
+    earlier. ``None`` or 0 keeps the current deadline.
+    """
+    deadline = current_deadline.get()
+    if seconds and (deadline is None or seconds < deadline.remaining()):
+        deadline = Deadline(seconds)
+    token = current_deadline.set(deadline)
+    try:
+        yield deadline
+    finally:
+        current_deadline.reset(token)
+
+
+def time_left(hop_timeout: Optional[float] = None) -> Optional[float]:
+    """
+    Seconds the next hop may take: its own timeout capped by the time left before the current
+    deadline. None when neither is set.
+
+    Raises:
+        DeadlineExceeded: If the deadline has already passed
+    """
+    deadline = current_deadline.get()
+    if deadline is None:
+        return hop_timeout or None
+    remaining = deadline.remaining()
+    if remaining <= 0:
+        raise DeadlineExceeded(f"Deadline of {deadline.seconds:g}s exceeded")
+    return min(hop_timeout, remaining) if hop_timeout else remaining
+
+
+class CircuitBreaker:
+    """
+    Stops calling a target after ``failure_threshold`` consecutive failures.
+
+    While open, calls fail straight away instead of waiting on a target that is down. After
+    ``reset_timeout`` seconds a single probe call is let through (half-open): success closes the
+    breaker, failure opens it again for another ``reset_timeout``.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.state = "closed"
+        self.failures = 0
+        self.opened_at = 0.0
+        self.opened = 0
+        self.short_circuited = 0
+        self._probing = False
+        self._lock = threading.Lock()
+
+    def allow(self) -> bool:
+        """Whether a call may go through now; callers must report its outcome with ``record``."""
+        with self._lock:
+            if self.state == "open" and time.monotonic() - self.opened_at >= self.reset_timeout:
+                self.state = "half_open"
+                self._probing = False
+            if self.state == "closed" or (self.state == "half_open" and not self._probing):
+                self._probing = self.state == "half_open"
+                return True
+            self.short_circuited += 1
+            return False
+
+    def retry_after(self) -> float:
+        return max(0.0, self.opened_at + self.reset_timeout - time.monotonic())
+
+    def record(self, success: bool) -> None:
+        with self._lock:
+            self._probing = False
+            if success:
+                self.state = "closed"
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.state == "half_open" or self.failures >= self.failure_threshold:
+                if self.state != "open":
+                    self.opened += 1
+                self.state = "open"
+                self.opened_at = time.monotonic()
+
+    def release(self) -> None:
+        """Give back a call that was abandoned (e.g. cancelled) without an outcome."""
+        with self._lock:
+            self._probing = False
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "short_circuited": self.short_circuited,
+        }
+
+
+class CircuitBreakers:
+    """One ``CircuitBreaker`` per target (e.g. remote agent URL), created on first use."""
+
+    STATES = {"closed": 0, "half_open": 1, "open": 2}
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0, metrics: Optional[MetricsRegistry] = None):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._lock = threading.Lock()
+        self._state = metrics.gauge(
+            "circuit_breaker_state", "Circuit breaker state per target: 0 closed, 1 half-open, 2 open", ["target"]
+        ) if metrics is not None else None
+
+    def get(self, target: str) -> CircuitBreaker:
+        with self._lock:
+            breaker = self._breakers.get(target)
+            if breaker is None:
+                breaker = self._breakers[target] = CircuitBreaker(self.failure_threshold, self.reset_timeout)
+            return breaker
+
+    def allow(self, target: str) -> bool:
+        allowed = self.get(target).allow()
+        self._publish(target)
+        return allowed
+
+    def record(self, target: str, success: bool) -> None:
+        self.get(target).record(success)
+        self._publish(target)
+
+    def _publish(self, target: str) -> None:
+        if self._state is not None:
+            self._state.set(self.STATES[self._breakers[target].state], target=target)
+
+    def stats(self) -> Dict[str, Any]:
+        return {target: breaker.stats() for target, breaker in list(self._breakers.items())}
+
+
+class Hedger:
+    """
+    Hedged requests for idempotent blocking reads.
+
+    Keeps the recent latencies of each key (e.g. MCP tool name). Once ``min_samples`` are known,
+    a call still running after their ``percentile`` (never less than ``min_delay``) gets a
+    duplicate, and whichever returns first with an accepted result wins. Only the slowest few
+    percent of calls are duplicated, which trims the tail at little extra load. The losing call
+    cannot be interrupted and finishes in the background; its hop timeout bounds it. Safe to call
+    from many threads.
+    """
+
+    def __init__(
+        self,
+        scope: str,
+        percentile: float = 0.95,
+        min_delay: float = 0.05,
+        min_samples: int = 20,
+        window: int = 200,
+        max_workers: int = 16,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.scope = scope
+        self.percentile = percentile
+        self.min_delay = min_delay
+        self.min_samples = min_samples
+        self.window = window
+        self._latencies: Dict[str, Deque[float]] = {}
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix=f"hedge-{scope}")
+        self.calls = 0
+        self.hedged = 0
+        self.hedge_wins = 0
+        self._lock = threading.Lock()
+        self._hedged = metrics.counter(
+            "hedged_requests_total", "Calls that got a duplicate after running past the hedge delay", ["scope"]
+        ) if metrics is not None else None
+        self._wins = metrics.counter(
+            "hedge_wins_total", "Hedged calls answered by the duplicate", ["scope"]
+        ) if metrics is not None else None
+
+    def delay(self, key: str) -> Optional[float]:
+        """Seconds to wait before hedging calls of ``key``, or None while too few latencies are known."""
+        with self._lock:
+            samples = self._latencies.get(key)
+            if not samples or len(samples) < self.min_samples:
+                return None
+            ordered = sorted(samples)
+        return max(self.min_delay, ordered[min(len(ordered) - 1, int(len(ordered) * self.percentile))])
+
+    def _timed(self, key: str, fn: Callable[..., Any], *args: Any) -> Any:
+        started = time.perf_counter()
+        result = fn(*args)
+        with self._lock:
+            self._latencies.setdefault(key, deque(maxlen=self.window)).append(time.perf_counter() - started)
+        return result
+
+    def call(
+        self,
+        key: str,
+        fn: Callable[..., Any],
+        *args: Any,
+        accept: Optional[Callable[[Any], bool]] = None,
+        hedge_fn: Optional[Callable[..., Any]] = None,
+    ) -> Any:
+        """
+        Run ``fn(*args)``, hedging it past the delay of ``key``. The duplicate runs ``hedge_fn(*args)``
+        when given (e.g. over a connection of its own), else ``fn(*args)``. ``accept`` decides whether
+        a result can win (by default any result that did not raise); when neither is accepted the
+        primary's is returned.
+        """
+        with self._lock:
+            self.calls += 1
+        delay = self.delay(key)
+        if delay is None:
+            return self._timed(key, fn, *args)
+
+        # Each call runs in its own copy of the context, so both see the request's deadline
+        primary = self._executor.submit(contextvars.copy_context().run, self._timed, key, fn, *args)
+        done, _ = wait([primary], timeout=delay)
+        if done:
+            return primary.result()
+
+        with self._lock:
+            self.hedged += 1
+        if self._hedged is not None:
+            self._hedged.inc(scope=self.scope)
+        hedge = self._executor.submit(contextvars.copy_context().run, self._timed, key, hedge_fn or fn, *args)
+        pending = {primary, hedge}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                if future.exception() is None and (accept is None or accept(future.result())):
+                    if future is hedge:
+                        with self._lock:
+                            self.hedge_wins += 1
+                        if self._wins is not None:
+                            self._wins.inc(scope=self.scope)
+                    return future.result()
+        return primary.result()
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            keys = list(self._latencies)
+        return {
+            "calls": self.calls,
+            "hedged": self.hedged,
+            "hedge_wins": self.hedge_wins,
+            "delays": {key: self.delay(key) for key in keys},
+        }
+
+    def shutdown(self) -> None:
+        self._executor.shutdown(wait=False, cancel_futures=True)
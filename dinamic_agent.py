@@ -1,9 +1,454 @@
+import copy
 import inspect
-from typing import Any, Dict, Optional, List, Union
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional, List, Tuple, Union
 from strands import Agent
-from strands.models.bedrock import BedrockModel
+from strands.models.bedrock import DEFAULT_BEDROCK_MODEL_ID, BedrockModel
 from strands_tools.a2a_client import A2AClientToolProvider
 
+from model_tiering import PROMPT_CACHE_PARAMS, ModelTieringPolicy, TieredModel, supports_prompt_cache
+from ttl_cache import TTLCache
+
+
+def _signature_params(fn: Callable) -> Dict[str, Any]:
+    params = {}
+    for name, param in inspect.signature(fn).parameters.items():
+        if name == 'self':
+            continue
+        params[name] = {
+            'default': param.default if param.default != inspect.Parameter.empty else None,
+            'annotation': param.annotation,
+            'required': param.default == inspect.Parameter.empty
+        }
+    return params
+
+
+# The Agent constructor does not change at runtime, so its signature is inspected once at import
+AGENT_SIGNATURE_PARAMS: Dict[str, Any] = _signature_params(Agent.__init__)
+
+# Example database configurations for different agents, served by the default in-memory store
+SAMPLE_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "qa_agent": {
+        "system_prompt": '''
+        You are a Q&A bot. 
+        Answer questions based on the provided context and available tools. 
+        You can rely on A2A Client tool provider that manages multiple A2A agents and exposes synchronous tools to find an agent that can retrieve information 
+        necessary to answer the question.
+
+        You just need to call the tool forwarding the user input to the agents available to you.
+        ''',
+        "record_direct_tool_call": False,
+        "model_config": {
+            "type": "bedrock",
+            "temperature": 0
+        }
+    },
+    "simple_agent": {
+        "system_prompt": "You are a helpful assistant.",
+        "model_config": {
+            "type": "bedrock",
+            "temperature": 0.7
+        }
+    },
+    "creative_agent": {
+        "name": "creative-writer",
+        "agent_id": "creative-writer",
+        "description": "Creative Writing Agent",
+        "system_prompt": "You are a creative writing assistant. Help users with storytelling, poetry, and creative content.",
+        "record_direct_tool_call": True,
+        "max_iterations": 10,
+        "timeout": 30,
+        "model_config": {
+            "type": "bedrock",
+            "model_id": "anthropic.claude-3-sonnet-20240229-v1:0",
+            "temperature": 0.8
+        }
+    },
+    "analytical_agent": {
+        "name": "data-analyst",
+        "description": "Data Analysis Agent",
+        "system_prompt": "You are a data analysis expert. Help users analyze data, create reports, and provide insights.",
+        "model_config": {
+            "type": "bedrock",
+            "temperature": 0.1
+        },
+        "tools_config": {
+            "a2a_client": {
+                "known_agent_urls": ["https://analytics-agent.example.com"]
+            }
+        }
+    }
+}
+
+
+class AgentConfigStore(ABC):
+    """
+    Source of agent configurations, keyed by agent_id.
+
+    Every configuration carries a version that changes whenever the configuration does. Loads are
+    memoized per agent: within ``refresh_interval`` seconds of the last check the memoized
+    configuration is returned without touching the backend, after that only its version is
+    checked, and it is read and parsed again only when the version changed. Callbacks registered
+    with ``add_listener`` are called with the agent_id whenever a change is noticed.
+
+    Returned configurations are shared and must not be modified.
+    """
+
+    def __init__(self, refresh_interval: float = 1.0):
+        self.refresh_interval = refresh_interval
+        self._memo: Dict[str, Tuple[float, str, Dict[str, Any]]] = {}
+        self._lock = threading.Lock()
+        self._listeners: List[Callable[[str], None]] = []
+
+        self.memo_hits = 0
+        self.version_checks = 0
+        self.reads = 0
+        self.changes = 0
+
+    @abstractmethod
+    def _version(self, agent_id: str) -> Optional[str]:
+        """Current version of the agent's configuration, or None if it does not exist."""
+
+    @abstractmethod
+    def _read(self, agent_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Read and parse the agent's configuration, returning it with its version."""
+
+    @abstractmethod
+    def list_agent_ids(self) -> List[str]:
+        ...
+
+    def add_listener(self, callback: Callable[[str], None]) -> None:
+        """
+        Register a callback for configuration changes.
+
+        Args:
+            callback: Called with the agent_id of every configuration found changed or deleted
+        """
+        self._listeners.append(callback)
+
+    def _changed(self, agent_id: str) -> None:
+        with self._lock:
+            self._memo.pop(agent_id, None)
+        self.changes += 1
+        for callback in self._listeners:
+            callback(agent_id)
+
+    def load(self, agent_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """
+        Load an agent's configuration and its version.
+
+        Args:
+            agent_id: The ID of the agent
+
+        Returns:
+            Tuple of (configuration, version), or (None, None) if the agent is unknown
+        """
+        now = time.monotonic()
+        with self._lock:
+            memo = self._memo.get(agent_id)
+        if memo is not None and now - memo[0] < self.refresh_interval:
+            self.memo_hits += 1
+            return memo[2], memo[1]
+
+        self.version_checks += 1
+        version = self._version(agent_id)
+        if version is None:
+            if memo is not None:
+                self._changed(agent_id)
+            return None, None
+        if memo is not None and memo[1] == version:
+            with self._lock:
+                self._memo[agent_id] = (now, version, memo[2])
+            self.memo_hits += 1
+            return memo[2], version
+
+        config, version = self._read(agent_id)
+        self.reads += 1
+        if memo is not None:
+            self._changed(agent_id)
+        if config is None:
+            return None, None
+        with self._lock:
+            self._memo[agent_id] = (now, version, config)
+        return config, version
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "refresh_interval": self.refresh_interval,
+            "memoized": len(self._memo),
+            "memo_hits": self.memo_hits,
+            "version_checks": self.version_checks,
+            "reads": self.reads,
+            "changes": self.changes,
+        }
+
+
+class InMemoryConfigStore(AgentConfigStore):
+    """Configurations held in process, e.g. the sample configurations or ones set by tests and scripts."""
+
+    def __init__(self, configs: Optional[Dict[str, Dict[str, Any]]] = None):
+        super().__init__(refresh_interval=0.0)
+        self._configs: Dict[str, Tuple[int, Dict[str, Any]]] = {
+            agent_id: (1, copy.deepcopy(config)) for agent_id, config in (configs or {}).items()
+        }
+
+    def _version(self, agent_id: str) -> Optional[str]:
+        entry = self._configs.get(agent_id)
+        return str(entry[0]) if entry is not None else None
+
+    def _read(self, agent_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        entry = self._configs.get(agent_id)
+        return (entry[1], str(entry[0])) if entry is not None else (None, None)
+
+    def list_agent_ids(self) -> List[str]:
+        return list(self._configs)
+
+    def put(self, agent_id: str, config: Dict[str, Any]) -> None:
+        version = self._configs[agent_id][0] + 1 if agent_id in self._configs else 1
+        self._configs[agent_id] = (version, copy.deepcopy(config))
+        self._changed(agent_id)
+
+    def delete(self, agent_id: str) -> None:
+        if self._configs.pop(agent_id, None) is not None:
+            self._changed(agent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", "agents": len(self._configs), **super().stats()}
+
+
+class FileConfigStore(AgentConfigStore):
+    """
+    Configurations read from a JSON file mapping agent_id to configuration.
+
+    The file is edited outside the process; its modification time and size act as the version of
+    every configuration in it, so the file is parsed once per change rather than once per load.
+    """
+
+    def __init__(self, path: str, refresh_interval: float = 1.0):
+        super().__init__(refresh_interval=refresh_interval)
+        self.path = path
+        self._parsed: Tuple[Optional[str], Dict[str, Dict[str, Any]]] = (None, {})
+
+    def _file_version(self) -> Optional[str]:
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    def _configs(self) -> Tuple[Optional[str], Dict[str, Dict[str, Any]]]:
+        version = self._file_version()
+        if version is None:
+            return None, {}
+        if self._parsed[0] != version:
+            with open(self.path) as f:
+                self._parsed = (version, json.load(f))
+        return self._parsed
+
+    def _version(self, agent_id: str) -> Optional[str]:
+        version, configs = self._configs()
+        return version if agent_id in configs else None
+
+    def _read(self, agent_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        version, configs = self._configs()
+        config = configs.get(agent_id)
+        return (config, version) if config is not None else (None, None)
+
+    def list_agent_ids(self) -> List[str]:
+        return list(self._configs()[1])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "file", "path": self.path, **super().stats()}
+
+
+class SQLiteConfigStore(AgentConfigStore):
+    """
+    Configurations kept in a SQLite table, one row per agent with a version bumped on every write.
+
+    Version checks are a primary-key lookup, so every worker on the node can notice changes made
+    by any other process within ``refresh_interval`` seconds.
+    """
+
+    def __init__(self, path: str, table: str = "agent_configs", refresh_interval: float = 1.0):
+        super().__init__(refresh_interval=refresh_interval)
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.table = table
+        self._local = threading.local()
+
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (agent_id TEXT PRIMARY KEY, config TEXT NOT NULL, "
+            "version INTEGER NOT NULL, updated_at REAL NOT NULL)"
+        )
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, so each thread gets its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            self._local.conn = conn
+        return conn
+
+    def _version(self, agent_id: str) -> Optional[str]:
+        row = self._conn().execute(f"SELECT version FROM {self.table} WHERE agent_id = ?", (agent_id,)).fetchone()
+        return str(row[0]) if row is not None else None
+
+    def _read(self, agent_id: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        row = self._conn().execute(
+            f"SELECT config, version FROM {self.table} WHERE agent_id = ?", (agent_id,)
+        ).fetchone()
+        return (json.loads(row[0]), str(row[1])) if row is not None else (None, None)
+
+    def list_agent_ids(self) -> List[str]:
+        return [row[0] for row in self._conn().execute(f"SELECT agent_id FROM {self.table} ORDER BY agent_id")]
+
+    def put(self, agent_id: str, config: Dict[str, Any]) -> None:
+        conn = self._conn()
+        conn.execute(
+            f"INSERT INTO {self.table} (agent_id, config, version, updated_at) VALUES (?, ?, 1, ?) "
+            "ON CONFLICT(agent_id) DO UPDATE SET config = excluded.config, version = version + 1, updated_at = excluded.updated_at",
+            (agent_id, json.dumps(config), time.time()),
+        )
+        conn.commit()
+        self._changed(agent_id)
+
+    def delete(self, agent_id: str) -> None:
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE agent_id = ?", (agent_id,))
+        conn.commit()
+        self._changed(agent_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "sqlite", "path": self.path, **super().stats()}
+
+
+def create_config_store(backend: str = "memory", path: Optional[str] = None, refresh_interval: float = 1.0) -> AgentConfigStore:
+    """
+    Build an agent configuration store from configuration.
+
+    Args:
+        backend: "memory" (the sample configurations), "file" (JSON file) or "sqlite"
+        path: JSON file or SQLite database path
+        refresh_interval: Seconds a loaded configuration is used before its version is checked again
+
+    Returns:
+        The configuration store
+    """
+    backend = (backend or "memory").lower()
+    if backend == "memory":
+        return InMemoryConfigStore(SAMPLE_CONFIGS)
+    if backend == "file":
+        return FileConfigStore(path or "agent_configs.json", refresh_interval=refresh_interval)
+    if backend == "sqlite":
+        return SQLiteConfigStore(path or os.path.join(".cache", "agent_configs.sqlite3"), refresh_interval=refresh_interval)
+    raise ValueError(f"Unsupported config store backend: {backend}")
+
+
+class SharedClients:
+    """
+    Interns the expensive parts of dynamically created agents so many agents share them.
+
+    - Bedrock: one ``BedrockModel`` (and so one boto3 client and connection pool) per
+      (model_id, region). Agents get a shallow copy of it with their own parameters (temperature,
+      max_tokens, ...) applied through ``update_config``, sharing the client; copies with identical
+      parameters are themselves shared, up to ``max_model_views`` of them.
+    - A2A: one ``A2AClientToolProvider`` per set of known agent URLs, so agents with the same
+      remote agents share discovered cards and HTTP clients. The provider's HTTP client is bound to
+      the event loop that first uses it, so agents sharing a provider must run on one loop.
+    """
+
+    def __init__(self, max_model_views: int = 1024):
+        self._lock = threading.Lock()
+        self._bedrock_clients: Dict[Tuple[Optional[str], Optional[str]], BedrockModel] = {}
+        self._model_views = TTLCache(max_size=max_model_views, ttl_seconds=float("inf"))
+        self._a2a_providers: Dict[frozenset, A2AClientToolProvider] = {}
+
+        self.models_created = 0
+        self.models_reused = 0
+        self.a2a_providers_created = 0
+        self.a2a_providers_reused = 0
+
+    def bedrock_model(self, params: Dict[str, Any], region_name: Optional[str] = None) -> BedrockModel:
+        """
+        Get a BedrockModel with the given parameters that shares the client of its (model_id, region).
+
+        Args:
+            params: BedrockModel configuration (model_id, temperature, max_tokens, ...)
+            region_name: AWS region; defaults to the AWS_REGION environment variable
+
+        Returns:
+            BedrockModel instance; do not change its configuration, it may be shared with other agents
+        """
+        region_name = region_name or os.getenv("AWS_REGION")
+        client_key = (params.get("model_id"), region_name)
+        view_key = (client_key, json.dumps(params, sort_keys=True, default=str))
+        model = self._model_views.get(view_key)
+        if model is not None:
+            self.models_reused += 1
+            return model
+
+        with self._lock:
+            base = self._bedrock_clients.get(client_key)
+            if base is None:
+                base_params = {"model_id": params["model_id"]} if params.get("model_id") else {}
+                base = BedrockModel(region_name=region_name, **base_params)
+                self._bedrock_clients[client_key] = base
+                self.models_created += 1
+        model = copy.copy(base)
+        model.config = dict(base.config)
+        model.update_config(**params)
+        self._model_views.set(view_key, model)
+        return model
+
+    def a2a_provider(self, known_agent_urls: List[str]) -> A2AClientToolProvider:
+        """
+        Get the A2A tool provider for a set of known agent URLs, creating it on first use.
+
+        Args:
+            known_agent_urls: URLs of the remote agents
+
+        Returns:
+            A2AClientToolProvider instance shared by every agent with the same URLs
+        """
+        key = frozenset(known_agent_urls)
+        with self._lock:
+            provider = self._a2a_providers.get(key)
+            if provider is not None:
+                self.a2a_providers_reused += 1
+                return provider
+            provider = A2AClientToolProvider(known_agent_urls=list(known_agent_urls))
+            self._a2a_providers[key] = provider
+            self.a2a_providers_created += 1
+            return provider
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "bedrock_clients": len(self._bedrock_clients),
+            "model_views": len(self._model_views),
+            "models_created": self.models_created,
+            "models_reused": self.models_reused,
+            "a2a_providers": len(self._a2a_providers),
+            "a2a_providers_created": self.a2a_providers_created,
+            "a2a_providers_reused": self.a2a_providers_reused,
+        }
+
+
+# Shared by every AgentConfigManager in the process unless one is given its own
+shared_clients = SharedClients()
+
 
 class AgentConfigManager:
     """
@@ -11,93 +456,64 @@ class AgentConfigManager:
     Handles varying parameter sets and provides intelligent defaults.
     """
     
+    def __init__(self, config_store: Optional[AgentConfigStore] = None, clients: Optional[SharedClients] = None):
+        """
+        Args:
+            config_store: Where configurations are loaded from; defaults to the sample configurations
+            clients: Model clients and tool providers shared between agents; defaults to the process-wide ``shared_clients``
+        """
+        self.config_store = config_store if config_store is not None else InMemoryConfigStore(SAMPLE_CONFIGS)
+        self.clients = clients if clients is not None else shared_clients
+    
     @staticmethod
     def get_agent_signature_params() -> Dict[str, Any]:
         """
-        Extract the signature parameters of the Agent class constructor.
+        Get the signature parameters of the Agent class constructor.
         This helps us understand what parameters are available.
         """
-        sig = inspect.signature(Agent.__init__)
-        params = {}
-        for name, param in sig.parameters.items():
-            if name == 'self':
-                continue
-            params[name] = {
-                'default': param.default if param.default != inspect.Parameter.empty else None,
-                'annotation': param.annotation,
-                'required': param.default == inspect.Parameter.empty
-            }
-        return params
+        return AGENT_SIGNATURE_PARAMS
     
-    @staticmethod
-    def load_agent_config_from_db(agent_id: str) -> Dict[str, Any]:
-        """
-        Load agent configuration from database.
-        This is a placeholder - replace with your actual database logic.
-        """
-        # Example database configurations for different agents
-        sample_configs = {
-            "qa_agent": {
-                "system_prompt": '''
-                You are a Q&A bot. 
-                Answer questions based on the provided context and available tools. 
-                You can rely on A2A Client tool provider that manages multiple A2A agents and exposes synchronous tools to find an agent that can retrieve information 
-                necessary to answer the question.
-
-                You just need to call the tool forwarding the user input to the agents available to you.
-                ''',
-                "record_direct_tool_call": False,
-                "model_config": {
-                    "type": "bedrock",
-                    "temperature": 0
-                }
-            },
-            "simple_agent": {
-                "system_prompt": "You are a helpful assistant.",
-                "model_config": {
-                    "type": "bedrock",
-                    "temperature": 0.7
-                }
-            },
-            "creative_agent": {
-                "name": "creative-writer",
-                "agent_id": "creative-writer",
-                "description": "Creative Writing Agent",
-                "system_prompt": "You are a creative writing assistant. Help users with storytelling, poetry, and creative content.",
-                "record_direct_tool_call": True,
-                "max_iterations": 10,
-                "timeout": 30,
-                "model_config": {
-                    "type": "bedrock",
-                    "model_id": "anthropic.claude-3-sonnet-20240229-v1:0",
-                    "temperature": 0.8
-                }
-            },
-            "analytical_agent": {
-                "name": "data-analyst",
-                "description": "Data Analysis Agent",
-                "system_prompt": "You are a data analysis expert. Help users analyze data, create reports, and provide insights.",
-                "model_config": {
-                    "type": "bedrock",
-                    "temperature": 0.1
-                },
-                "tools_config": {
-                    "a2a_client": {
-                        "known_agent_urls": ["https://analytics-agent.example.com"]
-                    }
-                }
-            }
-        }
+    def load_agent_config_from_db(self, agent_id: str) -> Dict[str, Any]:
+        """
+        Load agent configuration from the config store.
         
-        # TODO: Replace with actual database query
+        Args:
+            agent_id: The ID of the agent
+            
+        Returns:
+            The agent's configuration, or an empty dict if it is unknown
+        """
+        config, _ = self.config_store.load(agent_id)
+        return config or {}
+    
+    def load_versioned_config(self, agent_id: str) -> Tuple[Dict[str, Any], Optional[str]]:
+        """
+        Load agent configuration together with its version.
         
-        return sample_configs.get(agent_id, {})
+        Args:
+            agent_id: The ID of the agent
+            
+        Returns:
+            Tuple of (configuration, version); an empty dict and None if the agent is unknown
+        """
+        config, version = self.config_store.load(agent_id)
+        return config or {}, version
     
     @staticmethod
-    def create_model_from_config(model_config: Dict[str, Any]) -> Any:
+    def create_model_from_config(model_config: Dict[str, Any], clients: Optional[SharedClients] = None) -> Any:
         """
         Create a model instance based on configuration.
         Supports different model types and their specific parameters.
+
+        A Bedrock configuration with a ``tiering`` section, e.g.
+        ``{"fast_model_id": "us.anthropic.claude-3-5-haiku-20241022-v1:0", "max_fast_input_chars": 1500}``,
+        gets a ``TieredModel``: short turns go to the fast model, the others to ``model_id``.
+        ``cache_prompt`` / ``cache_tools`` (e.g. "default") enable Bedrock prompt caching on the models
+        that support it and are dropped for the others.
+        
+        Args:
+            model_config: The "model_config" section of an agent configuration
+            clients: Shared clients to reuse; without it every call creates a new client
         """
         model_type = model_config.get("type", "bedrock")
         
@@ -112,14 +528,35 @@ class AgentConfigManager:
                 "max_tokens": "max_tokens",
                 "top_p": "top_p",
                 "top_k": "top_k",
-                "stop_sequences": "stop_sequences"
+                "stop_sequences": "stop_sequences",
+                "cache_prompt": "cache_prompt",
+                "cache_tools": "cache_tools"
             }
             
             for config_key, param_key in param_mapping.items():
                 if config_key in model_config:
                     bedrock_params[param_key] = model_config[config_key]
             
-            return BedrockModel(**bedrock_params)
+            region_name = model_config.get("region")
+
+            def bedrock_model(params: Dict[str, Any]) -> BedrockModel:
+                if not supports_prompt_cache(params.get("model_id") or DEFAULT_BEDROCK_MODEL_ID):
+                    params = {key: value for key, value in params.items() if key not in PROMPT_CACHE_PARAMS}
+                if clients is not None:
+                    return clients.bedrock_model(params, region_name=region_name)
+                return BedrockModel(region_name=region_name, **params)
+
+            tiering = model_config.get("tiering")
+            if not tiering:
+                return bedrock_model(bedrock_params)
+            policy = ModelTieringPolicy(**{
+                key: tiering[key] for key in ("max_fast_input_chars", "max_fast_messages", "escalate_keywords") if key in tiering
+            })
+            return TieredModel(
+                strong=bedrock_model(bedrock_params),
+                fast=bedrock_model({**bedrock_params, "model_id": tiering["fast_model_id"]}),
+                policy=policy,
+            )
         
         # Add other model types as needed
         elif model_type == "anthropic":
@@ -147,10 +584,14 @@ class AgentConfigManager:
         raise ValueError(f"Unsupported model type: {model_type}")
     
     @staticmethod
-    def create_tools_from_config(tools_config: Optional[Dict[str, Any]] = None) -> List[Any]:
+    def create_tools_from_config(tools_config: Optional[Dict[str, Any]] = None, clients: Optional[SharedClients] = None) -> List[Any]:
         """
         Create tools based on configuration.
         Supports different tool types and their specific parameters.
+        
+        Args:
+            tools_config: The "tools_config" section of an agent configuration
+            clients: Shared clients to reuse tool providers from; without it every call creates new providers
         """
         if not tools_config:
             return []
@@ -162,7 +603,10 @@ class AgentConfigManager:
             a2a_config = tools_config["a2a_client"]
             known_urls = a2a_config.get("known_agent_urls", [])
             if known_urls:
-                provider = A2AClientToolProvider(known_agent_urls=known_urls)
+                if clients is not None:
+                    provider = clients.a2a_provider(known_urls)
+                else:
+                    provider = A2AClientToolProvider(known_agent_urls=known_urls)
                 tools.extend(provider.tools)
         
         # Handle MCP tools
@@ -190,8 +634,7 @@ class AgentConfigManager:
         
         return tools
     
-    @classmethod
-    def create_agent_from_config(cls, agent_id: str, additional_tools: Optional[List[Any]] = None) -> Agent:
+    def create_agent_from_config(self, agent_id: str, additional_tools: Optional[List[Any]] = None) -> Agent:
         """
         Create an Agent instance dynamically from database configuration.
         
@@ -206,25 +649,63 @@ class AgentConfigManager:
             ValueError: If agent configuration is not found or agent creation fails
         """
         # Load configuration from database
-        config = cls.load_agent_config_from_db(agent_id)
+        config = self.load_agent_config_from_db(agent_id)
+        return self.build_agent(agent_id, config, additional_tools)
+    
+    def build_agent(self, agent_id: str, config: Dict[str, Any], additional_tools: Optional[List[Any]] = None) -> Agent:
+        """
+        Create an Agent instance from an already loaded configuration.
         
+        Args:
+            agent_id: The ID of the agent the configuration belongs to
+            config: The agent's configuration
+            additional_tools: Additional tools to include (e.g., from external providers)
+        
+        Returns:
+            Configured Agent instance
+            
+        Raises:
+            ValueError: If the configuration is empty or agent creation fails
+        """
+        agent_kwargs = self.agent_kwargs(agent_id, config, additional_tools)
+        try:
+            return Agent(**agent_kwargs)
+        except Exception as e:
+            raise ValueError(f"Failed to create agent {agent_id}: {str(e)}")
+    
+    def agent_kwargs(self, agent_id: str, config: Dict[str, Any], additional_tools: Optional[List[Any]] = None) -> Dict[str, Any]:
+        """
+        ``Agent`` constructor arguments for an already loaded configuration. The model and tools in
+        them are built once, so any number of agents (e.g. one per conversation) can share them.
+        
+        Args:
+            agent_id: The ID of the agent the configuration belongs to
+            config: The agent's configuration
+            additional_tools: Additional tools to include (e.g., from external providers)
+        
+        Returns:
+            Keyword arguments for ``Agent``
+            
+        Raises:
+            ValueError: If the configuration is empty
+        """
         if not config:
             raise ValueError(f"No configuration found for agent: {agent_id}")
         
         # Get available Agent parameters to ensure we only pass valid parameters
-        agent_params = cls.get_agent_signature_params()
+        agent_params = self.get_agent_signature_params()
         
         # Prepare agent arguments
         agent_kwargs = {}
         
         # Handle model configuration (required for most agents)
         if "model_config" in config:
-            agent_kwargs["model"] = cls.create_model_from_config(config["model_config"])
+            agent_kwargs["model"] = self.create_model_from_config(config["model_config"], self.clients)
         
         # Handle tools configuration
         tools = []
         if "tools_config" in config:
-            tools.extend(cls.create_tools_from_config(config["tools_config"]))
+            tools.extend(self.create_tools_from_config(config["tools_config"], self.clients))
         
         # Add additional tools if provided
         if additional_tools:
@@ -253,34 +734,21 @@ class AgentConfigManager:
                 agent_kwargs[param_name] = config[config_key]
         
         # Remove None values and parameters not accepted by Agent constructor
-        filtered_kwargs = {
+        return {
             k: v for k, v in agent_kwargs.items() 
             if v is not None and k in agent_params
         }
-        
-        try:
-            return Agent(**filtered_kwargs)
-        except Exception as e:
-            raise ValueError(f"Failed to create agent {agent_id}: {str(e)}")
     
-    @classmethod
-    def list_available_agents(cls) -> List[str]:
+    def list_available_agents(self) -> List[str]:
         """
-        List all available agent IDs from the configuration.
-        In a real implementation, this would query the database.
+        List all available agent IDs from the config store.
         
         Returns:
             List of available agent IDs
         """
-        # TODO: Replace with actual database query
-        # return db.query("SELECT DISTINCT agent_id FROM agent_configs")
-        
-        # For now, return the sample agent IDs
-        sample_configs = cls.load_agent_config_from_db("")  # Get all configs
-        return list(sample_configs.keys()) if sample_configs else []
+        return self.config_store.list_agent_ids()
     
-    @classmethod
-    def get_agent_info(cls, agent_id: str) -> Dict[str, Any]:
+    def get_agent_info(self, agent_id: str) -> Dict[str, Any]:
         """
         Get basic information about an agent without creating it.
         
@@ -290,7 +758,7 @@ class AgentConfigManager:
         Returns:
             Dictionary with agent information (name, description, etc.)
         """
-        config = cls.load_agent_config_from_db(agent_id)
+        config = self.load_agent_config_from_db(agent_id)
         if not config:
             raise ValueError(f"No configuration found for agent: {agent_id}")
         
@@ -307,15 +775,52 @@ class AgentConfigManager:
         return info
 
 
+def tool_set_key(tools: Optional[List[Any]]) -> Tuple[str, ...]:
+    """
+    Stable identity of a list of tools, used in agent cache keys.
+    
+    Args:
+        tools: Tools as passed to the Agent constructor (tool objects, decorated functions or module names)
+        
+    Returns:
+        Sorted tuple of the tool names
+    """
+    names = []
+    for tool in tools or []:
+        if isinstance(tool, str):
+            names.append(tool)
+        else:
+            names.append(getattr(tool, "tool_name", None) or getattr(tool, "__name__", None) or f"{type(tool).__name__}@{id(tool):x}")
+    return tuple(sorted(names))
+
+
 class DynamicAgentFactory:
     """
     Factory class for creating and managing dynamic agents.
     Provides a higher-level interface for agent management.
+    
+    Agents are cached in a size-bounded LRU whose entries also expire after ``ttl_seconds``, keyed on
+    agent_id, configuration version and the set of additional tools. A configuration change makes
+    the agent's old entries unreachable and drops them, so the cache holds at most ``max_agents``
+    agents however many tenants are served.
     """
     
-    def __init__(self):
-        self.config_manager = AgentConfigManager()
-        self.agent_cache: Dict[str, Agent] = {}
+    def __init__(
+        self,
+        config_manager: Optional[AgentConfigManager] = None,
+        max_agents: int = 256,
+        ttl_seconds: float = 3600.0,
+    ):
+        """
+        Args:
+            config_manager: Manager to build agents with; defaults to one over the sample configurations
+            max_agents: Maximum number of cached agents, least recently used evicted first
+            ttl_seconds: Seconds a cached agent is kept after it was created
+        """
+        self.config_manager = config_manager if config_manager is not None else AgentConfigManager()
+        self.agent_cache = TTLCache(max_size=max_agents, ttl_seconds=ttl_seconds)
+        self.config_manager.config_store.add_listener(self.clear_cache)
+        self.created = 0
     
     def create_agent(self, agent_id: str, additional_tools: Optional[List[Any]] = None, force_recreate: bool = False) -> Agent:
         """
@@ -328,25 +833,37 @@ class DynamicAgentFactory:
             
         Returns:
             Agent instance
+            
+        Raises:
+            ValueError: If agent configuration is not found or agent creation fails
         """
-        if not force_recreate and agent_id in self.agent_cache:
-            return self.agent_cache[agent_id]
-        
-        agent = self.config_manager.create_agent_from_config(agent_id, additional_tools)
-        self.agent_cache[agent_id] = agent
+        config, version = self.config_manager.load_versioned_config(agent_id)
+        key = (agent_id, version, tool_set_key(additional_tools))
+        if not force_recreate:
+            agent = self.agent_cache.get(key)
+            if agent is not None:
+                return agent
+        
+        agent = self.config_manager.build_agent(agent_id, config, additional_tools)
+        self.agent_cache.set(key, agent)
+        self.created += 1
         return agent
     
-    def get_agent(self, agent_id: str) -> Optional[Agent]:
+    def get_agent(self, agent_id: str, additional_tools: Optional[List[Any]] = None) -> Optional[Agent]:
         """
-        Get a cached agent instance.
+        Get a cached agent instance built from the agent's current configuration.
         
         Args:
             agent_id: The ID of the agent
+            additional_tools: The additional tools the agent was created with
             
         Returns:
             Agent instance if cached, None otherwise
         """
-        return self.agent_cache.get(agent_id)
+        _, version = self.config_manager.load_versioned_config(agent_id)
+        if version is None:
+            return None
+        return self.agent_cache.get((agent_id, version, tool_set_key(additional_tools)))
     
     def list_cached_agents(self) -> List[str]:
         """
@@ -355,17 +872,17 @@ class DynamicAgentFactory:
         Returns:
             List of cached agent IDs
         """
-        return list(self.agent_cache.keys())
+        return list(dict.fromkeys(key[0] for key in self.agent_cache.keys()))
     
     def clear_cache(self, agent_id: Optional[str] = None) -> None:
         """
-        Clear the agent cache.
+        Clear the agent cache. Called by the config store whenever an agent's configuration changes.
         
         Args:
             agent_id: Specific agent ID to clear, or None to clear all
         """
         if agent_id:
-            self.agent_cache.pop(agent_id, None)
+            self.agent_cache.invalidate(lambda key: key[0] == agent_id)
         else:
             self.agent_cache.clear()
     
@@ -389,6 +906,20 @@ class DynamicAgentFactory:
             Dictionary with agent information
         """
         return self.config_manager.get_agent_info(agent_id)
+    
+    def stats(self) -> Dict[str, Any]:
+        """
+        Agent cache and config store counters.
+        
+        Returns:
+            Dictionary with the counters
+        """
+        return {
+            "agents_created": self.created,
+            "agent_cache": self.agent_cache.stats(),
+            "config_store": self.config_manager.config_store.stats(),
+            "shared_clients": self.config_manager.clients.stats(),
+        }
 
 
 # Example usage
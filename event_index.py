@@ -0,0 +1,310 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from metrics import MetricsRegistry
+from single_flight import SingleFlight
+
+# Google Calendar event fields kept in their own columns for keyword search
+SEARCH_FIELDS = ("summary", "description", "location")
+
+
+def to_timestamp(value: Any) -> Optional[float]:
+    """Epoch seconds of an event time: an ISO string or a Google ``{"dateTime"|"date": ...}`` object. Naive times are UTC."""
+    if isinstance(value, dict):
+        value = value.get("dateTime") or value.get("date")
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(str(value).replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def to_iso(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp, timezone.utc).isoformat().replace("+00:00", "Z")
+
+
+def parse_events(result: Dict[str, Any]) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+    """
+    Events of an MCP list tool result (a JSON list, or an object with ``items``/``events``) and
+    the token of the next page, if the listing was cut short.
+    """
+    if result.get("status") != "success":
+        raise RuntimeError(f"Event listing failed: {result.get('content')}")
+    events: List[Dict[str, Any]] = []
+    next_page_token = None
+    for item in result.get("content", []):
+        data = item.get("json")
+        if data is None and "text" in item:
+            data = json.loads(item["text"])
+        if isinstance(data, dict):
+            next_page_token = data.get("nextPageToken") or data.get("next_page_token") or next_page_token
+            data = data.get("items", data.get("events", []))
+        events.extend(event for event in data or [] if isinstance(event, dict) and "id" in event)
+    return events, next_page_token
+
+
+def like_pattern(keyword: str) -> str:
+    """A ``LIKE ... ESCAPE '\\'`` pattern matching ``keyword`` anywhere, with its wildcards taken literally."""
+    return "%" + keyword.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+
+
+class IncompleteListing(RuntimeError):
+    """A listing the index cannot hold in full: more pages than it may follow, or recurring events left unexpanded."""
+
+
+class CalendarEventIndex:
+    """
+    Local SQLite index of calendar events per ``connection_id``, answering read-only time-range and
+    keyword queries without a Nango round trip.
+
+    Every (connection, calendar) remembers the time range it holds and when it was last synced.
+    A query inside that range and no older than ``max_staleness`` seconds is answered from the
+    index; otherwise the index is synced first through ``fetch(connection_id, arguments)``, which
+    calls the MCP list tool. When the range is already held and the list tool accepts
+    ``incremental_param`` (``supports_incremental(connection_id)``), only the events changed since
+    the last sync are pulled; cancelled events are removed. Otherwise the requested range is pulled
+    in full and replaces what the index held for it.
+
+    Every sync follows ``page_param`` (the listing's ``nextPageToken``) to the last page and asks
+    for recurring events expanded into their instances through ``expand_param``, when the list tool
+    accepts them (``accepts(connection_id, param)``). A listing that stays truncated or returns
+    unexpanded recurring events raises ``IncompleteListing`` and leaves the index as it was, so the
+    range is never recorded as held.
+
+    Writes made through the agent call ``invalidate``, so the next read re-syncs. The file can be
+    shared by every worker on the node, like the SQLite caches.
+    """
+
+    # Changes made right before a sync may carry an updated time slightly earlier than our clock
+    CLOCK_SKEW_SECONDS = 60.0
+    # Pages followed per sync before the listing counts as incomplete
+    MAX_PAGES = 50
+
+    def __init__(
+        self,
+        path: str,
+        fetch: Callable[[str, Dict[str, Any]], Dict[str, Any]],
+        max_staleness: float = 300.0,
+        incremental_param: Optional[str] = "updated_min",
+        page_param: Optional[str] = "page_token",
+        expand_param: Optional[str] = "single_events",
+        accepts: Optional[Callable[[str, str], bool]] = None,
+        default_past_days: float = 30.0,
+        default_future_days: float = 90.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.path = path
+        self.fetch = fetch
+        self.max_staleness = max_staleness
+        self.incremental_param = incremental_param
+        self.page_param = page_param
+        self.expand_param = expand_param
+        self.accepts = accepts or (lambda connection_id, param: True)
+        self.default_past_days = default_past_days
+        self.default_future_days = default_future_days
+        self._local = threading.local()
+        self._flight = SingleFlight("event_index_sync", metrics=metrics)
+
+        self.index_reads = 0
+        self.synced_reads = 0
+        self.full_syncs = 0
+        self.incremental_syncs = 0
+        self._reads = metrics.counter(
+            "event_index_reads_total", "Calendar event reads by where they were answered from", ["source"]
+        ) if metrics is not None else None
+        self._syncs = metrics.counter(
+            "event_index_syncs_total", "Calendar event index syncs", ["kind"]
+        ) if metrics is not None else None
+
+        conn = self._conn()
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS events (
+                connection_id TEXT NOT NULL, calendar_id TEXT NOT NULL, event_id TEXT NOT NULL,
+                start_ts REAL, end_ts REAL, summary TEXT, description TEXT, location TEXT,
+                payload TEXT NOT NULL,
+                PRIMARY KEY (connection_id, calendar_id, event_id)
+            );
+            CREATE INDEX IF NOT EXISTS events_time ON events (connection_id, calendar_id, start_ts, end_ts);
+            CREATE TABLE IF NOT EXISTS sync_state (
+                connection_id TEXT NOT NULL, calendar_id TEXT NOT NULL,
+                range_min REAL NOT NULL, range_max REAL NOT NULL, synced_at REAL NOT NULL, stale INTEGER NOT NULL DEFAULT 0,
+                PRIMARY KEY (connection_id, calendar_id)
+            );
+        """)
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, so each thread gets its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def _state(self, connection_id: str, calendar_id: str) -> Optional[Tuple[float, float, float, int]]:
+        return self._conn().execute(
+            "SELECT range_min, range_max, synced_at, stale FROM sync_state WHERE connection_id = ? AND calendar_id = ?",
+            (connection_id, calendar_id),
+        ).fetchone()
+
+    def is_fresh(self, connection_id: str, calendar_id: str, range_min: float, range_max: float) -> bool:
+        state = self._state(connection_id, calendar_id)
+        return (
+            state is not None and not state[3]
+            and state[0] <= range_min and state[1] >= range_max
+            and state[2] >= time.time() - self.max_staleness
+        )
+
+    def query(
+        self,
+        connection_id: str,
+        calendar_id: str = "primary",
+        time_min: Any = None,
+        time_max: Any = None,
+        keyword: Optional[str] = None,
+        limit: int = 250,
+    ) -> List[Dict[str, Any]]:
+        """
+        Events overlapping [time_min, time_max] (ISO strings; a default window around now when
+        missing), optionally matching ``keyword``, in start order. Syncs first if the range is stale.
+        """
+        # The default window runs from and to UTC midnights, so open-ended queries made the same day
+        # ask for the same range: one sync then answers all of them, and concurrent ones share it
+        today = time.time() // 86400 * 86400
+        range_min = to_timestamp(time_min) or today - self.default_past_days * 86400
+        range_max = to_timestamp(time_max) or today + (self.default_future_days + 1) * 86400
+
+        if self.is_fresh(connection_id, calendar_id, range_min, range_max):
+            source = "index"
+            self.index_reads += 1
+        else:
+            self._flight.do((connection_id, calendar_id, range_min, range_max), self.sync, connection_id, calendar_id, range_min, range_max)
+            source = "nango"
+            self.synced_reads += 1
+        if self._reads is not None:
+            self._reads.inc(source=source)
+
+        sql = "SELECT payload FROM events WHERE connection_id = ? AND calendar_id = ? AND start_ts < ? AND end_ts > ?"
+        params: List[Any] = [connection_id, calendar_id, range_max, range_min]
+        if keyword:
+            sql += " AND (" + " OR ".join(f"{field} LIKE ? ESCAPE '\\'" for field in SEARCH_FIELDS) + ")"
+            params.extend([like_pattern(keyword)] * len(SEARCH_FIELDS))
+        sql += " ORDER BY start_ts LIMIT ?"
+        params.append(limit)
+        return [json.loads(row[0]) for row in self._conn().execute(sql, params)]
+
+    def sync(self, connection_id: str, calendar_id: str, range_min: float, range_max: float) -> None:
+        """Bring [range_min, range_max] up to date, incrementally when the index already holds it."""
+        state = self._state(connection_id, calendar_id)
+        started = time.time()
+        if (
+            state is not None and state[0] <= range_min and state[1] >= range_max
+            and self.incremental_param and self.accepts(connection_id, self.incremental_param)
+        ):
+            events = self._fetch_all(connection_id, {
+                "calendar_id": calendar_id,
+                "time_min": to_iso(state[0]),
+                "time_max": to_iso(state[1]),
+                self.incremental_param: to_iso(state[2] - self.CLOCK_SKEW_SECONDS),
+            })
+            self._apply(connection_id, calendar_id, events)
+            self._save_state(connection_id, calendar_id, state[0], state[1], started)
+            self.incremental_syncs += 1
+            kind = "incremental"
+        else:
+            events = self._fetch_all(connection_id, {
+                "calendar_id": calendar_id, "time_min": to_iso(range_min), "time_max": to_iso(range_max),
+            })
+            conn = self._conn()
+            conn.execute(
+                "DELETE FROM events WHERE connection_id = ? AND calendar_id = ? AND start_ts < ? AND end_ts > ?",
+                (connection_id, calendar_id, range_max, range_min),
+            )
+            self._apply(connection_id, calendar_id, events)
+            # A fresh neighbouring range is kept, at the age of its own sync
+            if state is not None and not state[3] and state[2] >= started - self.max_staleness and state[0] <= range_max and state[1] >= range_min:
+                self._save_state(connection_id, calendar_id, min(state[0], range_min), max(state[1], range_max), state[2])
+            else:
+                self._save_state(connection_id, calendar_id, range_min, range_max, started)
+            self.full_syncs += 1
+            kind = "full"
+        if self._syncs is not None:
+            self._syncs.inc(kind=kind)
+        print(f"Event index {kind} sync for {connection_id}/{calendar_id}: {len(events)} events")
+
+    def _fetch_all(self, connection_id: str, arguments: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """Every event of a listing, page by page; raises ``IncompleteListing`` when it cannot be had in full."""
+        if self.expand_param and self.accepts(connection_id, self.expand_param):
+            arguments = {**arguments, self.expand_param: True}
+        pageable = bool(self.page_param) and self.accepts(connection_id, self.page_param)
+        events: List[Dict[str, Any]] = []
+        for _ in range(self.MAX_PAGES):
+            page, next_page_token = parse_events(self.fetch(connection_id, arguments))
+            events.extend(page)
+            if not next_page_token:
+                break
+            if not pageable:
+                raise IncompleteListing(f"Listing for {connection_id} is truncated and {self.page_param!r} is not accepted")
+            arguments = {**arguments, self.page_param: next_page_token}
+        else:
+            raise IncompleteListing(f"Listing for {connection_id} has more than {self.MAX_PAGES} pages")
+        # Without expansion a recurring event is one entry at its first start, so later instances would be missed
+        if any(event.get("recurrence") for event in events):
+            raise IncompleteListing(f"Listing for {connection_id} has recurring events that were not expanded")
+        return events
+
+    def _apply(self, connection_id: str, calendar_id: str, events: List[Dict[str, Any]]) -> None:
+        conn = self._conn()
+        for event in events:
+            if event.get("status") == "cancelled":
+                conn.execute(
+                    "DELETE FROM events WHERE connection_id = ? AND calendar_id = ? AND event_id = ?",
+                    (connection_id, calendar_id, str(event["id"])),
+                )
+                continue
+            start = to_timestamp(event.get("start"))
+            end = to_timestamp(event.get("end")) or start
+            conn.execute(
+                "INSERT OR REPLACE INTO events VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                (connection_id, calendar_id, str(event["id"]), start, end,
+                 *(str(event.get(field) or "") for field in SEARCH_FIELDS), json.dumps(event)),
+            )
+        conn.commit()
+
+    def _save_state(self, connection_id: str, calendar_id: str, range_min: float, range_max: float, synced_at: float) -> None:
+        conn = self._conn()
+        conn.execute(
+            "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?, 0)",
+            (connection_id, calendar_id, range_min, range_max, synced_at),
+        )
+        conn.commit()
+
+    def invalidate(self, connection_id: str) -> None:
+        """Mark every calendar of the connection stale, e.g. after a write, so the next read re-syncs."""
+        conn = self._conn()
+        conn.execute("UPDATE sync_state SET stale = 1 WHERE connection_id = ?", (connection_id,))
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "max_staleness": self.max_staleness,
+            "index_reads": self.index_reads,
+            "synced_reads": self.synced_reads,
+            "full_syncs": self.full_syncs,
+            "incremental_syncs": self.incremental_syncs,
+            "sync_flight": self._flight.stats(),
+        }
@@ -0,0 +1,297 @@
+import asyncio
+import json
+import os
+import threading
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from strands.agent.conversation_manager import ConversationManager
+from strands.hooks import BeforeInvocationEvent, HookProvider, HookRegistry
+from strands.types.exceptions import ContextWindowOverflowException
+
+from metrics import MetricsRegistry
+
+HISTORY_MODES = ("none", "sliding_window", "token_budget", "summarize")
+
+# Fields of tool-result JSON objects an answer can draw on; everything else is dropped from past turns
+DEFAULT_TOOL_RESULT_FIELDS = (
+    "id", "summary", "description", "location", "start", "end", "dateTime", "date", "timeZone",
+    "status", "attendees", "email", "error", "message",
+)
+
+SUMMARY_PROMPT = (
+    "Summarize the conversation below for the assistant that will continue it. Keep every fact, "
+    "name, date, identifier and open question the user may refer back to; drop pleasantries and "
+    "raw tool payloads. Answer with the summary only.\n\n"
+)
+
+
+def _block_chars(block: Dict[str, Any]) -> int:
+    if "text" in block:
+        return len(block["text"])
+    if "toolUse" in block:
+        return len(block["toolUse"]["name"]) + len(json.dumps(block["toolUse"].get("input"), default=str))
+    if "toolResult" in block:
+        return sum(_block_chars(item) if "text" in item else len(json.dumps(item, default=str)) for item in block["toolResult"]["content"])
+    return len(json.dumps(block, default=str))
+
+
+def message_chars(message: Dict[str, Any]) -> int:
+    return sum(_block_chars(block) for block in message["content"])
+
+
+def estimate_tokens(messages: Sequence[Dict[str, Any]]) -> int:
+    """Rough token count of a message history (about four characters per token), cheap enough to run every turn."""
+    return sum(message_chars(message) for message in messages) // 4
+
+
+def turn_starts(messages: Sequence[Dict[str, Any]]) -> List[int]:
+    """Indices of the user messages that open a turn, i.e. carry text rather than tool results."""
+    return [
+        i for i, message in enumerate(messages)
+        if message["role"] == "user"
+        and any("text" in block for block in message["content"])
+        and not any("toolResult" in block for block in message["content"])
+    ]
+
+
+def project_fields(value: Any, fields: Sequence[str]) -> Any:
+    """Keep only ``fields`` of every JSON object in ``value``, plus the lists of objects they are nested in."""
+    if isinstance(value, list):
+        return [project_fields(item, fields) for item in value]
+    if isinstance(value, dict):
+        return {
+            key: project_fields(item, fields)
+            for key, item in value.items()
+            if key in fields or (isinstance(item, list) and any(isinstance(x, dict) for x in item))
+        }
+    return value
+
+
+def trim_tool_result_text(text: str, fields: Sequence[str], max_chars: int) -> str:
+    """Shrink one tool-result text: project JSON payloads onto ``fields``, then cut anything left over ``max_chars``."""
+    try:
+        trimmed = json.dumps(project_fields(json.loads(text), fields), separators=(",", ":"))
+    except (ValueError, TypeError):
+        trimmed = text
+    if len(trimmed) > max_chars:
+        trimmed = trimmed[:max_chars] + f"... [trimmed {len(trimmed) - max_chars} chars]"
+    return trimmed if len(trimmed) < len(text) else text
+
+
+def render_transcript(messages: Sequence[Dict[str, Any]], max_tool_chars: int = 500) -> str:
+    lines = []
+    for message in messages:
+        for block in message["content"]:
+            if "text" in block:
+                lines.append(f"{message['role'].capitalize()}: {block['text']}")
+            elif "toolUse" in block:
+                lines.append(f"Assistant called {block['toolUse']['name']}({json.dumps(block['toolUse'].get('input'), default=str)})")
+            elif "toolResult" in block:
+                text = " ".join(item.get("text", "") for item in block["toolResult"]["content"])
+                lines.append(f"Tool result: {text[:max_tool_chars]}")
+    return "\n".join(lines)
+
+
+class CompactingConversationManager(ConversationManager, HookProvider):
+    """
+    Strands conversation manager that caps the history an agent resends on every turn.
+
+    Modes:
+
+    - "none": keep the full history
+    - "sliding_window": keep the turns within the last ``window_size`` messages
+    - "token_budget": drop the oldest turns until the history fits in ``token_budget`` estimated tokens
+    - "summarize": once the history exceeds ``token_budget``, summarize every turn but the last
+      ``keep_recent_turns`` with the agent's model. The summary is written on a background thread
+      after the turn has been answered and replaces those turns at the start of the next turn, so
+      it never adds latency to a request
+
+    History is only ever cut at turn boundaries, so tool calls stay paired with their results and
+    the conversation still starts with a user message. With ``trim_tool_results``, the tool results
+    of completed turns, which the model has already used, are reduced to ``tool_result_fields``
+    (JSON payloads) and ``tool_result_max_chars``.
+
+    Every turn's effect is kept in ``last_report`` (estimated tokens before and after, and the
+    tokens saved) and added to the ``history_tokens_saved_total`` counter when ``metrics`` is given.
+    One instance holds per-agent state, so every agent needs its own; it must also be passed in the
+    agent's ``hooks`` for summaries to be applied.
+    """
+
+    def __init__(
+        self,
+        mode: str = "sliding_window",
+        window_size: int = 40,
+        token_budget: int = 8000,
+        keep_recent_turns: int = 2,
+        trim_tool_results: bool = False,
+        tool_result_fields: Sequence[str] = DEFAULT_TOOL_RESULT_FIELDS,
+        tool_result_max_chars: int = 2000,
+        metrics: Optional[MetricsRegistry] = None,
+        agent_name: str = "agent",
+    ):
+        super().__init__()
+        if mode not in HISTORY_MODES:
+            raise ValueError(f"mode must be one of {HISTORY_MODES}, got {mode!r}")
+        self.mode = mode
+        self.window_size = window_size
+        self.token_budget = token_budget
+        self.keep_recent_turns = max(1, keep_recent_turns)
+        self.trim_tool_results = trim_tool_results
+        self.tool_result_fields = tuple(tool_result_fields)
+        self.tool_result_max_chars = tool_result_max_chars
+        self.agent_name = agent_name
+        self._tokens_saved = metrics.counter(
+            "history_tokens_saved_total", "Estimated prompt tokens removed from agent histories", ["agent", "mode"]
+        ) if metrics is not None else None
+
+        self._trimmed_ids: set = set()
+        self._summary_lock = threading.Lock()
+        self._summarizing = False
+        # (ids of the summarized messages, summary text), applied at the start of the next turn
+        self._pending_summary: Optional[Tuple[List[int], str]] = None
+        self._applied_savings = 0
+
+        self.last_report: Dict[str, Any] = {}
+        self.tokens_saved = 0
+        self.summaries = 0
+
+    @classmethod
+    def from_env(cls, metrics: Optional[MetricsRegistry] = None, agent_name: str = "agent") -> "CompactingConversationManager":
+        """Build a manager from the HISTORY_* environment variables, shared by both services."""
+        fields = os.getenv("HISTORY_TOOL_RESULT_FIELDS", "")
+        return cls(
+            mode=os.getenv("HISTORY_MODE", "sliding_window"),
+            window_size=int(os.getenv("HISTORY_WINDOW_SIZE", "40")),
+            token_budget=int(os.getenv("HISTORY_TOKEN_BUDGET", "8000")),
+            keep_recent_turns=int(os.getenv("HISTORY_KEEP_RECENT_TURNS", "2")),
+            trim_tool_results=os.getenv("HISTORY_TRIM_TOOL_RESULTS", "false").lower() == "true",
+            tool_result_fields=[f.strip() for f in fields.split(",") if f.strip()] or DEFAULT_TOOL_RESULT_FIELDS,
+            tool_result_max_chars=int(os.getenv("HISTORY_TOOL_RESULT_MAX_CHARS", "2000")),
+            metrics=metrics,
+            agent_name=agent_name,
+        )
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+
+    def _before_invocation(self, event: BeforeInvocationEvent) -> None:
+        with self._summary_lock:
+            pending, self._pending_summary = self._pending_summary, None
+        if pending is not None:
+            self._applied_savings += self._apply_summary(event.agent.messages, *pending)
+
+    def _cut(self, messages: List[Dict[str, Any]], index: int) -> None:
+        """Drop every message before ``index``, which must be a turn start."""
+        self.removed_message_count += index
+        messages[:] = messages[index:]
+
+    def _trim_results(self, messages: List[Dict[str, Any]], end: int) -> None:
+        for message in messages[:end]:
+            for block in message["content"]:
+                if "toolResult" not in block or block["toolResult"]["toolUseId"] in self._trimmed_ids:
+                    continue
+                self._trimmed_ids.add(block["toolResult"]["toolUseId"])
+                for item in block["toolResult"]["content"]:
+                    if "text" in item:
+                        item["text"] = trim_tool_result_text(item["text"], self.tool_result_fields, self.tool_result_max_chars)
+                    elif "json" in item:
+                        item["json"] = project_fields(item["json"], self.tool_result_fields)
+
+    def _apply_summary(self, messages: List[Dict[str, Any]], summarized_ids: List[int], summary: str) -> int:
+        """Replace the summarized turns with the summary, unless the history changed underneath; returns tokens saved."""
+        count = len(summarized_ids)
+        if [id(message) for message in messages[:count]] != summarized_ids or count >= len(messages):
+            return 0
+        before = estimate_tokens(messages)
+        self._cut(messages, count)
+        messages[0] = {**messages[0], "content": [{"text": f"Summary of the earlier conversation:\n{summary}"}] + messages[0]["content"]}
+        self.summaries += 1
+        return before - estimate_tokens(messages)
+
+    def _start_summary(self, agent: Any, messages: List[Dict[str, Any]], end: int) -> None:
+        with self._summary_lock:
+            if self._summarizing:
+                return
+            self._summarizing = True
+        to_summarize = messages[:end]
+        summarized_ids = [id(message) for message in to_summarize]
+        model = agent.model
+
+        async def summarize() -> str:
+            prompt = [{"role": "user", "content": [{"text": SUMMARY_PROMPT + render_transcript(to_summarize)}]}]
+            text = []
+            async for event in model.stream(prompt, None, system_prompt="You summarize conversations."):
+                delta = event.get("contentBlockDelta", {}).get("delta", {})
+                if "text" in delta:
+                    text.append(delta["text"])
+            return "".join(text).strip()
+
+        def run() -> None:
+            try:
+                summary = asyncio.run(summarize())
+                if summary:
+                    with self._summary_lock:
+                        self._pending_summary = (summarized_ids, summary)
+            except Exception as e:
+                print(f"Error summarizing {self.agent_name} history: {e}")
+            finally:
+                with self._summary_lock:
+                    self._summarizing = False
+
+        threading.Thread(target=run, name=f"{self.agent_name}-summary", daemon=True).start()
+
+    def apply_management(self, agent: Any, **kwargs: Any) -> None:
+        messages = agent.messages
+        before = estimate_tokens(messages) + self._applied_savings
+        starts = turn_starts(messages)
+        # The turns that must stay whole: the current one, or the last keep_recent_turns for the budget modes
+        recent = starts[-self.keep_recent_turns] if len(starts) >= self.keep_recent_turns else 0
+
+        if self.mode != "none":
+            if self.trim_tool_results and starts:
+                self._trim_results(messages, starts[-1])
+
+            if self.mode == "sliding_window" and len(messages) > self.window_size:
+                cut = next((i for i in starts if len(messages) - i <= self.window_size), starts[-1] if starts else 0)
+                if cut:
+                    self._cut(messages, cut)
+            elif self.mode == "token_budget":
+                chars = [message_chars(message) for message in messages]
+                remaining, previous, cut = sum(chars), 0, 0
+                for i in starts:
+                    remaining -= sum(chars[previous:i])
+                    previous = i
+                    if i >= recent or remaining // 4 <= self.token_budget:
+                        cut = i
+                        break
+                if cut:
+                    self._cut(messages, cut)
+            elif self.mode == "summarize" and recent and estimate_tokens(messages) > self.token_budget:
+                self._start_summary(agent, messages, recent)
+
+        after = estimate_tokens(messages)
+        saved = max(0, before - after)
+        self._applied_savings = 0
+        self.tokens_saved += saved
+        if self._tokens_saved is not None and saved:
+            self._tokens_saved.inc(saved, agent=self.agent_name, mode=self.mode)
+        self.last_report = {
+            "mode": self.mode,
+            "messages": len(messages),
+            "tokens_before": before,
+            "tokens_after": after,
+            "tokens_saved": saved,
+        }
+
+    def reduce_context(self, agent: Any, e: Optional[Exception] = None, **kwargs: Any) -> None:
+        """On a context window overflow, trim every completed turn's tool results, then drop the oldest turn."""
+        messages = agent.messages
+        starts = turn_starts(messages)
+        if starts:
+            self._trim_results(messages, starts[-1])
+        if len(starts) < 2:
+            raise ContextWindowOverflowException("Unable to trim conversation context!") from e
+        self._cut(messages, starts[1])
+
+    def stats(self) -> Dict[str, Any]:
+        return {"mode": self.mode, "tokens_saved": self.tokens_saved, "summaries": self.summaries}
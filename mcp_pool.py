@@ -0,0 +1,314 @@
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+from strands.tools.mcp import MCPClient
+
+from metrics import MetricsRegistry
+
+
+@dataclass
+class _PooledClient:
+    """A started MCP client, the callers currently using it and the timestamps used to expire and probe it."""
+
+    client: MCPClient
+    created: float = field(default_factory=time.monotonic)
+    last_used: float = field(default_factory=time.monotonic)
+    last_checked: float = field(default_factory=time.monotonic)
+    users: int = 0
+    # Removed from the pool; stopped as soon as its last user is done with it
+    retired: bool = False
+
+
+@dataclass
+class _KeyLock:
+    """Serializes session starts for one key; kept only while some caller is waiting on it."""
+
+    lock: threading.Lock = field(default_factory=threading.Lock)
+    waiters: int = 0
+
+
+class MCPClientPool:
+    """
+    Pool of long-lived MCP client sessions keyed by an arbitrary key (e.g. a Nango connection_id).
+
+    Repeated calls for the same key reuse one warm, already initialized session instead of paying
+    a TLS handshake and MCP initialize every time. Sessions are leased with ``session(key)``; a
+    session that leaves the pool (evicted, idle, invalidated or closed) is only stopped once no
+    caller is using it any more, so a call in flight is never cut off. Sessions idle for longer
+    than ``idle_timeout`` are stopped by a background reaper, at most ``max_size`` sessions are
+    kept (the least-recently-used one leaves to make room), and the reaper probes idle sessions
+    with a cheap ``list_tools`` round trip every ``health_check_interval`` seconds.
+    """
+
+    def __init__(
+        self,
+        client_factory: Callable[[str], MCPClient],
+        max_size: int = 32,
+        idle_timeout: float = 300.0,
+        health_check_interval: float = 60.0,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+
+        self.client_factory = client_factory
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self.metrics = metrics
+
+        self._clients: Dict[str, _PooledClient] = {}
+        self._lock = threading.Lock()
+        self._key_locks: Dict[str, _KeyLock] = {}
+        self._stopping: List[_PooledClient] = []
+        self._closed = False
+        self._stop_reaper = threading.Event()
+        self._reaper: Optional[threading.Thread] = None
+
+        self.created = 0
+        self.reused = 0
+        self.evicted = 0
+        self.unhealthy = 0
+        self.dedicated = 0
+
+    @contextmanager
+    def session(self, key: str) -> Iterator[MCPClient]:
+        """
+        Lease a started MCP client for ``key``, starting a new session only when needed.
+
+        The session stays open at least until the block exits. If the block raises, the session is
+        dropped from the pool so the next caller reconnects instead of reusing a broken one.
+
+        Args:
+            key: Pool key, typically the Nango connection_id
+
+        Raises:
+            RuntimeError: If the pool has been closed
+        """
+        pooled = self._checkout(key)
+        try:
+            yield pooled.client
+        except Exception:
+            self._discard(key, pooled)
+            raise
+        finally:
+            self._checkin(pooled)
+
+    @contextmanager
+    def dedicated_session(self, key: str) -> Iterator[MCPClient]:
+        """
+        Start an MCP client for ``key`` that no other caller shares, and stop it when the block
+        exits. Meant for hedged duplicates, which must not share a stalled pooled session.
+
+        Raises:
+            RuntimeError: If the pool has been closed
+        """
+        if self._closed:
+            raise RuntimeError("MCP client pool is closed")
+        client = self.client_factory(key)
+        with self.metrics.time_hop("mcp_session_setup") if self.metrics is not None else nullcontext():
+            client.start()
+        with self._lock:
+            self.created += 1
+            self.dedicated += 1
+        try:
+            yield client
+        finally:
+            self._stop(_PooledClient(client=client))
+
+    def _take(self, key: str) -> Optional[_PooledClient]:
+        """Lease the pooled session of ``key`` if it is still alive. Caller holds the pool lock."""
+        pooled = self._clients.get(key)
+        if pooled is None:
+            return None
+        if not pooled.client._is_session_active():
+            self.unhealthy += 1
+            del self._clients[key]
+            self._retire(pooled)
+            return None
+        pooled.users += 1
+        pooled.last_used = time.monotonic()
+        self.reused += 1
+        return pooled
+
+    def _checkout(self, key: str) -> _PooledClient:
+        if self._closed:
+            raise RuntimeError("MCP client pool is closed")
+        self._ensure_reaper()
+
+        with self._lock:
+            pooled = self._take(key)
+            if pooled is None:
+                key_lock = self._key_locks.setdefault(key, _KeyLock())
+                key_lock.waiters += 1
+        self._stop_retired()
+        if pooled is not None:
+            return pooled
+
+        try:
+            # Serialize per key so concurrent first calls start a single session
+            with key_lock.lock:
+                with self._lock:
+                    pooled = self._take(key)
+                self._stop_retired()
+                if pooled is not None:
+                    return pooled
+
+                client = self.client_factory(key)
+                with self.metrics.time_hop("mcp_session_setup") if self.metrics is not None else nullcontext():
+                    client.start()
+                print(f"MCP client started for connection {key}.")
+
+                with self._lock:
+                    self.created += 1
+                    pooled = _PooledClient(client=client, users=1)
+                    if self._closed:
+                        # Closed while starting: serve this caller, then stop it
+                        pooled.retired = True
+                    else:
+                        self._clients[key] = pooled
+                        for victim in self._pop_excess(keep=key):
+                            self._retire(victim)
+                self._stop_retired()
+                return pooled
+        finally:
+            with self._lock:
+                key_lock.waiters -= 1
+                if key_lock.waiters == 0 and self._key_locks.get(key) is key_lock:
+                    del self._key_locks[key]
+
+    def _checkin(self, pooled: _PooledClient) -> None:
+        with self._lock:
+            pooled.users -= 1
+            pooled.last_used = time.monotonic()
+            if pooled.retired and pooled.users == 0:
+                self._stopping.append(pooled)
+        self._stop_retired()
+
+    def invalidate(self, key: str) -> None:
+        """Drop the session for ``key``, e.g. after a call failed on it; it stops once its callers are done."""
+        self._discard(key)
+
+    def _discard(self, key: str, pooled: Optional[_PooledClient] = None) -> None:
+        """Drop ``key``'s session, or only ``pooled`` when given so a newer session of the key is kept."""
+        with self._lock:
+            current = self._clients.get(key)
+            if current is not None and (pooled is None or current is pooled):
+                del self._clients[key]
+                self._retire(current)
+        self._stop_retired()
+
+    def _retire(self, pooled: _PooledClient) -> None:
+        """
+        Mark a session that left the pool to be stopped by its last user, or right away when
+        nobody uses it. Caller holds the pool lock and calls ``_stop_retired`` once it is released.
+        """
+        pooled.retired = True
+        if pooled.users == 0:
+            self._stopping.append(pooled)
+
+    def _stop_retired(self) -> None:
+        with self._lock:
+            victims, self._stopping = self._stopping, []
+        for victim in victims:
+            self._stop(victim)
+
+    def _pop_excess(self, keep: str) -> List[_PooledClient]:
+        """Remove least-recently-used sessions beyond ``max_size``, idle ones first. Caller holds the pool lock."""
+        victims = []
+        while len(self._clients) > self.max_size:
+            key = min(
+                (k for k in self._clients if k != keep),
+                key=lambda k: (self._clients[k].users > 0, self._clients[k].last_used),
+            )
+            victims.append(self._clients.pop(key))
+            self.evicted += 1
+        return victims
+
+    def _stop(self, pooled: _PooledClient) -> None:
+        # MCPClient.stop waits on the session's background thread forever once that thread has died
+        if not pooled.client._is_session_active():
+            return
+        try:
+            pooled.client.stop(None, None, None)
+        except Exception as e:
+            print(f"Error stopping MCP client: {e}")
+
+    def reap_idle(self) -> int:
+        """Stop every unused session idle for longer than ``idle_timeout``; returns how many were stopped."""
+        cutoff = time.monotonic() - self.idle_timeout
+        with self._lock:
+            idle_keys = [k for k, pooled in self._clients.items() if pooled.users == 0 and pooled.last_used < cutoff]
+            victims = [self._clients.pop(k) for k in idle_keys]
+            for victim in victims:
+                self._retire(victim)
+            self.evicted += len(victims)
+        self._stop_retired()
+        return len(victims)
+
+    def check_health(self) -> int:
+        """
+        Probe every unused session not checked for ``health_check_interval`` seconds with a
+        ``list_tools`` round trip and drop the ones that fail; returns how many were dropped.
+        Runs on the reaper thread so no request waits on a probe.
+        """
+        cutoff = time.monotonic() - self.health_check_interval
+        with self._lock:
+            due = [(k, p) for k, p in self._clients.items() if p.users == 0 and p.last_checked < cutoff]
+            for _, pooled in due:
+                pooled.users += 1
+        dropped = 0
+        for key, pooled in due:
+            try:
+                pooled.client.list_tools_sync()
+                pooled.last_checked = time.monotonic()
+            except Exception as e:
+                print(f"MCP client health check failed for connection {key}: {e}")
+                self.unhealthy += 1
+                self._discard(key, pooled)
+                dropped += 1
+            finally:
+                self._checkin(pooled)
+        return dropped
+
+    def _ensure_reaper(self) -> None:
+        if self._reaper is not None or not (self.idle_timeout or self.health_check_interval):
+            return
+        with self._lock:
+            if self._reaper is None:
+                self._reaper = threading.Thread(target=self._reap_loop, name="mcp-pool-reaper", daemon=True)
+                self._reaper.start()
+
+    def _reap_loop(self) -> None:
+        interval = max(min(t / 2 for t in (self.idle_timeout, self.health_check_interval) if t), 1.0)
+        while not self._stop_reaper.wait(interval):
+            if self.idle_timeout:
+                self.reap_idle()
+            if self.health_check_interval:
+                self.check_health()
+
+    def close(self) -> None:
+        """Stop every pooled session and the reaper; used on server shutdown."""
+        self._closed = True
+        self._stop_reaper.set()
+        with self._lock:
+            for pooled in self._clients.values():
+                self._retire(pooled)
+            self._clients.clear()
+        self._stop_retired()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "size": len(self._clients),
+            "max_size": self.max_size,
+            "idle_timeout": self.idle_timeout,
+            "in_use": sum(pooled.users for pooled in list(self._clients.values())),
+            "created": self.created,
+            "reused": self.reused,
+            "evicted": self.evicted,
+            "unhealthy": self.unhealthy,
+            "dedicated": self.dedicated,
+        }
@@ -0,0 +1,356 @@
+import bisect
+import contextvars
+import re
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from strands.experimental.hooks import (
+    AfterModelInvocationEvent,
+    AfterToolInvocationEvent,
+    BeforeModelInvocationEvent,
+    BeforeToolInvocationEvent,
+)
+from strands.hooks import AfterInvocationEvent, BeforeInvocationEvent, HookProvider, HookRegistry
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# Hops span from sub-millisecond cache hits to multi-second LLM turns
+HOP_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+_INVALID_NAME_CHARS = re.compile(r"[^a-zA-Z0-9_]")
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) and not value.is_integer() else str(int(value))
+
+
+class _Metric(ABC):
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        if len(labels) != len(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    @abstractmethod
+    def samples(self) -> List[str]:
+        ...
+
+
+class Counter(_Metric):
+    """Monotonically increasing value per label set."""
+
+    kind = "counter"
+
+    def __init__(self, *args: Any, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = list(self._values.items())
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {_format_value(value)}" for key, value in values]
+
+
+class Gauge(Counter):
+    """Value per label set that can go up and down."""
+
+    kind = "gauge"
+
+    def set(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def dec(self, amount: float = 1.0, **labels: Any) -> None:
+        self.inc(-amount, **labels)
+
+    @contextmanager
+    def track_inprogress(self, **labels: Any):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    """Cumulative bucket counts, sum and count per label set."""
+
+    kind = "histogram"
+
+    def __init__(self, *args: Any, buckets: Sequence[float] = HOP_BUCKETS, **kwargs: Any):
+        super().__init__(*args, **kwargs)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: per-bucket (non-cumulative) counts with a trailing +Inf slot, then the sum
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: Any) -> None:
+        key = self._key(labels)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._values.get(key)
+            if counts is None:
+                counts = self._values[key] = [0] * (len(self.buckets) + 1) + [0.0]
+            counts[index] += 1
+            counts[-1] += value
+
+    @contextmanager
+    def time(self, **labels: Any):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self) -> List[str]:
+        with self._lock:
+            values = [(key, list(counts)) for key, counts in self._values.items()]
+        lines = []
+        for key, counts in values:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts[:-1]):
+                cumulative += count
+                le = 'le="' + _format_value(bound) + '"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {_format_value(counts[-1])}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {cumulative}")
+        return lines
+
+
+def flatten_stats(prefix: str, stats: Dict[str, Any]) -> Iterable[Tuple[str, float]]:
+    """
+    Turn a nested ``stats()`` dict into ``(metric_name, value)`` pairs for its numeric leaves.
+
+    Keys that are not identifiers (agent URLs, session ids, ...) are skipped so the metric names stay bounded.
+    """
+    for key, value in stats.items():
+        if not isinstance(key, str) or not key.isidentifier():
+            continue
+        name = f"{prefix}_{key}"
+        if isinstance(value, dict):
+            yield from flatten_stats(name, value)
+        elif isinstance(value, (int, float)):
+            yield _INVALID_NAME_CHARS.sub("_", name), float(value)
+
+
+class MetricsRegistry:
+    """
+    In-process metrics registry rendered in the Prometheus text exposition format.
+
+    Hot-path updates are a dict lookup and an add under a per-metric lock, so instrumentation can
+    stay on in production. Pool and cache counters are not mirrored on every update: components
+    that already keep a ``stats()`` dict are registered as collectors and read only at scrape time.
+    """
+
+    def __init__(self, namespace: str = ""):
+        self.namespace = namespace
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Tuple[str, Callable[[], Optional[Dict[str, Any]]]]] = []
+        self._lock = threading.Lock()
+
+        self.hop_seconds = self.histogram("hop_duration_seconds", "Time spent in each hop of a request", ["hop"])
+        self.hop_errors = self.counter("hop_errors_total", "Failed calls per hop", ["hop"])
+
+    def _get_or_create(self, cls: type, name: str, documentation: str, labelnames: Sequence[str], **kwargs: Any):
+        full_name = f"{self.namespace}_{name}" if self.namespace else name
+        with self._lock:
+            metric = self._metrics.get(full_name)
+            if metric is None:
+                metric = self._metrics[full_name] = cls(full_name, documentation, labelnames, **kwargs)
+            elif type(metric) is not cls:
+                raise ValueError(f"Metric {full_name} already registered as a {metric.kind}")
+        return metric
+
+    def counter(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, documentation, labelnames)
+
+    def gauge(self, name: str, documentation: str, labelnames: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, documentation, labelnames)
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = HOP_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, documentation, labelnames, buckets=buckets)
+
+    @contextmanager
+    def time_hop(self, hop: str):
+        """Record how long the block took under ``hop``, counting it as an error if it raised."""
+        started = time.perf_counter()
+        try:
+            yield
+        except BaseException:
+            self.hop_errors.inc(hop=hop)
+            raise
+        finally:
+            self.hop_seconds.observe(time.perf_counter() - started, hop=hop)
+
+    def add_collector(self, prefix: str, stats: Callable[[], Optional[Dict[str, Any]]]) -> None:
+        """Export the numeric fields of ``stats()`` as gauges named ``<prefix>_<field>`` at scrape time."""
+        self._collectors.append((prefix, stats))
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {metric.documentation}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(samples)
+        for prefix, stats in self._collectors:
+            try:
+                values = stats()
+            except Exception as e:
+                print(f"Error collecting {prefix} stats: {e}")
+                continue
+            full_prefix = f"{self.namespace}_{prefix}" if self.namespace else prefix
+            for name, value in flatten_stats(full_prefix, values or {}):
+                lines.append(f"# TYPE {name} gauge")
+                lines.append(f"{name} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+class AgentMetricsHooks(HookProvider):
+    """
+    Strands hook provider that records model time, tool time, token usage and in-flight turns for an agent.
+
+    Model calls are timed as hop ``model_hop`` (e.g. "orchestrator_model"). One instance can be shared
+    by every agent built from the same configuration.
+    """
+
+    def __init__(self, metrics: MetricsRegistry, agent_name: str, model_hop: str):
+        self.metrics = metrics
+        self.agent_name = agent_name
+        self.model_hop = model_hop
+        self.tokens = metrics.counter("agent_tokens_total", "Model tokens used by agent turns", ["agent", "type"])
+        self.invocations = metrics.counter("agent_invocations_total", "Agent turns started", ["agent"])
+        self.in_flight = metrics.gauge("agent_invocations_in_flight", "Agent turns currently running", ["agent"])
+        self.tool_seconds = metrics.histogram("tool_duration_seconds", "Time spent in each agent tool", ["agent", "tool", "status"])
+        # Before/after events of one model call or turn run in the same task, so a context variable keeps
+        # concurrent turns on a shared agent apart; tool calls may run concurrently and are keyed by toolUseId
+        self._model_started: contextvars.ContextVar[Optional[float]] = contextvars.ContextVar(f"model_started_{id(self)}", default=None)
+        self._usage_before: contextvars.ContextVar[Optional[Dict[str, int]]] = contextvars.ContextVar(f"usage_before_{id(self)}", default=None)
+        self._tool_started: Dict[str, float] = {}
+
+    def register_hooks(self, registry: HookRegistry, **kwargs: Any) -> None:
+        registry.add_callback(BeforeInvocationEvent, self._before_invocation)
+        registry.add_callback(AfterInvocationEvent, self._after_invocation)
+        registry.add_callback(BeforeModelInvocationEvent, self._before_model)
+        registry.add_callback(AfterModelInvocationEvent, self._after_model)
+        registry.add_callback(BeforeToolInvocationEvent, self._before_tool)
+        registry.add_callback(AfterToolInvocationEvent, self._after_tool)
+
+    def _before_invocation(self, event: BeforeInvocationEvent) -> None:
+        self.invocations.inc(agent=self.agent_name)
+        self.in_flight.inc(agent=self.agent_name)
+        self._usage_before.set(dict(event.agent.event_loop_metrics.accumulated_usage))
+
+    def _after_invocation(self, event: AfterInvocationEvent) -> None:
+        self.in_flight.dec(agent=self.agent_name)
+        before = self._usage_before.get() or {}
+        usage = event.agent.event_loop_metrics.accumulated_usage
+        for key, kind in (
+            ("inputTokens", "input"), ("outputTokens", "output"),
+            ("cacheReadInputTokens", "cache_read"), ("cacheWriteInputTokens", "cache_write"),
+        ):
+            delta = usage.get(key, 0) - before.get(key, 0)
+            if delta > 0:
+                self.tokens.inc(delta, agent=self.agent_name, type=kind)
+
+    def _before_model(self, event: BeforeModelInvocationEvent) -> None:
+        self._model_started.set(time.perf_counter())
+
+    def _after_model(self, event: AfterModelInvocationEvent) -> None:
+        started = self._model_started.get()
+        if started is not None:
+            self.metrics.hop_seconds.observe(time.perf_counter() - started, hop=self.model_hop)
+        if event.exception is not None:
+            self.metrics.hop_errors.inc(hop=self.model_hop)
+
+    def _before_tool(self, event: BeforeToolInvocationEvent) -> None:
+        self._tool_started[event.tool_use["toolUseId"]] = time.perf_counter()
+
+    def _after_tool(self, event: AfterToolInvocationEvent) -> None:
+        started = self._tool_started.pop(event.tool_use["toolUseId"], None)
+        if started is not None:
+            self.tool_seconds.observe(
+                time.perf_counter() - started,
+                agent=self.agent_name,
+                tool=event.tool_use["name"],
+                status=event.result.get("status", "unknown") if event.exception is None else "error",
+            )
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware recording request count, latency and in-flight requests per route.
+
+    Paths that are not routes of the app are reported as "other" so unknown URLs cannot blow up the label space.
+    Latency runs until the last body chunk is sent, so streaming responses are measured end to end.
+    """
+
+    def __init__(self, app: Any, metrics: MetricsRegistry):
+        self.app = app
+        self.requests = metrics.counter("http_requests_total", "HTTP requests handled", ["method", "path", "status"])
+        self.latency = metrics.histogram("http_request_duration_seconds", "HTTP request latency", ["method", "path"])
+        self.in_flight = metrics.gauge("http_requests_in_flight", "HTTP requests currently being handled")
+        self._paths: Optional[set] = None
+
+    def _path_label(self, scope: Dict[str, Any]) -> str:
+        if self._paths is None:
+            router = getattr(scope.get("app"), "router", None)
+            self._paths = {getattr(route, "path", None) for route in getattr(router, "routes", [])} - {None}
+        return scope["path"] if scope["path"] in self._paths else "other"
+
+    async def __call__(self, scope: Dict[str, Any], receive: Callable, send: Callable) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = "500"
+
+        async def send_wrapper(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        self.in_flight.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            self.in_flight.dec()
+            path = self._path_label(scope)
+            self.requests.inc(method=scope["method"], path=path, status=status)
+            self.latency.observe(time.perf_counter() - started, method=scope["method"], path=path)
@@ -0,0 +1,269 @@
+import contextvars
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Any, AsyncGenerator, Dict, Iterator, List, Optional, Tuple
+
+from strands.models.model import Model
+
+from metrics import MetricsRegistry
+
+# Bedrock usage fields of a model call, and the names they get in reports
+USAGE_FIELDS = {
+    "inputTokens": "input_tokens",
+    "outputTokens": "output_tokens",
+    "cacheReadInputTokens": "cache_read_tokens",
+    "cacheWriteInputTokens": "cache_write_tokens",
+}
+
+
+# Bedrock models with prompt caching; a cache point sent to any other model fails the request
+PROMPT_CACHE_MODEL_PREFIXES = (
+    "anthropic.claude-3-5-haiku",
+    "anthropic.claude-3-7-sonnet",
+    "anthropic.claude-sonnet-4",
+    "anthropic.claude-opus-4",
+    "amazon.nova",
+)
+# Leading part of cross-region inference profile ids, e.g. "us.anthropic.claude-sonnet-4-..."
+INFERENCE_PROFILE_PREFIXES = ("us", "eu", "apac", "global")
+
+# BedrockModel arguments that add prompt cache points
+PROMPT_CACHE_PARAMS = ("cache_prompt", "cache_tools")
+
+
+def supports_prompt_cache(model_id: str) -> bool:
+    scope, _, rest = model_id.partition(".")
+    if scope in INFERENCE_PROFILE_PREFIXES:
+        model_id = rest
+    return model_id.startswith(PROMPT_CACHE_MODEL_PREFIXES)
+
+
+def prompt_cache_params(enabled: bool, model_id: str) -> Dict[str, Any]:
+    """
+    ``BedrockModel`` arguments that put a cache point after the system prompt and after the tool
+    schemas, the parts of every request that never change between turns. Empty for models
+    without prompt caching.
+    """
+    if not enabled:
+        return {}
+    if not supports_prompt_cache(model_id):
+        print(f"Prompt caching is not supported by {model_id}, leaving it off for this model")
+        return {}
+    return {"cache_prompt": "default", "cache_tools": "default"}
+
+
+class ModelUsageReport:
+    """
+    Model calls of one request: tier, time and tokens of each, and what tiering and prompt caching saved.
+
+    ``estimated_seconds_saved`` compares each call with the recent average of uncached calls to the
+    strong model, so it is an estimate and can be negative for unusually long answers.
+    """
+
+    def __init__(self):
+        self.calls: List[Dict[str, Any]] = []
+        self._lock = threading.Lock()
+
+    def record(self, call: Dict[str, Any]) -> None:
+        with self._lock:
+            self.calls.append(call)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self._lock:
+            calls = list(self.calls)
+        report: Dict[str, Any] = {"calls": len(calls), "tiers": {}, "escalations": 0, "model_seconds": 0.0}
+        report.update({name: 0 for name in USAGE_FIELDS.values()})
+        saved: Optional[float] = None
+        for call in calls:
+            report["tiers"][call["tier"]] = report["tiers"].get(call["tier"], 0) + 1
+            report["escalations"] += call["reason"] == "fast_failed"
+            report["model_seconds"] += call["seconds"]
+            for name in USAGE_FIELDS.values():
+                report[name] += call[name]
+            if call["baseline_seconds"] is not None:
+                saved = (saved or 0.0) + call["baseline_seconds"] - call["seconds"]
+        report["model_seconds"] = round(report["model_seconds"], 3)
+        report["estimated_seconds_saved"] = round(saved, 3) if saved is not None else None
+        return report
+
+
+# Report of the request being served; model calls made for it, in any task or thread, add to it
+current_usage: contextvars.ContextVar[Optional[ModelUsageReport]] = contextvars.ContextVar("current_usage", default=None)
+
+
+@contextmanager
+def usage_scope() -> Iterator[ModelUsageReport]:
+    """Collect the model calls made inside the block into a new ``ModelUsageReport``."""
+    report = ModelUsageReport()
+    token = current_usage.set(report)
+    try:
+        yield report
+    finally:
+        current_usage.reset(token)
+
+
+def _text(content: List[Dict[str, Any]]) -> str:
+    parts = []
+    for block in content:
+        if "text" in block:
+            parts.append(block["text"])
+        elif "toolResult" in block:
+            parts.extend(str(item.get("text", item.get("json", ""))) for item in block["toolResult"].get("content", []))
+    return " ".join(parts)
+
+
+class ModelTieringPolicy:
+    """
+    Picks the tier of each model call from the conversation so far.
+
+    Calls go to the fast tier unless the conversation is longer than ``max_fast_messages``, the
+    latest message (the user's question or a tool result to summarize) is longer than
+    ``max_fast_input_chars``, or it mentions one of ``escalate_keywords``. Routing turns and short
+    answers, most of an orchestrator's calls, stay on the fast model.
+    """
+
+    def __init__(self, max_fast_input_chars: int = 1500, max_fast_messages: int = 12, escalate_keywords: Tuple[str, ...] = ()):
+        self.max_fast_input_chars = max_fast_input_chars
+        self.max_fast_messages = max_fast_messages
+        self.escalate_keywords = tuple(keyword.lower() for keyword in escalate_keywords)
+
+    @classmethod
+    def from_env(cls) -> "ModelTieringPolicy":
+        return cls(
+            max_fast_input_chars=int(os.getenv("TIERING_MAX_FAST_INPUT_CHARS", "1500")),
+            max_fast_messages=int(os.getenv("TIERING_MAX_FAST_MESSAGES", "12")),
+            escalate_keywords=tuple(k.strip() for k in os.getenv("TIERING_ESCALATE_KEYWORDS", "").split(",") if k.strip()),
+        )
+
+    def choose(self, messages: List[Dict[str, Any]]) -> Tuple[str, str]:
+        """Returns (tier, reason)."""
+        if len(messages) > self.max_fast_messages:
+            return "strong", "long_history"
+        latest = _text(messages[-1].get("content", [])) if messages else ""
+        if len(latest) > self.max_fast_input_chars:
+            return "strong", "long_input"
+        lowered = latest.lower()
+        if any(keyword in lowered for keyword in self.escalate_keywords):
+            return "strong", "keyword"
+        return "fast", "short_input"
+
+    def config(self) -> Dict[str, Any]:
+        return {
+            "max_fast_input_chars": self.max_fast_input_chars,
+            "max_fast_messages": self.max_fast_messages,
+            "escalate_keywords": list(self.escalate_keywords),
+        }
+
+
+class TieredModel(Model):
+    """
+    Model that sends each call to a ``fast`` or a ``strong`` model, as ``policy`` decides.
+
+    A fast call that fails before producing any output is retried once on the strong model. Without
+    ``fast`` every call goes to ``strong``. Either way each call's tier, time and token usage
+    (including Bedrock prompt cache reads and writes) are added to the request's
+    ``ModelUsageReport`` when one is open, and calls are counted in ``model_calls_total``.
+    """
+
+    # Weight of the newest call in the running average latency used as the savings baseline
+    BASELINE_WEIGHT = 0.1
+
+    def __init__(
+        self,
+        strong: Model,
+        fast: Optional[Model] = None,
+        policy: Optional[ModelTieringPolicy] = None,
+        name: str = "model",
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        self.strong = strong
+        self.fast = fast
+        self.policy = policy or ModelTieringPolicy()
+        self.name = name
+        self.baseline_seconds: Optional[float] = None
+        self.tier_calls = {"fast": 0, "strong": 0}
+        self.escalations = 0
+        self._lock = threading.Lock()
+        self._calls = metrics.counter(
+            "model_calls_total", "Model calls by tier and the reason it was picked", ["model", "tier", "reason"]
+        ) if metrics is not None else None
+
+    @property
+    def config(self) -> Dict[str, Any]:
+        # Strands reads the model id from here for its traces
+        return self.strong.config
+
+    def update_config(self, **model_config: Any) -> None:
+        self.strong.update_config(**model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        config = dict(self.strong.get_config())
+        if self.fast is not None:
+            config["tiering"] = {"fast_model_id": self.fast.get_config().get("model_id"), **self.policy.config()}
+        return config
+
+    def structured_output(self, *args: Any, **kwargs: Any):
+        return self.strong.structured_output(*args, **kwargs)
+
+    async def stream(
+        self,
+        messages: List[Dict[str, Any]],
+        tool_specs: Optional[List[Dict[str, Any]]] = None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any,
+    ) -> AsyncGenerator[Dict[str, Any], None]:
+        tier, reason = self.policy.choose(messages) if self.fast is not None else ("strong", "untiered")
+        attempts = [(tier, reason)] + ([("strong", "fast_failed")] if tier == "fast" else [])
+        for attempt, (tier, reason) in enumerate(attempts):
+            model = self.fast if tier == "fast" else self.strong
+            started = time.perf_counter()
+            usage: Dict[str, Any] = {}
+            produced = False
+            try:
+                async for event in model.stream(messages, tool_specs, system_prompt, **kwargs):
+                    if "metadata" in event:
+                        usage = event["metadata"].get("usage", {})
+                    produced = True
+                    yield event
+            except Exception as e:
+                # Once output went out it cannot be taken back, so only a silent failure escalates
+                if produced or attempt == len(attempts) - 1:
+                    raise
+                print(f"Fast model failed, escalating to the strong model: {e}")
+                with self._lock:
+                    self.escalations += 1
+                continue
+            self._record(tier, reason, time.perf_counter() - started, usage)
+            return
+
+    def _record(self, tier: str, reason: str, seconds: float, usage: Dict[str, Any]) -> None:
+        # Calls of every session run at once, on the loop and on worker threads
+        with self._lock:
+            self.tier_calls[tier] += 1
+            baseline = self.baseline_seconds
+            if tier == "strong" and not usage.get("cacheReadInputTokens"):
+                # Running average of full-price calls: the strong model with nothing read from the prompt cache
+                self.baseline_seconds = seconds if baseline is None else baseline + self.BASELINE_WEIGHT * (seconds - baseline)
+        report = current_usage.get()
+        if report is not None:
+            report.record({
+                "tier": tier,
+                "reason": reason,
+                "seconds": seconds,
+                # Only calls that tiering or caching made cheaper are compared with the baseline
+                "baseline_seconds": baseline if tier == "fast" or usage.get("cacheReadInputTokens") else None,
+                **{name: usage.get(field, 0) for field, name in USAGE_FIELDS.items()},
+            })
+        if self._calls is not None:
+            self._calls.inc(model=self.name, tier=tier, reason=reason)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {
+                "fast_calls": self.tier_calls["fast"],
+                "strong_calls": self.tier_calls["strong"],
+                "escalations": self.escalations,
+                "baseline_seconds": self.baseline_seconds,
+            }
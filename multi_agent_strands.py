@@ -1,16 +1,35 @@
+import asyncio
 import json
 import os
-from typing import Any
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
-import uvicorn
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
 from dotenv import load_dotenv
 from strands import Agent
-from strands.models.bedrock import BedrockModel
-from strands_tools.a2a_client import A2AClientToolProvider
+from strands.agent import AgentResult
+from strands.models.bedrock import DEFAULT_BEDROCK_MODEL_ID, BedrockModel
+from botocore.config import Config as BotocoreConfig
 from langfuse import observe, get_client
 
+from a2a_provider import OrchestratorA2AToolProvider, a2a_event_sink, extract_answer_text, is_good_answer
+from agent_registry import AgentCardRegistry
+from batch import RateLimiter, iter_lines, iter_records, run_batch, summarize_results
+from deadlines import CircuitBreakers, deadline_scope, time_left
+from history import CompactingConversationManager
+from metrics import CONTENT_TYPE, AgentMetricsHooks, MetricsMiddleware, MetricsRegistry
+from model_tiering import ModelTieringPolicy, ModelUsageReport, TieredModel, prompt_cache_params, usage_scope
+from response_cache import ResponseCache, config_hash, normalize_input
+from router import FastPathRouter
+from session_pool import AgentSessionPool
+from single_flight import AsyncSingleFlight
+from shared_store import create_store
+from startup import serve, timer as startup_timer
+from tracing import BatchTraceExporter, RequestTracer
+from worker_pool import AgentWorkerPool, PoolSaturatedError, QueueTimeoutError
+
 load_dotenv() # init from env vars
 
 # Initialize FastAPI app
@@ -23,63 +42,488 @@ app = FastAPI(
 # Initialize Langfuse client
 langfuse = get_client()
 
+# Per-hop timings, token counts and pool/cache counters, exported on GET /metrics
+metrics = MetricsRegistry()
+app.add_middleware(MetricsMiddleware, metrics=metrics)
+
+# "inline" opens a Langfuse span around every request, "background" samples requests and exports them
+# in batches off the request path, "off" disables request tracing
+TRACING_MODE = os.getenv("TRACING_MODE", "inline")
+tracer = RequestTracer(
+    langfuse,
+    mode=TRACING_MODE,
+    sample_rate=float(os.getenv("TRACE_SAMPLE_RATE", "1.0")),
+    always_sample_errors=os.getenv("TRACE_SAMPLE_ERRORS", "true").lower() == "true",
+    exporter=BatchTraceExporter(
+        langfuse,
+        max_queue=int(os.getenv("TRACE_EXPORT_QUEUE", "1000")),
+        batch_size=int(os.getenv("TRACE_EXPORT_BATCH_SIZE", "50")),
+        flush_interval=float(os.getenv("TRACE_EXPORT_INTERVAL", "1.0")),
+        output_mode=os.getenv("TRACE_OUTPUT_MODE", "truncate"),
+        max_payload_chars=int(os.getenv("TRACE_MAX_PAYLOAD_CHARS", "2000")),
+    ) if TRACING_MODE == "background" else None,
+    metrics=metrics,
+)
+
 
 # Leave CALENDAR_AGENT_URL empty if you want to use the default localhost:8080
 # You need to run nango-caller-agent.py first to have the agent running
 google_calendar_agent_url = os.getenv("CALENDAR_AGENT_URL", "http://localhost:8080")
-provider = A2AClientToolProvider(known_agent_urls=[google_calendar_agent_url])
+# Additional remote agents can be registered as a comma separated list of URLs
+known_agent_urls = [google_calendar_agent_url] + [
+    url.strip() for url in os.getenv("A2A_AGENT_URLS", "").split(",") if url.strip()
+]
+# Agent cards are prefetched at startup and refreshed in the background, off the request path
+card_registry = AgentCardRegistry(
+    known_agent_urls=known_agent_urls,
+    ttl_seconds=float(os.getenv("AGENT_CARD_TTL_SECONDS", "600")),
+    refresh_interval=float(os.getenv("AGENT_CARD_REFRESH_INTERVAL", "60")),
+)
+# Seconds a request may take end to end, unless it asks for less with InvocationRequest.timeout_seconds.
+# Every hop below (worker queue, model, A2A sends and, through the message metadata, the remote agent's
+# own model and MCP calls) only gets the time that is left; 0 disables the deadline
+REQUEST_TIMEOUT_SECONDS = float(os.getenv("REQUEST_TIMEOUT_SECONDS", "120"))
+# Consecutive failed sends after which an agent is skipped, and seconds before a probe send is let through
+a2a_breakers = CircuitBreakers(
+    failure_threshold=int(os.getenv("A2A_CIRCUIT_FAILURES", "5")),
+    reset_timeout=float(os.getenv("A2A_CIRCUIT_RESET_SECONDS", "30")),
+    metrics=metrics,
+)
+provider = OrchestratorA2AToolProvider(
+    known_agent_urls=known_agent_urls,
+    registry=card_registry,
+    fan_out_timeout=float(os.getenv("A2A_FAN_OUT_TIMEOUT", "120")),
+    # Budget of a single A2A send, capped by the time left before the request's deadline
+    send_timeout=float(os.getenv("A2A_SEND_TIMEOUT", "90")),
+    breakers=a2a_breakers,
+    metrics=metrics,
+)
 
-model = BedrockModel(temperature=0)
+# Fast path: "off" (default) always uses the orchestrator LLM, "explicit" honours InvocationRequest.target_agent,
+# "rules" adds FAST_PATH_RULES keyword routing and "auto" adds nearest agent-card classification
+FAST_PATH_MODE = os.getenv("FAST_PATH_MODE", "off")
+fast_path_router = FastPathRouter(
+    registry=card_registry,
+    # JSON object mapping an agent URL or name to trigger keywords, e.g. {"google-calendar-agent": ["calendar", "meeting"]}
+    keyword_rules=json.loads(os.getenv("FAST_PATH_RULES", "{}")) if FAST_PATH_MODE in ("rules", "auto") else {},
+    use_classifier=FAST_PATH_MODE == "auto",
+    min_similarity=float(os.getenv("FAST_PATH_MIN_SIMILARITY", "0.25")),
+)
 
-agent = Agent(
-    system_prompt='''
+# Seconds Bedrock may go quiet mid-response before the model call fails (botocore's default is 60)
+MODEL_READ_TIMEOUT = float(os.getenv("MODEL_READ_TIMEOUT", "60"))
+# "true" marks the system prompt and tool schemas as a Bedrock prompt cache prefix, so later turns skip
+# re-reading them; only models that support prompt caching get the cache points, and the prefix must
+# reach the model's minimum length to be cached
+PROMPT_CACHE = os.getenv("PROMPT_CACHE", "false").lower() == "true"
+# "true" sends routing turns and short answers to FAST_MODEL_ID and only long or hard turns (see TIERING_*)
+# to the default model; a fast call that fails before answering is retried on the default model
+MODEL_TIERING = os.getenv("MODEL_TIERING", "false").lower() == "true"
+FAST_MODEL_ID = os.getenv("FAST_MODEL_ID", "us.anthropic.claude-3-5-haiku-20241022-v1:0")
+model_params = {
+    "temperature": 0,
+    "boto_client_config": BotocoreConfig(read_timeout=MODEL_READ_TIMEOUT),
+}
+model = TieredModel(
+    strong=BedrockModel(**model_params, **prompt_cache_params(PROMPT_CACHE, DEFAULT_BEDROCK_MODEL_ID)),
+    fast=BedrockModel(
+        model_id=FAST_MODEL_ID, **model_params, **prompt_cache_params(PROMPT_CACHE, FAST_MODEL_ID)
+    ) if MODEL_TIERING else None,
+    policy=ModelTieringPolicy.from_env(),
+    name="qna-agent",
+    metrics=metrics,
+)
+metrics.add_collector("model_tiering", model.stats)
+
+QNA_SYSTEM_PROMPT = '''
     You are a Q&A bot. 
     Answer questions based on the provided context and available tools. 
     You can rely on A2A Client tool provider that manages multiple A2A agents and exposes synchronous tools to find an agent that can retrieve information 
     necessary to answer the question.
 
     You just need to call the tool forwarding the user input to the agents available to you.
-    ''',
-    tools=provider.tools,
-    record_direct_tool_call=False,
-    model=model
+    When the question needs more than one agent, call a2a_send_message_parallel once with all of their URLs
+    instead of messaging the agents one after another.
+    '''
+
+# Model client, tools and system prompt are immutable, so every session agent shares them
+qna_tools = provider.tools
+qna_hooks = AgentMetricsHooks(metrics, agent_name="qna-agent", model_hop="orchestrator_model")
+
+def create_session_agent(session_id: str) -> Agent:
+    """
+    Build a fresh Q&A agent for one session, reusing the shared model client and tools.
+    Each agent gets its own history manager (HISTORY_MODE and friends), which holds per-session state.
+    """
+    history = CompactingConversationManager.from_env(metrics, agent_name="qna-agent")
+    return Agent(
+        system_prompt=QNA_SYSTEM_PROMPT,
+        tools=qna_tools,
+        record_direct_tool_call=False,
+        model=model,
+        conversation_manager=history,
+        hooks=[qna_hooks, history],
+    )
+
+# "none" keeps each session in the worker that created it, "sqlite" saves histories so any worker on the node can continue them
+session_store = create_store(
+    os.getenv("SESSION_STORE_BACKEND", "none"),
+    path=os.getenv("SESSION_STORE_PATH", os.path.join(".cache", "sessions.sqlite3")),
+    table="sessions",
+    max_size=int(os.getenv("SESSION_POOL_MAX_SESSIONS", "1000")),
+    ttl_seconds=float(os.getenv("SESSION_POOL_TTL_SECONDS", "1800")),
+)
+session_pool = AgentSessionPool(
+    agent_factory=create_session_agent,
+    max_sessions=int(os.getenv("SESSION_POOL_MAX_SESSIONS", "1000")),
+    ttl_seconds=float(os.getenv("SESSION_POOL_TTL_SECONDS", "1800")),
+    max_history_bytes=int(os.getenv("SESSION_POOL_MAX_HISTORY_BYTES", str(64 * 1024 * 1024))),
+    store=session_store,
 )
 
+# Optional exact-match response cache for stateless requests; "memory" is per process, "sqlite" is shared by all workers
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "60"))
+response_store = create_store(
+    os.getenv("RESPONSE_CACHE_BACKEND", "none"),
+    path=os.getenv("RESPONSE_CACHE_PATH", os.path.join(".cache", "responses.sqlite3")),
+    table="responses",
+    max_size=int(os.getenv("RESPONSE_CACHE_MAX_SIZE", "1024")),
+    ttl_seconds=RESPONSE_CACHE_TTL,
+)
+response_cache = ResponseCache(
+    response_store,
+    agent_config_hash=config_hash(QNA_SYSTEM_PROMPT, model.get_config(), known_agent_urls),
+    ttl_seconds=RESPONSE_CACHE_TTL,
+) if response_store is not None else None
+
+# "async" awaits agent.invoke_async on the event loop, "thread" runs the blocking agent call on the worker threads
+AGENT_EXECUTION_MODE = os.getenv("AGENT_EXECUTION_MODE", "async")
+worker_pool = AgentWorkerPool(
+    max_concurrency=int(os.getenv("AGENT_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("AGENT_MAX_QUEUE", "32")),
+    queue_timeout=float(os.getenv("AGENT_QUEUE_TIMEOUT", "30")),
+)
+
+metrics.add_collector("worker_pool", worker_pool.stats)
+metrics.add_collector("session_pool", session_pool.stats)
+metrics.add_collector("agent_cards", card_registry.stats)
+metrics.add_collector("tracing", tracer.stats)
+if response_cache is not None:
+    metrics.add_collector("response_cache", response_cache.stats)
+
+# Identical stateless requests in flight at the same time share one orchestrator run ("true" by default)
+INVOCATION_SINGLE_FLIGHT = os.getenv("INVOCATION_SINGLE_FLIGHT", "true").lower() == "true"
+invocation_flight = AsyncSingleFlight("invocation", metrics=metrics)
+metrics.add_collector("invocation_flight", invocation_flight.stats)
+
+# Maximum records of one /invocations/batch request in flight at once
+BATCH_MAX_CONCURRENCY = int(os.getenv("BATCH_MAX_CONCURRENCY", "8"))
+# Records started per second across all batches of this process, whether they go to the orchestrator or straight to an A2A agent; 0 for no limit
+batch_limiter = RateLimiter(float(os.getenv("BATCH_RATE_LIMIT", "0")))
+# Times a batch record rejected by a saturated worker pool (429/503) is retried, with exponential backoff
+BATCH_MAX_RETRIES = int(os.getenv("BATCH_MAX_RETRIES", "3"))
+metrics.add_collector("batch_limiter", batch_limiter.stats)
+
 class InvocationRequest(BaseModel):
     input: str
+    # Requests sharing a session_id continue the same conversation; without one each request starts fresh
+    session_id: Optional[str] = None
+    # Set to false to always run the agents, even when a cached answer exists
+    use_cache: bool = True
+    # Optional agent URL or name to send the request to directly, skipping the orchestrator LLM
+    target_agent: Optional[str] = None
+    # Seconds the caller will wait for the answer; can only shorten REQUEST_TIMEOUT_SECONDS
+    timeout_seconds: Optional[float] = None
 
 class InvocationResponse(BaseModel):
     response: Any
     status: str = "success"
+    session_id: Optional[str] = None
+    cached: bool = False
+    # "orchestrator" when the Q&A agent answered, "fast_path:<reason>" when the request went straight to an A2A agent
+    route: str = "orchestrator"
+    # True when an identical request already in flight produced this answer
+    coalesced: bool = False
+    # Estimated history tokens before and after this turn's compaction, and the tokens saved on the next turn
+    history: Optional[Dict[str, Any]] = None
+    # Orchestrator model calls per tier, their time and tokens (prompt cache reads/writes included) and estimated savings
+    model_usage: Optional[Dict[str, Any]] = None
+
+def serialize_agent_response(resp: Any) -> Any:
+    """
+    Reduce an AgentResult to its JSON-safe parts; its metrics hold trace objects that cannot be serialized.
+    """
+    if isinstance(resp, AgentResult):
+        return {"stop_reason": resp.stop_reason, "message": resp.message}
+    return resp
+
+def is_cacheable(request: InvocationRequest) -> bool:
+    # Turns inside a session depend on the conversation history, so only stateless requests are cached
+    return response_cache is not None and request.use_cache and request.session_id is None
 
-@observe(name="qna_agent_interaction")
-def invoke_agent(user_input: str) -> Any:
+def flight_key(request: InvocationRequest) -> Optional[Tuple[str, Optional[str], Optional[float]]]:
     """
-    Invoke the Q&A agent with the user input.
+    Single-flight key of a request, or None when it must run on its own (session turns, use_cache=false).
+    The shared run is bounded by the first caller's deadline, so only requests with the same timeout share one.
+    """
+    if not INVOCATION_SINGLE_FLIGHT or request.session_id is not None or not request.use_cache:
+        return None
+    return normalize_input(request.input), request.target_agent, request.timeout_seconds
+
+async def invoke_agent(user_input: str, session_id: Optional[str] = None, history: Optional[Dict[str, Any]] = None) -> Any:
+    """
+    Invoke the session's Q&A agent with the user input through the bounded worker pool.
+    The turn's history compaction report is copied into ``history`` when given.
     """
     print(f"User Input: {user_input}")
     try:
-        return agent(user_input)
+        agent, lock = await session_pool.acquire(session_id)
+
+        async def finish_turn() -> None:
+            try:
+                if history is not None:
+                    history.update(agent.conversation_manager.last_report)
+            finally:
+                await session_pool.release(session_id, lock)
+
+        def finish_in_background(turn: asyncio.Future) -> None:
+            if not turn.cancelled() and turn.exception() is not None:
+                print(f"Timed-out turn of session {session_id} failed: {turn.exception()}")
+            asyncio.ensure_future(finish_turn())
+
+        snapshot = list(agent.messages)
+        turn = None
+        try:
+            budget = time_left()
+            if AGENT_EXECUTION_MODE == "thread":
+                # A thread cannot be stopped: on timeout the turn finishes in the background, its hops bounded
+                # by the deadline, and keeps the session locked until then so the next turn cannot interleave
+                turn = asyncio.ensure_future(worker_pool.run(agent, user_input))
+                return await asyncio.wait_for(asyncio.shield(turn), budget)
+            return await asyncio.wait_for(worker_pool.run(agent.invoke_async, user_input), budget)
+        except (asyncio.TimeoutError, asyncio.CancelledError):
+            # A turn stopped between a tool call and its result would leave a history the model rejects
+            if turn is None:
+                agent.messages = snapshot
+            raise
+        finally:
+            if turn is not None and not turn.done():
+                turn.add_done_callback(finish_in_background)
+            else:
+                await finish_turn()
+    except (PoolSaturatedError, QueueTimeoutError, TimeoutError):
+        raise
     except Exception as e:
         print(f"Error invoking Q&A agent: {e}")
         return {"error": str(e)}
 
+if TRACING_MODE == "inline":
+    invoke_agent = observe(name="qna_agent_interaction")(invoke_agent)
+
+async def invoke_fast_path(request: InvocationRequest) -> Optional[Dict[str, Any]]:
+    """
+    Send the request straight to the A2A agent picked by the fast-path router, skipping both
+    orchestrator LLM turns. Returns None when the router is unsure or the agent did not answer,
+    so the caller falls back to the orchestrator.
+    """
+    if FAST_PATH_MODE == "off" and not request.target_agent:
+        return None
+    # Session turns need the orchestrator's history, so only explicit targets bypass it there
+    if request.session_id is not None and not request.target_agent:
+        return None
+
+    decision = fast_path_router.route(request.input, request.target_agent)
+    if decision is None:
+        return None
+
+    print(f"Fast path to {decision.agent_url} ({decision.reason})")
+    result = await worker_pool.run(provider.send, request.input, decision.agent_url)
+    if not is_good_answer(result):
+        print(f"Fast path failed, falling back to the orchestrator: {result.get('error')}")
+        return None
+    return {
+        "response": {"agent_url": decision.agent_url, "text": extract_answer_text(result)},
+        "route": f"fast_path:{decision.reason}",
+    }
+
+def agent_stream_events(event: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """
+    Translate a Strands stream_async event into the events sent to streaming clients.
+    """
+    if "data" in event:
+        return [{"type": "token", "text": event["data"]}] if event["data"] else []
+    if "message" in event:
+        out = []
+        for block in event["message"].get("content", []):
+            if "toolUse" in block:
+                out.append({"type": "tool_start", "tool_use_id": block["toolUse"]["toolUseId"], "name": block["toolUse"]["name"]})
+            elif "toolResult" in block:
+                out.append({"type": "tool_end", "tool_use_id": block["toolResult"]["toolUseId"], "status": block["toolResult"].get("status")})
+        return out
+    if "result" in event:
+        return [{"type": "result", "response": serialize_agent_response(event["result"]), "cached": False}]
+    return []
+
+async def stream_agent(user_input: str, session_id: Optional[str], queue: "asyncio.Queue[Optional[Dict[str, Any]]]", cache_result: bool = False) -> None:
+    """
+    Run the session's Q&A agent in streaming mode, pushing client events onto the queue.
+    A2A task updates from remote agents are pushed onto the same queue through a2a_event_sink.
+    """
+    async def drive():
+        async for event in agent.stream_async(user_input):
+            for out in agent_stream_events(event):
+                queue.put_nowait(out)
+            if cache_result and "result" in event:
+                await asyncio.to_thread(response_cache.set, user_input, serialize_agent_response(event["result"]))
+
+    token = a2a_event_sink.set(queue.put_nowait)
+    try:
+        with tracer.span("agent-invocation-stream", input=user_input, session_id=session_id) as trace:
+            try:
+                agent, lock = await session_pool.acquire(session_id)
+                snapshot = list(agent.messages)
+                try:
+                    with usage_scope() as usage:
+                        await asyncio.wait_for(worker_pool.run(drive), time_left())
+                    queue.put_nowait({"type": "history", **agent.conversation_manager.last_report})
+                    queue.put_nowait({"type": "model_usage", **usage.as_dict()})
+                except (asyncio.TimeoutError, asyncio.CancelledError):
+                    agent.messages = snapshot
+                    raise
+                finally:
+                    await session_pool.release(session_id, lock)
+                trace.update_trace(tags=["multi-agent-invocation", "stream"])
+            except PoolSaturatedError as e:
+                queue.put_nowait({"type": "rejected", "status_code": 429, "detail": str(e)})
+            except QueueTimeoutError as e:
+                queue.put_nowait({"type": "rejected", "status_code": 503, "detail": str(e)})
+            except TimeoutError as e:
+                trace.update_trace(tags=["multi-agent-invocation", "stream", "deadline-exceeded"])
+                queue.put_nowait({"type": "error", "status_code": 504, "detail": str(e) or "No answer before the request deadline"})
+            except Exception as e:
+                print(f"Error streaming Q&A agent: {e}")
+                trace.update(level="ERROR")
+                trace.update_trace(output=str(e), tags=["multi-agent-invocation", "stream", "error"])
+                queue.put_nowait({"type": "error", "detail": str(e)})
+    finally:
+        a2a_event_sink.reset(token)
+        queue.put_nowait(None)
+
+def format_stream_event(event: Dict[str, Any], fmt: str) -> str:
+    payload = json.dumps(event, default=str)
+    if fmt == "ndjson":
+        return payload + "\n"
+    return f"event: {event['type']}\ndata: {payload}\n\n"
+
 @app.get("/")
 async def root():
     """Health check endpoint"""
     return {"message": "Multi Agent Q&A API is running"}
 
+@app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+@app.get("/ready")
+async def ready():
+    """Readiness: startup warmup has finished. Reports how long each startup phase took"""
+    report = startup_timer.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@app.get("/stats")
+async def stats():
+    """Worker pool queue depth and wait times, used to size replicas"""
+    return {
+        "worker_pool": worker_pool.stats(),
+        "session_pool": session_pool.stats(),
+        "agent_cards": card_registry.stats(),
+        "response_cache": response_cache.stats() if response_cache is not None else None,
+        "invocation_flight": invocation_flight.stats(),
+        "batch_limiter": batch_limiter.stats(),
+        "circuit_breakers": a2a_breakers.stats(),
+        "model_tiering": model.stats(),
+        "tracing": tracer.stats(),
+        "startup": startup_timer.report(),
+    }
+
+@app.get("/metrics")
+async def prometheus_metrics():
+    """Per-hop latency histograms, token counts, in-flight gauges and pool/cache counters in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+@app.on_event("startup")
+async def startup():
+    # Per-worker warmup: agent cards and pooled A2A clients, and the tool registry of a session agent
+    with startup_timer.phase("warmup"):
+        await card_registry.start()
+        create_session_agent("")
+    startup_timer.mark_ready()
+
+@app.on_event("shutdown")
+async def shutdown():
+    await card_registry.stop()
+    worker_pool.shutdown()
+    await asyncio.to_thread(tracer.close)
+
+async def answer(request: InvocationRequest, cacheable: bool) -> InvocationResponse:
+    """Answer a request that missed the response cache, through the fast path or the orchestrator."""
+    fast = await invoke_fast_path(request)
+    if fast is not None:
+        if cacheable:
+            await asyncio.to_thread(response_cache.set, request.input, fast["response"], request.target_agent, fast["route"])
+        return InvocationResponse(response=fast["response"], session_id=request.session_id, route=fast["route"])
+
+    history: Dict[str, Any] = {}
+    with usage_scope() as usage:
+        resp = serialize_agent_response(await invoke_agent(request.input, request.session_id, history))
+    if cacheable and resp and not (isinstance(resp, dict) and "error" in resp):
+        await asyncio.to_thread(response_cache.set, request.input, resp, request.target_agent)
+    return InvocationResponse(
+        response=resp, session_id=request.session_id, history=history or None, model_usage=usage.as_dict(),
+    )
+
 @app.post("/invocation", response_model=InvocationResponse)
 async def invocation(request: InvocationRequest):
     try:
-        with langfuse.start_as_current_span(name="agent-invocation") as trace:
+        with deadline_scope(REQUEST_TIMEOUT_SECONDS), deadline_scope(request.timeout_seconds), \
+                tracer.span("agent-invocation", input=request.input, session_id=request.session_id) as trace:
             try:
-                resp = invoke_agent(request.input)
-                trace.update_trace(
-                    output=resp if resp else "No response",
-                    tags=["multi-agent-invocation"]
-                )
-                return InvocationResponse(response=resp)
+                cacheable = is_cacheable(request)
+                if cacheable:
+                    # The sqlite backend reads from disk, which would stall every request on the loop
+                    cached = await asyncio.to_thread(response_cache.get, request.input, request.target_agent)
+                    if cached is not None:
+                        trace.update_trace(output=cached["response"], tags=["multi-agent-invocation", "cache-hit"])
+                        return InvocationResponse(
+                            response=cached["response"], session_id=request.session_id, route=cached["route"], cached=True,
+                        )
+
+                key = flight_key(request)
+                if key is None:
+                    response = await answer(request, cacheable)
+                else:
+                    response, shared = await invocation_flight.do(key, answer, request, cacheable)
+                    if shared:
+                        # The model calls were made, and are reported, for the first caller
+                        response = response.model_copy(update={"coalesced": True, "model_usage": ModelUsageReport().as_dict()})
+                tags = ["multi-agent-invocation"]
+                if response.route.startswith("fast_path"):
+                    tags.append("fast-path")
+                if response.coalesced:
+                    tags.append("coalesced")
+                trace.update_trace(output=response.response if response.response else "No response", tags=tags)
+                return response
+            except PoolSaturatedError as e:
+                trace.update_trace(output=str(e), tags=["multi-agent-invocation", "rejected"])
+                raise HTTPException(status_code=429, detail=str(e), headers={"Retry-After": "1"})
+            except QueueTimeoutError as e:
+                trace.update_trace(output=str(e), tags=["multi-agent-invocation", "rejected"])
+                raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+            except TimeoutError as e:
+                detail = str(e) or "No answer before the request deadline"
+                trace.update_trace(output=detail, tags=["multi-agent-invocation", "deadline-exceeded"])
+                raise HTTPException(status_code=504, detail=detail)
             except Exception as e:
                 print(f"Error invoking Q&A agent: {e}")
                 trace.update(level="ERROR")
@@ -88,8 +532,112 @@ async def invocation(request: InvocationRequest):
                     tags=["multi-agent-invocation", "error"]
                 )
                 raise HTTPException(status_code=500, detail=str(e))
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Internal server error: {str(e)}")
 
+async def run_batch_record(record: Dict[str, Any]) -> Dict[str, Any]:
+    """Answer one batch record like POST /invocation, retrying while the worker pool is saturated."""
+    try:
+        request = InvocationRequest(**record)
+    except ValidationError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    for attempt in range(BATCH_MAX_RETRIES + 1):
+        try:
+            return (await invocation(request)).model_dump()
+        except HTTPException as e:
+            if e.status_code not in (429, 503) or attempt == BATCH_MAX_RETRIES:
+                raise
+            await asyncio.sleep(0.5 * 2 ** attempt)
+
+@app.post("/invocations/batch")
+async def invocations_batch(request: Request, concurrency: int = BATCH_MAX_CONCURRENCY, offset: int = 0):
+    """
+    Run a JSONL body of InvocationRequest records, up to ``concurrency`` at once (capped at
+    BATCH_MAX_CONCURRENCY) and under the process-wide BATCH_RATE_LIMIT. Results are streamed back
+    as NDJSON as each record completes, tagged with the record's ``index``, and followed by a
+    summary line whose ``next_offset`` resumes an interrupted batch (``?offset=``).
+    """
+    concurrency = max(1, min(concurrency, BATCH_MAX_CONCURRENCY))
+    # Read up front: the response streams while the records run, and both would otherwise read from the same connection
+    body = await request.body()
+
+    async def chunks():
+        yield body
+
+    async def results():
+        started = time.perf_counter()
+        outcomes: List[Dict[str, Any]] = []
+        records = iter_records(iter_lines(chunks()), offset)
+        async for result in run_batch(records, run_batch_record, concurrency, batch_limiter):
+            outcomes.append({key: result.get(key) for key in ("index", "status", "status_code")})
+            yield json.dumps(result, default=str) + "\n"
+        yield json.dumps(summarize_results(outcomes, started, offset)) + "\n"
+
+    return StreamingResponse(results(), media_type="application/x-ndjson")
+
+@app.post("/invocation/stream")
+async def invocation_stream(request: InvocationRequest, format: str = "sse"):
+    """
+    Streaming variant of /invocation. Emits the orchestrator's tokens, tool start/end events and the
+    remote agents' A2A task updates as they arrive, as server-sent events or NDJSON (?format=ndjson).
+    """
+    if format not in ("sse", "ndjson"):
+        raise HTTPException(status_code=400, detail="format must be 'sse' or 'ndjson'")
+
+    media_type = "application/x-ndjson" if format == "ndjson" else "text/event-stream"
+    print(f"User Input (stream): {request.input}")
+
+    # Streams always run the orchestrator, so answers meant for a target agent are neither served nor stored
+    cacheable = is_cacheable(request) and request.target_agent is None
+    if cacheable:
+        cached = await asyncio.to_thread(response_cache.get, request.input)
+        if cached is not None:
+            events = [
+                {"type": "result", "response": cached["response"], "cached": True},
+                {"type": "done", "session_id": request.session_id},
+            ]
+            return StreamingResponse(
+                iter([format_stream_event(event, format) for event in events]),
+                media_type=media_type,
+                headers={"Cache-Control": "no-cache"},
+            )
+
+    queue: "asyncio.Queue[Optional[Dict[str, Any]]]" = asyncio.Queue()
+    # The producer task copies the deadline when it is created
+    with deadline_scope(REQUEST_TIMEOUT_SECONDS), deadline_scope(request.timeout_seconds):
+        producer = asyncio.create_task(stream_agent(request.input, request.session_id, queue, cache_result=cacheable))
+
+    # Wait for the first event so admission rejections still map to a proper status code
+    first = await queue.get()
+    if first is not None and first["type"] == "rejected":
+        raise HTTPException(status_code=first["status_code"], detail=first["detail"])
+
+    async def events():
+        try:
+            event = first
+            while event is not None:
+                yield format_stream_event(event, format)
+                event = await queue.get()
+            yield format_stream_event({"type": "done", "session_id": request.session_id}, format)
+        finally:
+            # Stop the agent if the client went away mid-stream
+            if not producer.done():
+                producer.cancel()
+
+    return StreamingResponse(events(), media_type=media_type, headers={"Cache-Control": "no-cache"})
+
+def create_app() -> FastAPI:
+    """
+    App factory for process managers, e.g. ``uvicorn multi_agent_strands:create_app --factory --workers 4``
+    or ``gunicorn -w 4 -k uvicorn.workers.UvicornWorker 'multi_agent_strands:create_app()'``.
+    Every worker imports this module, so each one gets its own pools and runs its own startup warmup.
+    """
+    return app
+
+def main():
+    serve("multi_agent_strands:create_app", 8081, app=create_app())
+
 if __name__ == "__main__":
-    uvicorn.run(app, host="0.0.0.0", port=8081)
\ No newline at end of file
+    main()
\ No newline at end of file
@@ -0,0 +1,398 @@
+import asyncio
+import atexit
+import json
+import os
+import uuid
+from datetime import timedelta
+from typing import Any, Dict, Optional
+
+from fastapi.responses import JSONResponse, PlainTextResponse
+
+from dotenv import load_dotenv
+from strands import Agent, tool
+from strands.tools.mcp import MCPClient
+from strands.multiagent.a2a import A2AServer
+from a2a.server.request_handlers import DefaultRequestHandler
+from a2a.server.tasks import InMemoryTaskStore
+from mcp.client.streamable_http import streamablehttp_client
+from strands.models.bedrock import BedrockModel
+from botocore.config import Config as BotocoreConfig
+
+from a2a_executor import PooledA2AExecutor
+from deadlines import Hedger, time_left
+from event_index import CalendarEventIndex
+from history import CompactingConversationManager
+from mcp_pool import MCPClientPool
+from metrics import CONTENT_TYPE, AgentMetricsHooks, MetricsMiddleware, MetricsRegistry
+from session_pool import AgentSessionPool
+from shared_store import create_store
+from single_flight import SingleFlight
+from startup import serve, timer as startup_timer
+from strands_patches import patch_strands_a2a_executor
+from tool_cache import ToolCallCache
+from worker_pool import AgentWorkerPool
+
+patch_strands_a2a_executor()
+
+print("Loading environment variables...")
+load_dotenv()
+
+print("Setting up MCP client...")
+SECRET_KEY = os.getenv('NANGO_SECRET_KEY')
+if not SECRET_KEY:
+    print("Error: NANGO_SECRET_KEY environment variable is not set.")
+    raise ValueError("NANGO_SECRET_KEY environment variable is not set.")
+
+# Point NANGO_MCP_URL at a local stand-in MCP server for testing
+NANGO_MCP_URL = os.getenv("NANGO_MCP_URL", "https://api.nango.dev/mcp")
+
+def create_nango_mcp_client(connection_id: str) -> MCPClient:
+    return MCPClient(lambda: streamablehttp_client(
+        url=NANGO_MCP_URL,
+        headers={
+            "Authorization": f"Bearer {str(SECRET_KEY)}",
+            "connection-id": connection_id,
+            "provider-config-key": "google-calendar"
+        }
+    ))
+
+# Per-hop timings, token counts and pool/cache counters, exported on GET /metrics
+metrics = MetricsRegistry()
+
+# Warm MCP sessions are reused per connection_id instead of reconnecting on every tool call
+mcp_pool = MCPClientPool(
+    client_factory=create_nango_mcp_client,
+    max_size=int(os.getenv("MCP_POOL_MAX_SIZE", "32")),
+    idle_timeout=float(os.getenv("MCP_POOL_IDLE_TIMEOUT", "300")),
+    health_check_interval=float(os.getenv("MCP_POOL_HEALTH_CHECK_INTERVAL", "60")),
+    metrics=metrics,
+)
+atexit.register(mcp_pool.close)
+
+# "memory" keeps the MCP caches per worker process, "sqlite" shares them between all workers on the node
+MCP_CACHE_BACKEND = os.getenv("MCP_CACHE_BACKEND", "memory")
+MCP_CACHE_PATH = os.getenv("MCP_CACHE_PATH", os.path.join(".cache", "mcp.sqlite3"))
+tool_cache = ToolCallCache(
+    listing_store=create_store(
+        MCP_CACHE_BACKEND, path=MCP_CACHE_PATH, table="mcp_tools",
+        max_size=int(os.getenv("MCP_TOOLS_CACHE_MAX_SIZE", "256")),
+    ),
+    result_store=create_store(
+        MCP_CACHE_BACKEND, path=MCP_CACHE_PATH, table="mcp_results",
+        max_size=int(os.getenv("MCP_RESULT_CACHE_MAX_SIZE", "1024")),
+    ),
+    # The Google Calendar tool schema almost never changes, so listings are kept for a long time
+    listing_ttl_seconds=float(os.getenv("MCP_TOOLS_CACHE_TTL", "3600")),
+    # Read-only results are only reused for a few seconds, long enough to absorb orchestrator retries
+    result_ttl_seconds=float(os.getenv("MCP_RESULT_CACHE_TTL", "30")),
+)
+# Tools whose name starts with one of these prefixes are treated as idempotent and cacheable
+CACHEABLE_TOOL_PREFIXES = tuple(
+    p.strip() for p in os.getenv("MCP_CACHEABLE_TOOL_PREFIXES", "list,get,search,find,query,read").split(",") if p.strip()
+)
+
+# Identical MCP reads in flight at the same time (dashboard refreshes, orchestrator retries) share one Nango round trip
+mcp_flight = SingleFlight("mcp_call", metrics=metrics)
+
+# Budget of one MCP tool call, capped by the time left before the A2A task's deadline
+MCP_CALL_TIMEOUT = float(os.getenv("MCP_CALL_TIMEOUT", "15"))
+# "true" sends a duplicate of a read still running past its tool's recent MCP_HEDGE_PERCENTILE latency
+# (at least MCP_HEDGE_MIN_DELAY_MS) and keeps whichever answers first; writes are never duplicated
+MCP_HEDGE_READS = os.getenv("MCP_HEDGE_READS", "false").lower() == "true"
+mcp_hedger = Hedger(
+    "mcp_call",
+    percentile=float(os.getenv("MCP_HEDGE_PERCENTILE", "0.95")),
+    min_delay=float(os.getenv("MCP_HEDGE_MIN_DELAY_MS", "50")) / 1000,
+    metrics=metrics,
+) if MCP_HEDGE_READS else None
+
+def is_cacheable_tool(tool_name: str) -> bool:
+    return tool_name.lower().startswith(CACHEABLE_TOOL_PREFIXES)
+
+def list_calendar_tool_specs(connection_id: str):
+    # A failed call drops the session, so the next call reconnects instead of reusing a broken one
+    with mcp_pool.session(connection_id) as mcp_client:
+        with metrics.time_hop("mcp_list_tools"):
+            return [mcp_tool.tool_spec for mcp_tool in mcp_client.list_tools_sync()]
+
+def call_calendar_tool(
+    connection_id: str, tool_name: str, arguments: Optional[Dict[str, Any]], dedicated: bool = False
+) -> Dict[str, Any]:
+    timeout = time_left(MCP_CALL_TIMEOUT)
+    # A dedicated session is started for this call alone instead of sharing the pooled one
+    session = mcp_pool.dedicated_session(connection_id) if dedicated else mcp_pool.session(connection_id)
+    with session as mcp_client:
+        with metrics.time_hop("mcp_call"):
+            result = mcp_client.call_tool_sync(
+                uuid.uuid4().hex, tool_name, arguments,
+                read_timeout_seconds=timedelta(seconds=timeout) if timeout else None,
+            )
+    if result.get("status") != "success":
+        metrics.hop_errors.inc(hop="mcp_call")
+    return result
+
+def read_calendar_tool(connection_id: str, tool_name: str, arguments: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+    """``call_calendar_tool`` for idempotent reads, hedged when MCP_HEDGE_READS is on."""
+    if mcp_hedger is None:
+        return call_calendar_tool(connection_id, tool_name, arguments)
+    return mcp_hedger.call(
+        tool_name, call_calendar_tool, connection_id, tool_name, arguments,
+        accept=lambda result: result.get("status") == "success",
+        # The duplicate gets its own session: the primary may be slow because its pooled session is stalled
+        hedge_fn=lambda *args: call_calendar_tool(*args, dedicated=True),
+    )
+
+def get_calendar_tool_specs(connection_id: str):
+    tool_specs = tool_cache.get_listing(connection_id)
+    if tool_specs is None:
+        tool_specs, shared = mcp_flight.do(("list_tools", connection_id), list_calendar_tool_specs, connection_id)
+        if not shared:
+            tool_cache.set_listing(connection_id, tool_specs)
+    return tool_specs
+
+# "off" (default) always asks Nango; "sqlite" answers event listings from a local index kept in sync with Nango
+EVENT_INDEX_BACKEND = os.getenv("EVENT_INDEX_BACKEND", "off")
+# MCP tool that lists events; its calls are answered from the index when it is enabled
+EVENT_INDEX_LIST_TOOL = os.getenv("EVENT_INDEX_LIST_TOOL", "list_events")
+# Argument of the list tool that asks only for events changed since a time; syncs are full pulls when the tool lacks it
+EVENT_INDEX_INCREMENTAL_PARAM = os.getenv("EVENT_INDEX_INCREMENTAL_PARAM", "updated_min")
+# Arguments of the list tool that page through a listing and expand recurring events into their instances
+EVENT_INDEX_PAGE_PARAM = os.getenv("EVENT_INDEX_PAGE_PARAM", "page_token")
+EVENT_INDEX_EXPAND_PARAM = os.getenv("EVENT_INDEX_EXPAND_PARAM", "single_events")
+# Listing arguments the index understands; calls with any other argument go to Nango
+INDEXED_LIST_ARGUMENTS = {"calendar_id", "time_min", "time_max", "q"}
+
+def list_tool_accepts(connection_id: str, param: str) -> bool:
+    for spec in get_calendar_tool_specs(connection_id):
+        if spec["name"] == EVENT_INDEX_LIST_TOOL:
+            return param in spec.get("inputSchema", {}).get("json", {}).get("properties", {})
+    return False
+
+event_index = CalendarEventIndex(
+    path=os.getenv("EVENT_INDEX_PATH", os.path.join(".cache", "events.sqlite3")),
+    fetch=lambda connection_id, arguments: read_calendar_tool(connection_id, EVENT_INDEX_LIST_TOOL, arguments),
+    # Seconds a synced range answers reads before it is synced again
+    max_staleness=float(os.getenv("EVENT_INDEX_MAX_STALENESS", "300")),
+    incremental_param=EVENT_INDEX_INCREMENTAL_PARAM,
+    page_param=EVENT_INDEX_PAGE_PARAM,
+    expand_param=EVENT_INDEX_EXPAND_PARAM,
+    accepts=list_tool_accepts,
+    # Window used when a listing has no time_min / time_max
+    default_past_days=float(os.getenv("EVENT_INDEX_PAST_DAYS", "30")),
+    default_future_days=float(os.getenv("EVENT_INDEX_FUTURE_DAYS", "90")),
+    metrics=metrics,
+) if EVENT_INDEX_BACKEND == "sqlite" else None
+
+def indexed_listing(connection_id: str, tool_name: str, arguments: Optional[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """Answer an event listing from the index, or None when it cannot (index off, other tool or arguments, sync failed)."""
+    arguments = arguments or {}
+    if event_index is None or tool_name != EVENT_INDEX_LIST_TOOL or not set(arguments) <= INDEXED_LIST_ARGUMENTS:
+        return None
+    try:
+        events = event_index.query(
+            connection_id,
+            arguments.get("calendar_id") or "primary",
+            arguments.get("time_min"),
+            arguments.get("time_max"),
+            arguments.get("q"),
+        )
+    except Exception as e:
+        print(f"Event index unavailable for {connection_id}, asking Nango: {e}")
+        return None
+    return {"status": "success", "content": [{"text": json.dumps(events)}]}
+
+@tool
+def nango_mcp_calendar_tools(connection_id: str):
+    """
+    List the Google Calendar tools available for a connection, with their input schemas.
+
+    Args:
+        connection_id: The Nango connection id of the user's calendar
+    """
+    return get_calendar_tool_specs(connection_id)
+
+@tool
+def nango_mcp_calendar_call(connection_id: str, tool_name: str, arguments: Optional[Dict[str, Any]] = None):
+    """
+    Call one of the Google Calendar tools returned by nango_mcp_calendar_tools.
+
+    Args:
+        connection_id: The Nango connection id of the user's calendar
+        tool_name: Name of the calendar tool to call
+        arguments: Arguments matching the tool's input schema
+    """
+    if not is_cacheable_tool(tool_name):
+        try:
+            return call_calendar_tool(connection_id, tool_name, arguments)
+        finally:
+            # Writes invalidate cached reads for the connection so they are not served stale
+            tool_cache.invalidate_connection(connection_id)
+            if event_index is not None:
+                event_index.invalidate(connection_id)
+
+    indexed = indexed_listing(connection_id, tool_name, arguments)
+    if indexed is not None:
+        return indexed
+
+    key = tool_cache.result_key(connection_id, tool_name, arguments)
+    result = tool_cache.get_result(key)
+    if result is None:
+        # Only reads are coalesced; every write above reaches Nango
+        result, shared = mcp_flight.do(key, read_calendar_tool, connection_id, tool_name, arguments)
+        if not shared and result.get("status") == "success":
+            tool_cache.set_result(key, result)
+    # The tool decorator stamps its own toolUseId on the returned dict, so never hand out the cached one
+    return dict(result)
+
+# Shared by every context's agent: one Bedrock client, one set of tools and one metrics hook
+calendar_model = BedrockModel(
+    model_id="anthropic.claude-3-haiku-20240307-v1:0",
+    temperature=0,
+    # Seconds Bedrock may go quiet mid-response before the model call fails (botocore's default is 60)
+    boto_client_config=BotocoreConfig(read_timeout=float(os.getenv("MODEL_READ_TIMEOUT", "60"))),
+    # No prompt caching: Claude 3 Haiku does not support it, and the instructions and two tool schemas
+    # are well below the minimum prefix a cache point needs anyway
+)
+calendar_hooks = AgentMetricsHooks(metrics, agent_name="google-calendar-agent", model_hop="calendar_model")
+CALENDAR_SYSTEM_PROMPT = '''You are a connection agent that interacts with google-calendar via MCP client.
+    Use only the provided tools to retrieve information related to the user's google calendar. 
+    If none of the tools can help you, inform the user that you cannot help with that.
+    
+    Important:
+    - The default location for timezone is Sao Paulo, Brazil.
+    - If the user does not specify a timezone, you can assume it's Sao Paulo.
+    - If any exception happens, just inform the user you're not being able to retrieve data due to internal problems.
+    - Forward the connection_id to nango_mcp_calendar_tools to see which calendar tools exist, then run one with nango_mcp_calendar_call.
+    - If no connection_id is provided, inform that you cannot perform the operation and ask the user to inform the connection_id.
+
+    Always answer with a JSON object
+    DO NOT use emojis in the answers
+    '''
+
+def create_calendar_agent(context_id: str) -> Agent:
+    """
+    Build the calendar agent of one A2A context, reusing the shared model client and tools.
+    Event listings are verbose JSON; HISTORY_TRIM_TOOL_RESULTS=true keeps only their useful fields in later turns.
+    """
+    history = CompactingConversationManager.from_env(metrics, agent_name="google-calendar-agent")
+    return Agent(
+        model=calendar_model,
+        name="google-calendar-agent",
+        agent_id="google-calendar-agent",
+        description="Google Calendar Agent",
+        system_prompt=CALENDAR_SYSTEM_PROMPT,
+        record_direct_tool_call=False,
+        tools=[nango_mcp_calendar_tools, nango_mcp_calendar_call],
+        conversation_manager=history,
+        hooks=[calendar_hooks, history],
+    )
+
+print("Creating Google Calendar Agent...")
+# Only describes the service in its agent card; tasks run on the agents of their own context
+google_calendar_agent = create_calendar_agent("")
+
+# One agent per A2A context_id, so concurrent conversations never share a history
+calendar_contexts = AgentSessionPool(
+    agent_factory=create_calendar_agent,
+    max_sessions=int(os.getenv("CALENDAR_MAX_CONTEXTS", "256")),
+    ttl_seconds=float(os.getenv("CALENDAR_CONTEXT_TTL_SECONDS", "1800")),
+)
+# Tasks running at once, tasks allowed to wait for a slot (beyond it they are rejected) and seconds they may wait
+calendar_workers = AgentWorkerPool(
+    max_concurrency=int(os.getenv("CALENDAR_MAX_CONCURRENCY", "8")),
+    max_queue=int(os.getenv("CALENDAR_MAX_QUEUE", "16")),
+    queue_timeout=float(os.getenv("CALENDAR_QUEUE_TIMEOUT", "30")),
+)
+calendar_executor = PooledA2AExecutor(
+    calendar_contexts,
+    calendar_workers,
+    # Longest a task may run; callers that send a deadline in the message metadata get the time they have left
+    task_timeout=float(os.getenv("CALENDAR_TASK_TIMEOUT", "120")),
+    metrics=metrics,
+)
+
+print("Creating A2A Server...")
+server_url = os.getenv("CALENDAR_AGENT_URL", "http://localhost:8080") # Ensure this is set in your environment so load_balancer, cloud_run, or other services can access it.
+server = A2AServer(agent=google_calendar_agent, serve_at_root=True, http_url=server_url)
+server.request_handler = DefaultRequestHandler(agent_executor=calendar_executor, task_store=InMemoryTaskStore())
+
+print("Converting A2A Server to FastAPI app...")
+fastapi_app = server.to_fastapi_app()
+fastapi_app.add_event_handler("shutdown", mcp_pool.close)
+fastapi_app.add_event_handler("shutdown", calendar_workers.shutdown)
+if mcp_hedger is not None:
+    fastapi_app.add_event_handler("shutdown", mcp_hedger.shutdown)
+fastapi_app.add_middleware(MetricsMiddleware, metrics=metrics)
+metrics.add_collector("mcp_pool", mcp_pool.stats)
+metrics.add_collector("tool_cache", tool_cache.stats)
+metrics.add_collector("a2a_executor", calendar_executor.stats)
+metrics.add_collector("mcp_flight", mcp_flight.stats)
+if event_index is not None:
+    metrics.add_collector("event_index", event_index.stats)
+if mcp_hedger is not None:
+    metrics.add_collector("mcp_hedger", mcp_hedger.stats)
+
+@fastapi_app.get("/healthz")
+async def healthz():
+    """Liveness: the process is up and serving"""
+    return {"status": "ok"}
+
+@fastapi_app.get("/ready")
+async def ready():
+    """Readiness: startup warmup has finished. Reports how long each startup phase took"""
+    report = startup_timer.report()
+    return JSONResponse(report, status_code=200 if report["ready"] else 503)
+
+@fastapi_app.get("/stats")
+async def stats():
+    """MCP session pool, cache and A2A task counters"""
+    return {
+        "mcp_pool": mcp_pool.stats(),
+        "tool_cache": tool_cache.stats(),
+        "a2a_executor": calendar_executor.stats(),
+        "mcp_flight": mcp_flight.stats(),
+        "event_index": event_index.stats() if event_index is not None else None,
+        "mcp_hedger": mcp_hedger.stats() if mcp_hedger is not None else None,
+        "startup": startup_timer.report(),
+    }
+
+@fastapi_app.get("/metrics")
+async def prometheus_metrics():
+    """Per-hop latency histograms, token counts, in-flight gauges and pool/cache counters in Prometheus text format"""
+    return PlainTextResponse(metrics.render(), media_type=CONTENT_TYPE)
+
+# Comma separated connection_ids whose MCP session and tool listing every worker prepares at startup
+MCP_WARM_CONNECTION_IDS = [c.strip() for c in os.getenv("MCP_WARM_CONNECTION_IDS", "").split(",") if c.strip()]
+
+def warm_connection(connection_id: str) -> None:
+    with mcp_pool.session(connection_id):
+        pass
+    if tool_cache.get_listing(connection_id) is None:
+        tool_cache.set_listing(connection_id, list_calendar_tool_specs(connection_id))
+
+@fastapi_app.on_event("startup")
+async def warmup():
+    """Per-worker warmup: open the MCP sessions of the busiest connections before traffic arrives."""
+    with startup_timer.phase("warmup"):
+        results = await asyncio.gather(
+            *(asyncio.to_thread(warm_connection, connection_id) for connection_id in MCP_WARM_CONNECTION_IDS),
+            return_exceptions=True,
+        )
+    for connection_id, result in zip(MCP_WARM_CONNECTION_IDS, results):
+        if isinstance(result, Exception):
+            print(f"Warmup failed for connection {connection_id}: {result}")
+    startup_timer.mark_ready()
+
+def create_app():
+    """
+    App factory for process managers, e.g. ``uvicorn nango_caller_agent:create_app --factory --workers 4``
+    or ``gunicorn -w 4 -k uvicorn.workers.UvicornWorker 'nango_caller_agent:create_app()'``.
+    Every worker imports this module, so each one gets its own agent, MCP pool and warmup.
+    """
+    return fastapi_app
+
+def main():
+    serve("nango_caller_agent:create_app", 8080, app=create_app())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+import hashlib
+import json
+import re
+import threading
+from typing import Any, Dict, Optional
+
+from shared_store import KeyValueStore
+
+_WHITESPACE = re.compile(r"\s+")
+_TRAILING_PUNCTUATION = re.compile(r"[\s?!.]+$")
+
+
+def normalize_input(user_input: str) -> str:
+    """
+    Collapse whitespace and drop trailing punctuation so trivially different inputs match. Case is
+    kept: inputs carry connection and calendar ids, and ids differing only in case belong to
+    different users.
+    """
+    return _TRAILING_PUNCTUATION.sub("", _WHITESPACE.sub(" ", user_input.strip()))
+
+
+def config_hash(*parts: Any) -> str:
+    """Stable short hash of the agent configuration; any change invalidates every cached response."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+class ResponseCache:
+    """
+    Exact-match response cache in front of the orchestrator.
+
+    Keys combine the normalized user input and the requested ``target_agent`` with a hash of the
+    agent configuration, so a prompt, model or tool change never serves answers produced by the old
+    setup and an answer from one agent is never served for another. Each entry keeps the route that
+    produced it. Storage is delegated to
+    a ``KeyValueStore`` (in-memory LRU per process, or SQLite shared by all workers on a node).
+    Lookups can block on disk, so callers on the event loop run them through ``asyncio.to_thread``.
+    """
+
+    def __init__(self, store: KeyValueStore, agent_config_hash: str, ttl_seconds: float = 60.0):
+        self.store = store
+        self.agent_config_hash = agent_config_hash
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def key_for(self, user_input: str, target_agent: Optional[str] = None) -> str:
+        payload = json.dumps([normalize_input(user_input), target_agent])
+        digest = hashlib.sha256(payload.encode("utf-8")).hexdigest()
+        return f"response:{self.agent_config_hash}:{digest}"
+
+    def get(self, user_input: str, target_agent: Optional[str] = None) -> Optional[Dict[str, Any]]:
+        """The cached ``{"response": ..., "route": ...}`` of a request, or None."""
+        value = self.store.get(self.key_for(user_input, target_agent))
+        with self._lock:
+            if value is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        return value
+
+    def set(self, user_input: str, response: Any, target_agent: Optional[str] = None, route: str = "orchestrator") -> None:
+        self.store.set(self.key_for(user_input, target_agent), {"response": response, "route": route}, self.ttl_seconds)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "ttl_seconds": self.ttl_seconds,
+            "config_hash": self.agent_config_hash,
+            "hits": self.hits,
+            "misses": self.misses,
+            "store": self.store.stats(),
+        }
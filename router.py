@@ -0,0 +1,131 @@
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Optional
+
+from a2a.types import AgentCard
+
+from agent_registry import AgentCardRegistry
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+_STOPWORDS = frozenset(
+    "a an and are as at be by can do does for from has have how i in is it me my of on or the this to "
+    "what when where which who why will with you your".split()
+)
+
+
+def tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN.findall(text.lower()) if token not in _STOPWORDS and len(token) > 1]
+
+
+def _card_text(card: AgentCard) -> str:
+    parts = [card.name, card.description or ""]
+    for skill in card.skills or []:
+        parts.extend([skill.name, skill.description or "", " ".join(skill.tags or []), " ".join(skill.examples or [])])
+    return " ".join(parts)
+
+
+def _cosine(a: Counter, b: Counter) -> float:
+    dot = sum(count * b[token] for token, count in a.items() if token in b)
+    if not dot:
+        return 0.0
+    return dot / (math.sqrt(sum(v * v for v in a.values())) * math.sqrt(sum(v * v for v in b.values())))
+
+
+@dataclass
+class RouteDecision:
+    """Where a request is sent without the orchestrator LLM, and why."""
+
+    agent_url: str
+    reason: str
+    score: float = 1.0
+
+
+class FastPathRouter:
+    """
+    Pre-router that picks the target A2A agent without an orchestrator LLM round trip.
+
+    A request is routed, in order of precedence, by:
+
+    1. an explicit ``target_agent`` (agent URL or agent card name),
+    2. keyword rules mapping an agent URL or name to trigger words,
+    3. a nearest-card classifier: bag-of-words cosine similarity between the input and each cached
+       agent card (name, description, skills), accepted only above ``min_similarity`` and ahead of
+       the runner-up by ``min_margin``.
+
+    When none of them is confident, ``route`` returns None and the caller falls back to the LLM.
+    """
+
+    def __init__(
+        self,
+        registry: AgentCardRegistry,
+        keyword_rules: Optional[Dict[str, Iterable[str]]] = None,
+        use_classifier: bool = True,
+        min_similarity: float = 0.25,
+        min_margin: float = 0.1,
+    ):
+        self.registry = registry
+        self.keyword_rules = {target: [kw.lower() for kw in keywords] for target, keywords in (keyword_rules or {}).items()}
+        self.use_classifier = use_classifier
+        self.min_similarity = min_similarity
+        self.min_margin = min_margin
+        self._card_vectors: Dict[str, Counter] = {}
+        self._card_versions: Dict[str, int] = {}
+
+    def resolve_agent(self, target: str) -> Optional[str]:
+        """Map an agent URL or agent card name to a known agent URL."""
+        key = target.rstrip("/")
+        cards = self.registry.cards()
+        if key in cards:
+            return key
+        for url, card in cards.items():
+            if card.name == target:
+                return url
+        return None
+
+    def _card_vector(self, url: str, card: AgentCard) -> Counter:
+        # Cards are refreshed in the background, so vectors are rebuilt when the card object changes
+        if self._card_versions.get(url) != id(card):
+            self._card_vectors[url] = Counter(tokenize(_card_text(card)))
+            self._card_versions[url] = id(card)
+        return self._card_vectors[url]
+
+    def route(self, user_input: str, target_agent: Optional[str] = None) -> Optional[RouteDecision]:
+        """
+        Decide whether the request can skip the orchestrator LLM.
+
+        Args:
+            user_input: The user's question
+            target_agent: Optional explicit agent URL or name from the request
+
+        Returns:
+            A RouteDecision, or None to use the orchestrator LLM
+        """
+        if target_agent:
+            url = self.resolve_agent(target_agent)
+            return RouteDecision(agent_url=url, reason="explicit") if url else None
+
+        tokens = tokenize(user_input)
+        token_set = set(tokens)
+        lowered = user_input.lower()
+        for target, keywords in self.keyword_rules.items():
+            if any((kw in token_set) if " " not in kw else (kw in lowered) for kw in keywords):
+                url = self.resolve_agent(target)
+                if url:
+                    return RouteDecision(agent_url=url, reason="keyword")
+
+        if not self.use_classifier or not tokens:
+            return None
+        query = Counter(tokens)
+        scores = sorted(
+            ((_cosine(query, self._card_vector(url, card)), url) for url, card in self.registry.cards().items()),
+            reverse=True,
+        )
+        if not scores:
+            return None
+        best_score, best_url = scores[0]
+        runner_up = scores[1][0] if len(scores) > 1 else 0.0
+        if best_score >= self.min_similarity and best_score - runner_up >= self.min_margin:
+            return RouteDecision(agent_url=best_url, reason="classifier", score=best_score)
+        return None
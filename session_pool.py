@@ -0,0 +1,227 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from strands import Agent
+
+from shared_store import KeyValueStore
+
+
+@dataclass
+class _SessionEntry:
+    """A pooled agent together with its serializing lock and bookkeeping."""
+
+    agent: Agent
+    lock: asyncio.Lock = field(default_factory=asyncio.Lock)
+    last_used: float = field(default_factory=time.monotonic)
+    history_bytes: int = 0
+    # Callers between looking the session up and getting its lock; eviction leaves the entry alone meanwhile
+    waiters: int = 0
+    # Version of the history last loaded from or saved to the shared store
+    version: int = 0
+    # Messages as of the last save, to skip the save when a turn left the history unchanged
+    saved_messages: List[Dict[str, Any]] = field(default_factory=list)
+
+
+class AgentSessionPool:
+    """
+    Session-keyed pool of Agent instances.
+
+    Each session/conversation id gets its own Agent so histories never mix and concurrent calls
+    never race on the same message list. Agents are built through ``agent_factory``, which is
+    expected to share the immutable pieces (model client, tools, system prompt) so building one is
+    cheap. Idle sessions expire after ``ttl_seconds``; beyond ``max_sessions`` or
+    ``max_history_bytes`` the least-recently-used sessions are evicted.
+
+    With a shared ``store`` the conversation history is saved after every turn and reloaded when
+    another worker has saved a newer version, so any worker process can continue any session.
+    Concurrent turns of one session on two workers are not serialized; the last one saved wins.
+    """
+
+    def __init__(
+        self,
+        agent_factory: Callable[[str], Agent],
+        max_sessions: int = 1000,
+        ttl_seconds: float = 1800.0,
+        max_history_bytes: Optional[int] = 64 * 1024 * 1024,
+        store: Optional[KeyValueStore] = None,
+    ):
+        if max_sessions < 1:
+            raise ValueError(f"max_sessions must be >= 1, got {max_sessions}")
+
+        self.agent_factory = agent_factory
+        self.max_sessions = max_sessions
+        self.ttl_seconds = ttl_seconds
+        self.max_history_bytes = max_history_bytes
+        self.store = store
+
+        self._sessions: "OrderedDict[str, _SessionEntry]" = OrderedDict()
+        self._history_bytes = 0
+        self.created = 0
+        self.evicted = 0
+        self.loaded = 0
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def __contains__(self, session_id: str) -> bool:
+        return session_id in self._sessions
+
+    async def acquire(self, session_id: Optional[str]) -> Tuple[Agent, asyncio.Lock]:
+        """
+        Return the agent of a session with its lock held, building the agent on first use.
+
+        Args:
+            session_id: Session/conversation id, or None for a one-off agent that is not pooled
+
+        Returns:
+            Tuple of (agent, lock); pass the lock to ``release`` once the turn is over
+        """
+        if session_id is None:
+            self.created += 1
+            lock = asyncio.Lock()
+            await lock.acquire()
+            return self.agent_factory(""), lock
+
+        self._evict_expired()
+        entry = self._sessions.get(session_id)
+        if entry is None:
+            entry = _SessionEntry(agent=self.agent_factory(session_id))
+            self._sessions[session_id] = entry
+            self.created += 1
+            self._evict_excess(keep=session_id)
+        else:
+            self._sessions.move_to_end(session_id)
+        entry.last_used = time.monotonic()
+        # Pinned until the lock is ours, so two turns of the session can never end up on different agents
+        entry.waiters += 1
+        try:
+            await entry.lock.acquire()
+        finally:
+            entry.waiters -= 1
+        # The previous turn saved its history before unlocking, so only other workers can have a newer one
+        self._load(session_id, entry)
+        return entry.agent, entry.lock
+
+    @staticmethod
+    def _store_key(session_id: str) -> str:
+        return f"session:{session_id}"
+
+    def _load(self, session_id: str, entry: _SessionEntry) -> None:
+        """Replace the local history with the shared one if another worker saved a newer version."""
+        if self.store is None:
+            return
+        saved = self.store.get(self._store_key(session_id))
+        if saved is None or saved["version"] <= entry.version:
+            return
+        entry.agent.messages = saved["messages"]
+        entry.version = saved["version"]
+        entry.saved_messages = list(entry.agent.messages)
+        self.loaded += 1
+
+    def _save(self, session_id: str, version: int, messages: List[Dict[str, Any]]) -> int:
+        """Write the history to the shared store and return its size; runs off the event loop."""
+        if self.store is not None:
+            self.store.set(self._store_key(session_id), {"version": version, "messages": messages}, self.ttl_seconds or None)
+        try:
+            return len(json.dumps(messages, default=str))
+        except Exception:
+            return 0
+
+    async def release(self, session_id: Optional[str], lock: asyncio.Lock) -> None:
+        """
+        Refresh the session's idle timer, save its history and re-check the memory cap after a turn,
+        then unlock the session. The lock is held during the save, so the history cannot change.
+        """
+        try:
+            await self._finish_turn(session_id)
+        finally:
+            lock.release()
+
+    async def _finish_turn(self, session_id: Optional[str]) -> None:
+        entry = self._sessions.get(session_id) if session_id else None
+        if entry is None:
+            return
+        entry.last_used = time.monotonic()
+        messages = list(entry.agent.messages)
+        # A failed or cancelled turn leaves the history as it was; comparing references is cheap even for long ones
+        if len(messages) == len(entry.saved_messages) and all(a is b for a, b in zip(messages, entry.saved_messages)):
+            return
+        if self.store is not None:
+            entry.version += 1
+        # Serializing a long history, and the SQLite write, would block every other request on the loop
+        size = await asyncio.to_thread(self._save, session_id, entry.version, messages)
+        entry.saved_messages = messages
+        # Only the session that just ran can have grown, so only its size is recomputed
+        if self._sessions.get(session_id) is entry:
+            self._history_bytes += size - entry.history_bytes
+            entry.history_bytes = size
+            self._evict_excess(keep=session_id)
+
+    def drop(self, session_id: str) -> bool:
+        """Forget a session; returns whether it existed."""
+        entry = self._sessions.pop(session_id, None)
+        if entry is None:
+            return False
+        self._history_bytes -= entry.history_bytes
+        return True
+
+    def clear(self) -> None:
+        self._sessions.clear()
+        self._history_bytes = 0
+
+    def _evict_expired(self) -> None:
+        if not self.ttl_seconds:
+            return
+        cutoff = time.monotonic() - self.ttl_seconds
+        # OrderedDict is in LRU order, so the oldest entries are at the front
+        while self._sessions:
+            session_id, entry = next(iter(self._sessions.items()))
+            if entry.last_used >= cutoff or self._in_use(entry):
+                break
+            self._sessions.popitem(last=False)
+            self._history_bytes -= entry.history_bytes
+            self.evicted += 1
+
+    @staticmethod
+    def _in_use(entry: _SessionEntry) -> bool:
+        return entry.lock.locked() or entry.waiters > 0
+
+    def _evict_excess(self, keep: Optional[str] = None) -> None:
+        while len(self._sessions) > self.max_sessions and self._evict_one(keep):
+            pass
+        if self.max_history_bytes:
+            while self._history_bytes > self.max_history_bytes and self._evict_one(keep):
+                pass
+
+    def _evict_one(self, keep: Optional[str]) -> bool:
+        """Evict the least-recently-used idle session other than ``keep``."""
+        for session_id, entry in self._sessions.items():
+            if session_id != keep and not self._in_use(entry):
+                del self._sessions[session_id]
+                self._history_bytes -= entry.history_bytes
+                self.evicted += 1
+                return True
+        return False
+
+    def history_bytes(self) -> int:
+        return self._history_bytes
+
+    def session_ids(self) -> List[str]:
+        return list(self._sessions.keys())
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._sessions),
+            "max_sessions": self.max_sessions,
+            "ttl_seconds": self.ttl_seconds,
+            "history_bytes": self._history_bytes,
+            "max_history_bytes": self.max_history_bytes,
+            "created": self.created,
+            "evicted": self.evicted,
+            "loaded": self.loaded,
+            "store": self.store.stats() if self.store is not None else None,
+        }
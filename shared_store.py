@@ -0,0 +1,175 @@
+import json
+from abc import ABC, abstractmethod
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+from ttl_cache import TTLCache
+
+
+class KeyValueStore(ABC):
+    """
+    Minimal key/value store interface with per-entry TTL.
+
+    Values must be JSON serializable so every backend stores them the same way.
+    """
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[Any]:
+        ...
+
+    def peek(self, key: str) -> Optional[Any]:
+        """``get`` without counting a hit or miss, for bookkeeping keys that are not cache lookups."""
+        return self.get(key)
+
+    @abstractmethod
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ...
+
+    @abstractmethod
+    def delete(self, key: str) -> None:
+        ...
+
+    @abstractmethod
+    def clear(self) -> None:
+        ...
+
+    def stats(self) -> Dict[str, Any]:
+        return {}
+
+
+class InMemoryStore(KeyValueStore):
+    """Per-process LRU store; fastest, but not shared between workers."""
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        self._cache = TTLCache(max_size=max_size, ttl_seconds=ttl_seconds)
+
+    def get(self, key: str) -> Optional[Any]:
+        return self._cache.get(key)
+
+    def peek(self, key: str) -> Optional[Any]:
+        return self._cache.get(key, record_stats=False)
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        self._cache.set(key, value, ttl_seconds)
+
+    def delete(self, key: str) -> None:
+        self._cache.delete(key)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"backend": "memory", **self._cache.stats()}
+
+
+class SQLiteStore(KeyValueStore):
+    """
+    Store backed by a local SQLite file, shared by every worker process on the node.
+
+    Uses WAL journaling so readers in other processes are not blocked by a writer. Expired rows
+    are ignored on read and purged periodically on write.
+    """
+
+    PURGE_EVERY = 500
+
+    def __init__(self, path: str, ttl_seconds: float = 60.0, table: str = "kv"):
+        if not table.isidentifier():
+            raise ValueError(f"Invalid table name: {table}")
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.table = table
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+
+        conn = self._conn()
+        conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} (key TEXT PRIMARY KEY, value TEXT NOT NULL, expires_at REAL NOT NULL)"
+        )
+        conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_expires_at ON {table} (expires_at)")
+        conn.commit()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 connections must not be shared across threads, so each thread gets its own
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=5.0)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    def get(self, key: str) -> Optional[Any]:
+        row = self._read(key)
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return json.loads(row[0])
+
+    def peek(self, key: str) -> Optional[Any]:
+        row = self._read(key)
+        return json.loads(row[0]) if row is not None else None
+
+    def _read(self, key: str) -> Optional[tuple]:
+        return self._conn().execute(
+            f"SELECT value FROM {self.table} WHERE key = ? AND expires_at > ?", (key, time.time())
+        ).fetchone()
+
+    def set(self, key: str, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        conn = self._conn()
+        conn.execute(
+            f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at) VALUES (?, ?, ?)",
+            (key, json.dumps(value, default=str), time.time() + ttl),
+        )
+        self._writes += 1
+        if self._writes % self.PURGE_EVERY == 0:
+            conn.execute(f"DELETE FROM {self.table} WHERE expires_at <= ?", (time.time(),))
+        conn.commit()
+
+    def delete(self, key: str) -> None:
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+        conn.commit()
+
+    def clear(self) -> None:
+        conn = self._conn()
+        conn.execute(f"DELETE FROM {self.table}")
+        conn.commit()
+
+    def stats(self) -> Dict[str, Any]:
+        size = self._conn().execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()[0]
+        return {"backend": "sqlite", "path": self.path, "size": size, "hits": self.hits, "misses": self.misses}
+
+
+def create_store(backend: str, path: Optional[str] = None, table: str = "kv", max_size: int = 1024, ttl_seconds: float = 60.0) -> Optional[KeyValueStore]:
+    """
+    Build a store from configuration.
+
+    Args:
+        backend: "memory", "sqlite", or "" / "none" to disable
+        path: SQLite file path (sqlite backend only)
+        table: SQLite table name, so several stores can share one file
+        max_size: Maximum entries (memory backend only)
+        ttl_seconds: Default time-to-live for entries
+
+    Returns:
+        The store, or None when disabled
+    """
+    backend = (backend or "none").lower()
+    if backend == "none":
+        return None
+    if backend == "memory":
+        return InMemoryStore(max_size=max_size, ttl_seconds=ttl_seconds)
+    if backend == "sqlite":
+        return SQLiteStore(path or os.path.join(".cache", "store.sqlite3"), ttl_seconds=ttl_seconds, table=table)
+    raise ValueError(f"Unsupported store backend: {backend}")
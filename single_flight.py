@@ -0,0 +1,117 @@
+import asyncio
+import threading
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+from deadlines import DeadlineExceeded, time_left
+from metrics import MetricsRegistry
+
+
+class _FlightStats:
+    """Counters shared by both single-flight flavours, labelled with a ``scope`` in Prometheus."""
+
+    def __init__(self, scope: str, metrics: Optional[MetricsRegistry]):
+        self.scope = scope
+        self.calls = 0
+        self.collapsed = 0
+        self._calls = metrics.counter(
+            "single_flight_calls_total", "Calls that went through a single-flight group", ["scope"]
+        ) if metrics is not None else None
+        self._collapsed = metrics.counter(
+            "single_flight_collapsed_total", "Calls answered by an identical call already in flight", ["scope"]
+        ) if metrics is not None else None
+
+    def record(self, shared: bool) -> None:
+        self.calls += 1
+        if self._calls is not None:
+            self._calls.inc(scope=self.scope)
+        if shared:
+            self.collapsed += 1
+            if self._collapsed is not None:
+                self._collapsed.inc(scope=self.scope)
+
+
+class AsyncSingleFlight:
+    """
+    Collapses concurrent coroutine calls with the same key into one.
+
+    The first caller for a key runs the call; callers arriving while it is in flight await the
+    same result (or exception) instead of running it again. Nothing is kept once the call ends,
+    so this only deduplicates overlapping calls; pair it with a cache to reuse finished ones.
+    The call runs as its own task, so a caller that goes away does not cancel it for the others.
+    Every caller waits at most until its own request deadline (``deadlines.time_left``), however
+    long the shared call runs.
+    """
+
+    def __init__(self, scope: str, metrics: Optional[MetricsRegistry] = None):
+        self._stats = _FlightStats(scope, metrics)
+        self._flights: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[..., Awaitable[Any]], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """
+        Run ``fn(*args, **kwargs)`` unless an identical call is already in flight.
+
+        Returns:
+            Tuple of (result, shared); ``shared`` is True when the result came from another caller's call
+        """
+        task = self._flights.get(key)
+        shared = task is not None
+        if task is None:
+            task = asyncio.create_task(fn(*args, **kwargs))
+            self._flights[key] = task
+            task.add_done_callback(lambda _: self._flights.pop(key, None))
+        self._stats.record(shared)
+        # On timeout only this caller's wait is cancelled; the shield keeps the call running for the others
+        return await asyncio.wait_for(asyncio.shield(task), time_left()), shared
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self._stats.calls, "collapsed": self._stats.collapsed, "in_flight": len(self._flights)}
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class SingleFlight:
+    """
+    Thread-safe ``AsyncSingleFlight`` for blocking calls, e.g. MCP tool calls made from agent
+    tool threads. Callers of an in-flight key block until the first caller's call returns, or
+    until their own request deadline passes (``DeadlineExceeded``).
+    """
+
+    def __init__(self, scope: str, metrics: Optional[MetricsRegistry] = None):
+        self._stats = _FlightStats(scope, metrics)
+        self._lock = threading.Lock()
+        self._flights: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Tuple[Any, bool]:
+        """Same as ``AsyncSingleFlight.do`` for a blocking ``fn``."""
+        with self._lock:
+            call = self._flights.get(key)
+            shared = call is not None
+            if call is None:
+                call = self._flights[key] = _Call()
+            self._stats.record(shared)
+
+        if shared:
+            if not call.done.wait(time_left()):
+                raise DeadlineExceeded("Deadline exceeded waiting for an identical call in flight")
+            if call.error is not None:
+                raise call.error
+            return call.result, True
+
+        try:
+            call.result = fn(*args, **kwargs)
+            return call.result, False
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                self._flights.pop(key, None)
+            call.done.set()
+
+    def stats(self) -> Dict[str, Any]:
+        return {"calls": self._stats.calls, "collapsed": self._stats.collapsed, "in_flight": len(self._flights)}
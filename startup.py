@@ -0,0 +1,230 @@
+import asyncio
+import importlib
+import json
+import os
+import sys
+import time
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+
+# Kept to the standard library: in lazy mode this module is all that is imported before the port opens
+STARTUP_MODES = ("eager", "lazy")
+
+
+class StartupTimer:
+    """
+    Durations of the named startup phases of this process, in the order they ran. Readiness is
+    measured from when this module was first imported, which is process start for the launchers.
+    """
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.phases: List[Dict[str, Any]] = []
+        self.ready_after: Optional[float] = None
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.monotonic()
+        try:
+            yield
+        finally:
+            seconds = time.monotonic() - started
+            self.phases.append({"phase": name, "seconds": round(seconds, 4)})
+            print(f"Startup phase {name} took {seconds:.3f}s")
+
+    def mark_ready(self) -> None:
+        """Called by the apps at the end of their startup warmup."""
+        if self.ready_after is None:
+            self.ready_after = time.monotonic() - self.started
+            print(f"Ready {self.ready_after:.3f}s after startup began")
+
+    def report(self) -> Dict[str, Any]:
+        return {
+            "ready": self.ready_after is not None,
+            "ready_after_seconds": round(self.ready_after, 4) if self.ready_after is not None else None,
+            "uptime_seconds": round(time.monotonic() - self.started, 4),
+            "phases": list(self.phases),
+        }
+
+
+# One timer per process, shared by the launcher, the lazy shell and the apps' own startup handlers
+timer = StartupTimer()
+
+
+def load_target(target: str) -> Any:
+    """Import ``module:factory`` and call the factory, timing both as startup phases."""
+    module_name, _, factory_name = target.partition(":")
+    with timer.phase("import"):
+        module = importlib.import_module(module_name)
+    with timer.phase("create_app"):
+        return getattr(module, factory_name or "create_app")()
+
+
+async def _send_json(send, status: int, body: Dict[str, Any], headers: Optional[List] = None) -> None:
+    payload = json.dumps(body).encode("utf-8")
+    await send({
+        "type": "http.response.start",
+        "status": status,
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(payload)).encode())] + (headers or []),
+    })
+    await send({"type": "http.response.body", "body": payload})
+
+
+class LazyApp:
+    """
+    ASGI shell that lets the server open its port before the real app exists.
+
+    Lifespan startup completes at once; the app named by ``target`` (``module:factory``) is then
+    imported and built on a worker thread and its own lifespan startup (card prefetch, MCP warmup)
+    is run on the server loop. Until that finishes:
+
+    - ``/healthz`` (liveness) answers 200, or 500 if loading failed
+    - ``/ready`` (readiness) answers 503 with the startup phases, and 200 once the app is ready
+    - every other request waits up to ``request_timeout`` seconds for the app, then gets a 503
+
+    Afterwards every request except the two probes goes straight to the real app.
+    """
+
+    def __init__(self, target: str, request_timeout: float = 60.0):
+        self.target = target
+        self.request_timeout = request_timeout
+        self.app: Any = None
+        self.error: Optional[str] = None
+        self._ready: Optional[asyncio.Event] = None
+        self._loader: Optional[asyncio.Task] = None
+        self._lifespan_queue: Optional[asyncio.Queue] = None
+        self._lifespan_task: Optional[asyncio.Task] = None
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] == "http" and scope["path"] == "/healthz":
+            if self.error is not None:
+                await _send_json(send, 500, {"status": "failed", "error": self.error})
+            else:
+                await _send_json(send, 200, {"status": "ok"})
+            return
+        if scope["type"] == "http" and scope["path"] == "/ready":
+            report = timer.report()
+            report["ready"] = self.app is not None
+            if self.error is not None:
+                report["error"] = self.error
+            await _send_json(send, 200 if report["ready"] else 503, report)
+            return
+
+        if not self._ready.is_set():
+            try:
+                await asyncio.wait_for(self._ready.wait(), self.request_timeout)
+            except asyncio.TimeoutError:
+                pass
+        if self.app is None or self.error is not None:
+            if scope["type"] == "http":
+                await _send_json(send, 503, {"detail": self.error or "Service is starting"}, [(b"retry-after", b"5")])
+            return
+        await self.app(scope, receive, send)
+
+    async def _lifespan(self, receive, send) -> None:
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                self._ready = asyncio.Event()
+                self._loader = asyncio.create_task(self._load())
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                if self._loader is not None and not self._loader.done():
+                    self._loader.cancel()
+                await self._app_shutdown()
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _load(self) -> None:
+        try:
+            app = await asyncio.to_thread(load_target, self.target)
+            await self._app_startup(app)
+            self.app = app
+        except Exception as e:
+            self.error = f"{type(e).__name__}: {e}"
+            print(f"Error starting {self.target}: {self.error}")
+        finally:
+            self._ready.set()
+
+    async def _app_startup(self, app: Any) -> None:
+        """Drive the real app's lifespan protocol, as the server would have."""
+        self._lifespan_queue = asyncio.Queue()
+        started: asyncio.Future = asyncio.get_running_loop().create_future()
+
+        async def app_send(message: Dict[str, Any]) -> None:
+            if message["type"].startswith("lifespan.startup") and not started.done():
+                started.set_result(message)
+
+        self._lifespan_queue.put_nowait({"type": "lifespan.startup"})
+        self._lifespan_task = asyncio.create_task(
+            app({"type": "lifespan", "asgi": {"version": "3.0"}, "state": {}}, self._lifespan_queue.get, app_send)
+        )
+
+        def exited(task: asyncio.Task) -> None:
+            if not started.done():
+                error = None if task.cancelled() else task.exception()
+                started.set_exception(error or RuntimeError("lifespan exited before startup completed"))
+
+        self._lifespan_task.add_done_callback(exited)
+        message = await started
+        if message["type"] == "lifespan.startup.failed":
+            raise RuntimeError(message.get("message") or "lifespan startup failed")
+
+    async def _app_shutdown(self) -> None:
+        if self._lifespan_task is None or self._lifespan_task.done():
+            return
+        self._lifespan_queue.put_nowait({"type": "lifespan.shutdown"})
+        try:
+            await asyncio.wait_for(self._lifespan_task, 30)
+        except Exception as e:
+            print(f"Error shutting down {self.target}: {e}")
+
+
+def create_lazy_app() -> LazyApp:
+    """Factory for lazy multi-worker mode; the target comes from STARTUP_TARGET since workers are spawned."""
+    return LazyApp(os.environ["STARTUP_TARGET"], request_timeout=float(os.getenv("STARTUP_REQUEST_TIMEOUT", "60")))
+
+
+def serve(target: str, default_port: int, app: Any = None) -> None:
+    """
+    Run ``target`` (``module:factory``) with uvicorn, honouring HOST, PORT, WEB_CONCURRENCY and
+    STARTUP_MODE. In "eager" mode the app is imported, built and warmed before the port opens; in
+    "lazy" mode the port opens at once and the app is served through a ``LazyApp``. An already
+    built ``app`` (a module run as a script) is served as is, which rules out lazy mode.
+    """
+    import uvicorn
+    from dotenv import load_dotenv
+
+    load_dotenv() # the services load it on import, which in lazy mode is too late for these settings
+    mode = os.getenv("STARTUP_MODE", "eager")
+    if mode not in STARTUP_MODES:
+        raise ValueError(f"STARTUP_MODE must be one of {STARTUP_MODES}, got {mode!r}")
+    host = os.getenv("HOST", "0.0.0.0")
+    port = int(os.getenv("PORT", str(default_port)))
+    workers = int(os.getenv("WEB_CONCURRENCY", "1"))
+    if mode == "lazy" and app is not None:
+        # The heavy imports already happened; importing the target again would only double them
+        print(f"STARTUP_MODE=lazy needs a launcher that has not imported the app, e.g. `python startup.py {target}`; starting eagerly")
+        mode = "eager"
+
+    if mode == "lazy":
+        os.environ["STARTUP_TARGET"] = target
+        if workers > 1:
+            uvicorn.run("startup:create_lazy_app", factory=True, host=host, port=port, workers=workers)
+        else:
+            uvicorn.run(create_lazy_app(), host=host, port=port)
+    elif workers > 1:
+        uvicorn.run(target, factory=True, host=host, port=port, workers=workers)
+    else:
+        uvicorn.run(app if app is not None else load_target(target), host=host, port=port)
+
+
+if __name__ == "__main__":
+    # e.g. STARTUP_MODE=lazy python startup.py multi_agent_strands:create_app 8081
+    # Goes through the importable module so the apps record into the same timer as the shell
+    import startup
+
+    startup.serve(sys.argv[1], int(sys.argv[2]) if len(sys.argv) > 2 else 8080)
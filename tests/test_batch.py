@@ -0,0 +1,60 @@
+import asyncio
+import json
+import time
+
+from batch import iter_records, read_done_indices, run_batch, summarize_results
+
+
+async def _lines(items):
+    for item in items:
+        yield item
+
+
+def run(records, handler, concurrency):
+    async def collect():
+        return [result async for result in run_batch(iter_records(_lines(records)), handler, concurrency)]
+    return asyncio.run(collect())
+
+
+def test_records_run_concurrently_up_to_the_limit():
+    in_flight, peak = 0, 0
+
+    async def handler(record):
+        nonlocal in_flight, peak
+        in_flight += 1
+        peak = max(peak, in_flight)
+        await asyncio.sleep(0.01 * record["n"])
+        in_flight -= 1
+        return {"n": record["n"]}
+
+    results = run([json.dumps({"n": n}) for n in (5, 1, 3, 2, 4, 1)], handler, concurrency=3)
+
+    assert peak == 3
+    assert sorted(result["index"] for result in results) == list(range(6))
+    # Results come back as they complete, not in input order
+    assert [result["index"] for result in results] != list(range(6))
+
+
+def test_invalid_records_do_not_block_next_offset():
+    async def handler(record):
+        if record.get("fail"):
+            raise RuntimeError("remote agent down")
+        return {}
+
+    results = run(['{"ok": 1}', "not json", "[1, 2]", '{"fail": true}', '{"ok": 2}'], handler, concurrency=2)
+    summary = summarize_results(results, time.perf_counter())
+
+    assert (summary["succeeded"], summary["failed"], summary["invalid"]) == (2, 3, 2)
+    # Records 1 and 2 can never run, record 3 can be retried
+    assert summary["next_offset"] == 3
+
+
+def test_resume_skips_successes_and_invalid_records(tmp_path):
+    output = tmp_path / "results.jsonl"
+    output.write_text("\n".join(json.dumps(result) for result in [
+        {"index": 0, "status": "success"},
+        {"index": 1, "status": "error", "status_code": 400, "error": "Invalid record"},
+        {"index": 2, "status": "error", "status_code": 504, "error": "deadline"},
+    ]) + "\n")
+
+    assert read_done_indices(str(output)) == {0, 1}
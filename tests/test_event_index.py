@@ -0,0 +1,97 @@
+import json
+
+import pytest
+
+from event_index import CalendarEventIndex, IncompleteListing
+
+START = "2026-01-10T00:00:00Z"
+END = "2026-01-20T00:00:00Z"
+
+
+def event(event_id, day, **fields):
+    return {
+        "id": event_id,
+        "start": {"dateTime": f"2026-01-{day:02d}T10:00:00Z"},
+        "end": {"dateTime": f"2026-01-{day:02d}T11:00:00Z"},
+        **fields,
+    }
+
+
+class FakeListTool:
+    """Serves ``pages`` of events, one per call, chained by page tokens."""
+
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def __call__(self, connection_id, arguments):
+        self.calls.append(arguments)
+        page = int(arguments.get("page_token") or 0)
+        data = {"items": self.pages[page]}
+        if page + 1 < len(self.pages):
+            data["nextPageToken"] = str(page + 1)
+        return {"status": "success", "content": [{"text": json.dumps(data)}]}
+
+
+def make_index(tmp_path, pages, accepted=("updated_min", "page_token", "single_events")):
+    fetch = FakeListTool(pages)
+    index = CalendarEventIndex(
+        str(tmp_path / "events.sqlite3"), fetch, accepts=lambda connection_id, param: param in accepted
+    )
+    return index, fetch
+
+
+def test_sync_follows_page_tokens(tmp_path):
+    index, fetch = make_index(tmp_path, [[event("a", 11)], [event("b", 12)], [event("c", 13)]])
+
+    events = index.query("conn", time_min=START, time_max=END)
+
+    assert [e["id"] for e in events] == ["a", "b", "c"]
+    assert [call.get("page_token") for call in fetch.calls] == [None, "1", "2"]
+    assert all(call["single_events"] is True for call in fetch.calls)
+    assert index._state("conn", "primary") is not None
+
+
+def test_truncated_listing_is_not_recorded(tmp_path):
+    index, fetch = make_index(tmp_path, [[event("a", 11)], [event("b", 12)]], accepted=("single_events",))
+
+    with pytest.raises(IncompleteListing):
+        index.query("conn", time_min=START, time_max=END)
+
+    assert index._state("conn", "primary") is None
+    assert index._conn().execute("SELECT COUNT(*) FROM events").fetchone()[0] == 0
+
+
+def test_unexpanded_recurring_events_are_not_recorded(tmp_path):
+    index, fetch = make_index(
+        tmp_path, [[event("a", 11), event("weekly", 5, recurrence=["RRULE:FREQ=WEEKLY"])]], accepted=("page_token",)
+    )
+
+    with pytest.raises(IncompleteListing):
+        index.query("conn", time_min=START, time_max=END)
+
+    assert "single_events" not in fetch.calls[0]
+    assert index._state("conn", "primary") is None
+
+
+def test_open_ended_queries_share_one_sync(tmp_path):
+    index, fetch = make_index(tmp_path, [[event("a", 11)]])
+
+    index.query("conn")
+    index.query("conn", keyword="reading")
+
+    assert len(fetch.calls) == 1
+    assert (index.full_syncs, index.index_reads) == (1, 1)
+
+
+def test_keyword_wildcards_match_literally(tmp_path):
+    index, fetch = make_index(tmp_path, [[
+        event("a", 11, summary="100% review"),
+        event("b", 12, summary="1000 reviews"),
+        event("c", 13, summary="team_sync"),
+        event("d", 14, summary="teamXsync"),
+    ]])
+
+    assert [e["id"] for e in index.query("conn", time_min=START, time_max=END, keyword="100%")] == ["a"]
+    assert [e["id"] for e in index.query("conn", time_min=START, time_max=END, keyword="team_")] == ["c"]
+    assert len(fetch.calls) == 1
@@ -0,0 +1,208 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from mcp.client.streamable_http import streamablehttp_client
+from strands.tools.mcp import MCPClient
+
+from benchmarks.fakes import BackgroundServers, create_fake_mcp_app
+from benchmarks.run import free_port
+from mcp_pool import MCPClientPool
+
+
+@pytest.fixture(scope="module")
+def mcp_url():
+    """A local stand-in for the Nango MCP endpoint whose tool calls take 300ms."""
+    servers = BackgroundServers()
+    url = servers.serve(create_fake_mcp_app(latency_ms=300), free_port())
+    yield url + "/mcp"
+    servers.stop()
+
+
+@pytest.fixture
+def pool(mcp_url):
+    def factory(key):
+        return MCPClient(lambda: streamablehttp_client(url=mcp_url, headers={"connection-id": key}))
+
+    pool = MCPClientPool(factory, max_size=2, idle_timeout=0, health_check_interval=0)
+    yield pool
+    pool.close()
+
+
+def call(client, tool="get_event"):
+    return client.call_tool_sync("call", tool, {"event_id": "event-1"})
+
+
+def test_reuses_the_session_of_a_key(pool):
+    with pool.session("conn-1") as first:
+        assert call(first)["status"] == "success"
+    with pool.session("conn-1") as second:
+        assert call(second)["status"] == "success"
+
+    assert second is first
+    assert pool.stats()["created"] == 1
+    assert pool.stats()["reused"] == 1
+
+
+def test_concurrent_first_calls_start_one_session(pool):
+    def run(_):
+        with pool.session("conn-1") as client:
+            return client
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        clients = list(executor.map(run, range(8)))
+
+    assert len({id(client) for client in clients}) == 1
+    assert pool.stats()["created"] == 1
+    # Key locks only live while a session is being started
+    assert pool._key_locks == {}
+
+
+def test_eviction_waits_for_the_call_in_flight(pool):
+    started = threading.Event()
+    results = {}
+
+    def slow_call():
+        with pool.session("conn-1") as client:
+            results["client"] = client
+            started.set()
+            results["result"] = call(client, "list_events")
+
+    pool.max_size = 1
+    worker = threading.Thread(target=slow_call)
+    worker.start()
+    started.wait(5)
+    # With room for one session, conn-2 evicts conn-1 mid-call
+    with pool.session("conn-2"):
+        pass
+    assert "conn-1" not in pool._clients
+    assert results["client"]._is_session_active()
+
+    worker.join(5)
+    assert results["result"]["status"] == "success"
+    # Stopped once its last user was done
+    assert not results["client"]._is_session_active()
+    assert pool.stats()["evicted"] == 1
+
+
+def test_eviction_prefers_idle_sessions(pool):
+    started = threading.Event()
+    done = threading.Event()
+
+    def hold():
+        with pool.session("conn-1"):
+            started.set()
+            done.wait(5)
+
+    worker = threading.Thread(target=hold)
+    worker.start()
+    started.wait(5)
+    with pool.session("conn-2"):
+        pass
+    # conn-1 is older but in use, so the idle conn-2 makes room for conn-3
+    with pool.session("conn-3"):
+        pass
+    done.set()
+    worker.join(5)
+
+    assert sorted(pool._clients) == ["conn-1", "conn-3"]
+
+
+def test_invalidate_waits_for_the_call_in_flight(pool):
+    started = threading.Event()
+    results = {}
+
+    def slow_call():
+        with pool.session("conn-1") as client:
+            started.set()
+            results["result"] = call(client, "list_events")
+
+    worker = threading.Thread(target=slow_call)
+    worker.start()
+    started.wait(5)
+    pool.invalidate("conn-1")
+    worker.join(5)
+
+    assert results["result"]["status"] == "success"
+    with pool.session("conn-1"):
+        pass
+    assert pool.stats()["created"] == 2
+
+
+def test_reap_idle_skips_sessions_in_use(pool):
+    pool.idle_timeout = 0.01
+    with pool.session("conn-1") as client:
+        time.sleep(0.05)
+        assert pool.reap_idle() == 0
+        assert call(client)["status"] == "success"
+    time.sleep(0.05)
+    assert pool.reap_idle() == 1
+    assert not client._is_session_active()
+
+
+def test_recovers_from_a_dead_session(pool):
+    with pool.session("conn-1") as dead:
+        pass
+    dead.stop(None, None, None)
+
+    with pool.session("conn-1") as client:
+        assert call(client)["status"] == "success"
+
+    assert client is not dead
+    assert pool.stats()["unhealthy"] == 1
+    assert pool.stats()["created"] == 2
+
+
+def test_a_failed_call_drops_the_session(pool):
+    with pytest.raises(RuntimeError):
+        with pool.session("conn-1"):
+            raise RuntimeError("connection reset")
+
+    assert "conn-1" not in pool._clients
+    with pool.session("conn-1") as client:
+        assert call(client)["status"] == "success"
+    assert pool.stats()["created"] == 2
+
+
+def test_dedicated_session_is_not_shared(pool):
+    with pool.session("conn-1") as pooled:
+        with pool.dedicated_session("conn-1") as dedicated:
+            assert call(dedicated)["status"] == "success"
+
+    assert dedicated is not pooled
+    assert not dedicated._is_session_active()
+    assert pool._clients["conn-1"].client is pooled
+    assert pool.stats()["dedicated"] == 1
+
+
+class _BrokenClient:
+    """MCP client whose session looks alive but whose requests fail."""
+
+    def __init__(self):
+        self.stopped = False
+
+    def start(self):
+        return self
+
+    def _is_session_active(self):
+        return not self.stopped
+
+    def list_tools_sync(self):
+        raise ConnectionError("session lost")
+
+    def stop(self, *args):
+        self.stopped = True
+
+
+def test_health_check_drops_broken_idle_sessions():
+    pool = MCPClientPool(lambda key: _BrokenClient(), idle_timeout=0, health_check_interval=0.01)
+    with pool.session("conn-1") as broken:
+        time.sleep(0.05)
+        # A session in use is never probed
+        assert pool.check_health() == 0
+
+    assert pool.check_health() == 1
+    assert broken.stopped
+    assert pool.stats()["unhealthy"] == 1
+    pool.close()
@@ -0,0 +1,140 @@
+import asyncio
+
+import pytest
+from strands.models.model import Model
+
+from model_tiering import (
+    ModelTieringPolicy,
+    ModelUsageReport,
+    TieredModel,
+    prompt_cache_params,
+    supports_prompt_cache,
+    usage_scope,
+)
+
+
+class ScriptedModel(Model):
+    """Streams a short answer with ``usage``, or raises ``error`` after ``events_before_error`` events."""
+
+    def __init__(self, model_id, usage=None, error=None, events_before_error=0):
+        self.config = {"model_id": model_id}
+        self.usage = usage or {"inputTokens": 10, "outputTokens": 2}
+        self.error = error
+        self.events_before_error = events_before_error
+        self.calls = 0
+
+    def update_config(self, **model_config):
+        self.config.update(model_config)
+
+    def get_config(self):
+        return self.config
+
+    def structured_output(self, *args, **kwargs):
+        raise NotImplementedError
+
+    async def stream(self, messages, tool_specs=None, system_prompt=None, **kwargs):
+        self.calls += 1
+        events = [
+            {"messageStart": {"role": "assistant"}},
+            {"contentBlockDelta": {"delta": {"text": "ok"}}},
+            {"messageStop": {"stopReason": "end_turn"}},
+            {"metadata": {"usage": self.usage, "metrics": {"latencyMs": 1}}},
+        ]
+        for index, event in enumerate(events):
+            if self.error is not None and index == self.events_before_error:
+                raise self.error
+            yield event
+
+
+def user(text):
+    return [{"role": "user", "content": [{"text": text}]}]
+
+
+def drain(model, messages):
+    async def run():
+        return [event async for event in model.stream(messages)]
+    return asyncio.run(run())
+
+
+def test_policy_picks_tier_from_conversation():
+    policy = ModelTieringPolicy(max_fast_input_chars=20, max_fast_messages=2, escalate_keywords=("Analyze",))
+
+    assert policy.choose(user("next meeting?")) == ("fast", "short_input")
+    assert policy.choose(user("x" * 21)) == ("strong", "long_input")
+    assert policy.choose(user("please analyze this")) == ("strong", "keyword")
+    assert policy.choose(user("hi") * 3) == ("strong", "long_history")
+
+
+def test_calls_go_to_the_chosen_tier():
+    fast, strong = ScriptedModel("fast"), ScriptedModel("strong")
+    model = TieredModel(strong, fast, ModelTieringPolicy(max_fast_input_chars=20))
+
+    drain(model, user("short"))
+    drain(model, user("x" * 50))
+
+    assert (fast.calls, strong.calls) == (1, 1)
+    assert model.stats()["fast_calls"] == 1 and model.stats()["strong_calls"] == 1
+
+
+def test_fast_failure_before_output_escalates():
+    fast = ScriptedModel("fast", error=RuntimeError("throttled"), events_before_error=0)
+    strong = ScriptedModel("strong")
+    model = TieredModel(strong, fast)
+
+    with usage_scope() as report:
+        events = drain(model, user("short"))
+
+    assert strong.calls == 1
+    assert events[1] == {"contentBlockDelta": {"delta": {"text": "ok"}}}
+    assert model.stats()["escalations"] == 1
+    usage = report.as_dict()
+    assert usage["tiers"] == {"strong": 1} and usage["escalations"] == 1
+
+
+def test_fast_failure_after_output_is_not_escalated():
+    fast = ScriptedModel("fast", error=RuntimeError("connection reset"), events_before_error=2)
+    strong = ScriptedModel("strong")
+    model = TieredModel(strong, fast)
+
+    with pytest.raises(RuntimeError, match="connection reset"):
+        drain(model, user("short"))
+
+    assert strong.calls == 0
+    assert model.stats()["escalations"] == 0
+
+
+def test_usage_report_adds_up_calls_and_cache_tokens():
+    fast = ScriptedModel("fast", usage={"inputTokens": 100, "outputTokens": 5, "cacheWriteInputTokens": 2000})
+    strong = ScriptedModel("strong", usage={"inputTokens": 300, "outputTokens": 40, "cacheReadInputTokens": 2000})
+    model = TieredModel(strong, fast, ModelTieringPolicy(max_fast_input_chars=20))
+    model.baseline_seconds = 1.0
+
+    with usage_scope() as report:
+        drain(model, user("short"))
+        drain(model, user("x" * 50))
+    usage = report.as_dict()
+
+    assert usage["calls"] == 2
+    assert usage["tiers"] == {"fast": 1, "strong": 1}
+    assert (usage["input_tokens"], usage["output_tokens"]) == (400, 45)
+    assert (usage["cache_read_tokens"], usage["cache_write_tokens"]) == (2000, 2000)
+    # Both calls were cheaper than the baseline: one on the fast tier, one read from the prompt cache
+    assert usage["estimated_seconds_saved"] > 1.9
+
+
+def test_empty_usage_report():
+    usage = ModelUsageReport().as_dict()
+
+    assert usage["calls"] == 0 and usage["cache_read_tokens"] == 0
+    assert usage["estimated_seconds_saved"] is None
+
+
+def test_prompt_cache_only_for_models_that_support_it():
+    assert supports_prompt_cache("us.anthropic.claude-3-5-haiku-20241022-v1:0")
+    assert supports_prompt_cache("anthropic.claude-sonnet-4-20250514-v1:0")
+    assert supports_prompt_cache("amazon.nova-pro-v1:0")
+    assert not supports_prompt_cache("anthropic.claude-3-haiku-20240307-v1:0")
+
+    assert prompt_cache_params(True, "us.anthropic.claude-sonnet-4-20250514-v1:0") == {"cache_prompt": "default", "cache_tools": "default"}
+    assert prompt_cache_params(True, "anthropic.claude-3-haiku-20240307-v1:0") == {}
+    assert prompt_cache_params(False, "us.anthropic.claude-sonnet-4-20250514-v1:0") == {}
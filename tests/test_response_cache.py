@@ -0,0 +1,26 @@
+from response_cache import ResponseCache
+from shared_store import InMemoryStore
+
+
+def make_cache():
+    return ResponseCache(InMemoryStore(), agent_config_hash="config")
+
+
+def test_answers_are_kept_per_target_agent():
+    cache = make_cache()
+    cache.set("When is my reading time?", "from the orchestrator")
+    cache.set("When is my reading time?", "from the calendar agent", "google-calendar-agent", "fast_path:explicit")
+
+    assert cache.get("when is my reading time?", "other-agent") is None
+    assert cache.get("When is my reading time", "google-calendar-agent") == {
+        "response": "from the calendar agent", "route": "fast_path:explicit",
+    }
+    assert cache.get("When is my   reading time?") == {"response": "from the orchestrator", "route": "orchestrator"}
+
+
+def test_case_is_part_of_the_key():
+    cache = make_cache()
+    cache.set("events of conn-ABC", "abc")
+
+    assert cache.get("events of conn-abc") is None
+    assert cache.stats()["misses"] == 1
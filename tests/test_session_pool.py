@@ -0,0 +1,87 @@
+import asyncio
+
+from session_pool import AgentSessionPool
+from shared_store import InMemoryStore
+
+
+class FakeAgent:
+    def __init__(self, session_id):
+        self.session_id = session_id
+        self.messages = []
+
+
+def user(text):
+    return {"role": "user", "content": [{"text": text}]}
+
+
+def test_waiting_turn_keeps_its_session_through_eviction():
+    async def scenario():
+        pool = AgentSessionPool(FakeAgent, max_sessions=1)
+        first, lock = await pool.acquire("s1")
+        waiter = asyncio.create_task(pool.acquire("s1"))
+        await asyncio.sleep(0)
+
+        await pool.release("s1", lock)
+        # s1 is unlocked but its waiter has not resumed yet; a new session now wants the only slot
+        other, other_lock = await pool.acquire("s2")
+        second, second_lock = await waiter
+
+        assert second is first
+        assert "s1" in pool
+        await pool.release("s2", other_lock)
+        await pool.release("s1", second_lock)
+
+        # Once nobody uses s1 it can be evicted as usual
+        _, lock = await pool.acquire("s3")
+        await pool.release("s3", lock)
+        assert pool.session_ids() == ["s3"]
+
+    asyncio.run(scenario())
+
+
+def test_turns_of_one_session_run_one_at_a_time():
+    async def scenario():
+        pool = AgentSessionPool(FakeAgent)
+        running, overlaps = [], []
+
+        async def turn(text):
+            agent, lock = await pool.acquire("s1")
+            try:
+                overlaps.append(len(running))
+                running.append(text)
+                await asyncio.sleep(0.01)
+                agent.messages = agent.messages + [user(text)]
+                running.remove(text)
+            finally:
+                await pool.release("s1", lock)
+
+        await asyncio.gather(*(turn(f"turn {i}") for i in range(5)))
+        agent, lock = await pool.acquire("s1")
+        await pool.release("s1", lock)
+        return overlaps, agent
+
+    overlaps, agent = asyncio.run(scenario())
+
+    assert overlaps == [0] * 5
+    assert len(agent.messages) == 5
+
+
+def test_history_is_shared_through_the_store():
+    async def scenario():
+        store = InMemoryStore()
+        worker_a = AgentSessionPool(FakeAgent, store=store)
+        worker_b = AgentSessionPool(FakeAgent, store=store)
+
+        agent, lock = await worker_a.acquire("s1")
+        agent.messages = [user("hello")]
+        await worker_a.release("s1", lock)
+
+        agent, lock = await worker_b.acquire("s1")
+        messages = list(agent.messages)
+        await worker_b.release("s1", lock)
+        return messages, worker_b.stats()
+
+    messages, stats = asyncio.run(scenario())
+
+    assert messages == [user("hello")]
+    assert stats["loaded"] == 1
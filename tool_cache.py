@@ -0,0 +1,86 @@
+import hashlib
+import time
+from typing import Any, Dict, List, Optional
+
+from shared_store import KeyValueStore
+from ttl_cache import normalize_arguments
+
+
+class ToolCallCache:
+    """
+    Cache of MCP tool listings and read-only tool results per connection, kept in ``KeyValueStore``s.
+
+    With the memory backend this is a per-process LRU; with the SQLite backend every worker on the
+    node shares the same entries. Results are keyed on connection, tool name, arguments and a
+    per-connection generation, so a write only has to move the generation on to make every cached
+    read for that connection unreachable, in this process and in all others.
+    """
+
+    def __init__(
+        self,
+        listing_store: KeyValueStore,
+        result_store: KeyValueStore,
+        listing_ttl_seconds: float = 3600.0,
+        result_ttl_seconds: float = 30.0,
+    ):
+        self.listing_store = listing_store
+        self.result_store = result_store
+        self.listing_ttl_seconds = listing_ttl_seconds
+        self.result_ttl_seconds = result_ttl_seconds
+
+        self.listing_hits = 0
+        self.listing_misses = 0
+        self.result_hits = 0
+        self.result_misses = 0
+        self.invalidations = 0
+
+    def get_listing(self, connection_id: str) -> Optional[List[Dict[str, Any]]]:
+        listing = self.listing_store.get(f"tools:{connection_id}")
+        if listing is None:
+            self.listing_misses += 1
+        else:
+            self.listing_hits += 1
+        return listing
+
+    def set_listing(self, connection_id: str, tool_specs: List[Dict[str, Any]]) -> None:
+        self.listing_store.set(f"tools:{connection_id}", tool_specs, self.listing_ttl_seconds)
+
+    def _generation(self, connection_id: str) -> int:
+        # Not a cache lookup, so it stays out of the store's hit/miss counters
+        return self.result_store.peek(f"generation:{connection_id}") or 0
+
+    def result_key(self, connection_id: str, tool_name: str, arguments: Optional[Dict[str, Any]]) -> str:
+        digest = hashlib.sha256(normalize_arguments(arguments).encode("utf-8")).hexdigest()
+        return f"result:{connection_id}:{self._generation(connection_id)}:{tool_name}:{digest}"
+
+    def get_result(self, key: str) -> Optional[Dict[str, Any]]:
+        result = self.result_store.get(key)
+        if result is None:
+            self.result_misses += 1
+        else:
+            self.result_hits += 1
+        return result
+
+    def set_result(self, key: str, result: Dict[str, Any]) -> None:
+        self.result_store.set(key, result, self.result_ttl_seconds)
+
+    def invalidate_connection(self, connection_id: str) -> None:
+        """Make every cached result of the connection unreachable."""
+        # A fresh timestamp, never a counter: once this key expires the generation falls back to 0 and the
+        # next write picks a value no earlier entry was written under, so old results can never come back.
+        # Results written under 0 before this write expire before the key does.
+        self.result_store.set(f"generation:{connection_id}", time.time_ns(), 2 * self.result_ttl_seconds)
+        self.invalidations += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "listing_ttl_seconds": self.listing_ttl_seconds,
+            "result_ttl_seconds": self.result_ttl_seconds,
+            "listing_hits": self.listing_hits,
+            "listing_misses": self.listing_misses,
+            "result_hits": self.result_hits,
+            "result_misses": self.result_misses,
+            "invalidations": self.invalidations,
+            "listing_store": self.listing_store.stats(),
+            "result_store": self.result_store.stats(),
+        }
@@ -0,0 +1,284 @@
+import hashlib
+import json
+import queue
+import random
+import threading
+import time
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+from langfuse import Langfuse, LangfuseSpan
+
+from metrics import MetricsRegistry
+
+TRACING_MODES = ("inline", "background", "off")
+OUTPUT_MODES = ("truncate", "hash", "full")
+
+
+def reduce_payload(value: Any, mode: str = "truncate", max_chars: int = 2000) -> Any:
+    """
+    Shrink a trace input/output before export.
+
+    "truncate" keeps the first ``max_chars`` characters of its JSON form, "hash" replaces it with a
+    SHA-256 digest and its size, and "full" keeps it as is. Payloads within ``max_chars`` are never changed.
+    """
+    if value is None or mode == "full":
+        return value
+    text = value if isinstance(value, str) else json.dumps(value, default=str)
+    if len(text) <= max_chars:
+        return value
+    if mode == "hash":
+        return {"sha256": hashlib.sha256(text.encode("utf-8")).hexdigest(), "chars": len(text)}
+    return text[:max_chars] + f"... [truncated {len(text) - max_chars} chars]"
+
+
+@dataclass
+class TraceRecord:
+    """Everything needed to export one request trace, captured on the request path without serializing."""
+
+    name: str
+    start_ns: int
+    input: Any = None
+    output: Any = None
+    session_id: Optional[str] = None
+    tags: List[str] = field(default_factory=list)
+    level: Optional[str] = None
+    end_ns: Optional[int] = None
+
+
+class _RecordingSpan:
+    """Collects the ``update``/``update_trace`` calls a Langfuse span would receive into a TraceRecord."""
+
+    def __init__(self, record: TraceRecord):
+        self.record = record
+
+    def update(self, level: Optional[str] = None, **kwargs: Any) -> "_RecordingSpan":
+        if level is not None:
+            self.record.level = level
+        return self
+
+    def update_trace(self, output: Any = None, tags: Optional[List[str]] = None, **kwargs: Any) -> "_RecordingSpan":
+        if output is not None:
+            self.record.output = output
+        if tags is not None:
+            self.record.tags = list(tags)
+        return self
+
+
+class _NoopSpan:
+    def update(self, **kwargs: Any) -> "_NoopSpan":
+        return self
+
+    def update_trace(self, **kwargs: Any) -> "_NoopSpan":
+        return self
+
+
+class BatchTraceExporter:
+    """
+    Bounded queue of finished traces drained in batches by a background thread.
+
+    ``submit`` never blocks: when the queue is full the trace is dropped and counted, so a slow or
+    unreachable Langfuse can never add latency or unbounded memory to requests. Payload reduction
+    and span creation happen on the exporter thread; Langfuse then ships the spans with its own
+    batching processor.
+    """
+
+    def __init__(
+        self,
+        client: Langfuse,
+        max_queue: int = 1000,
+        batch_size: int = 50,
+        flush_interval: float = 1.0,
+        output_mode: str = "truncate",
+        max_payload_chars: int = 2000,
+    ):
+        if output_mode not in OUTPUT_MODES:
+            raise ValueError(f"output_mode must be one of {OUTPUT_MODES}, got {output_mode!r}")
+        self.client = client
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.output_mode = output_mode
+        self.max_payload_chars = max_payload_chars
+
+        self._queue: "queue.Queue[TraceRecord]" = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+
+        self.submitted = 0
+        self.dropped = 0
+        self.exported = 0
+        self.failed = 0
+        self.batches = 0
+
+    def _ensure_thread(self) -> None:
+        if self._thread is not None:
+            return
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="trace-exporter", daemon=True)
+                self._thread.start()
+
+    def submit(self, record: TraceRecord) -> bool:
+        """Queue a finished trace for export; returns False if it was dropped because the queue is full."""
+        self._ensure_thread()
+        try:
+            self._queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        self.submitted += 1
+        return True
+
+    def _run(self) -> None:
+        while not self._stop.is_set() or not self._queue.empty():
+            batch = self._take_batch()
+            if batch:
+                self._export(batch)
+
+    def _take_batch(self) -> List[TraceRecord]:
+        batch: List[TraceRecord] = []
+        deadline = time.monotonic() + self.flush_interval
+        while len(batch) < self.batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _export(self, batch: List[TraceRecord]) -> None:
+        self.batches += 1
+        for record in batch:
+            try:
+                self._export_one(record)
+                self.exported += 1
+            except Exception as e:
+                self.failed += 1
+                print(f"Error exporting trace {record.name}: {e}")
+
+    def _export_one(self, record: TraceRecord) -> None:
+        # The span is created after the fact, so it is started on the underlying tracer with the request's own timestamps
+        input = reduce_payload(record.input, self.output_mode, self.max_payload_chars)
+        output = reduce_payload(record.output, self.output_mode, self.max_payload_chars)
+        otel_span = self.client._otel_tracer.start_span(name=record.name, start_time=record.start_ns)
+        span = LangfuseSpan(otel_span=otel_span, langfuse_client=self.client, input=input, output=output, level=record.level)
+        span.update_trace(input=input, output=output, session_id=record.session_id, tags=record.tags or None)
+        span.end(end_time=record.end_ns)
+
+    def close(self, timeout: float = 5.0) -> None:
+        """Export what is queued, then stop the exporter thread."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        self.client.flush()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "queued": self._queue.qsize(),
+            "max_queue": self._queue.maxsize,
+            "submitted": self.submitted,
+            "dropped": self.dropped,
+            "exported": self.exported,
+            "failed": self.failed,
+            "batches": self.batches,
+        }
+
+
+class RequestTracer:
+    """
+    Per-request Langfuse tracing with three modes:
+
+    - "inline": a Langfuse span is opened around the request and updated in place (the original behaviour)
+    - "background": requests are sampled up front (``sample_rate``, per session when a session_id is
+      given so conversations are kept whole); sampled ones only fill a small in-memory record, which
+      is handed to a ``BatchTraceExporter`` when the request ends. Failed requests are exported even
+      when not sampled if ``always_sample_errors`` is set
+    - "off": no tracing
+
+    The time spent in the tracer on the request path is recorded as the ``tracing`` hop when
+    ``metrics`` is given.
+    """
+
+    def __init__(
+        self,
+        client: Langfuse,
+        mode: str = "inline",
+        sample_rate: float = 1.0,
+        always_sample_errors: bool = True,
+        exporter: Optional[BatchTraceExporter] = None,
+        metrics: Optional[MetricsRegistry] = None,
+    ):
+        if mode not in TRACING_MODES:
+            raise ValueError(f"mode must be one of {TRACING_MODES}, got {mode!r}")
+        if mode == "background" and exporter is None:
+            raise ValueError("background tracing needs an exporter")
+        self.client = client
+        self.mode = mode
+        self.sample_rate = sample_rate
+        self.always_sample_errors = always_sample_errors
+        self.exporter = exporter
+        self.metrics = metrics
+
+        self.sampled = 0
+        self.sampled_out = 0
+
+    def is_sampled(self, session_id: Optional[str] = None) -> bool:
+        if self.sample_rate >= 1:
+            return True
+        if self.sample_rate <= 0:
+            return False
+        if session_id is not None:
+            digest = hashlib.blake2b(session_id.encode("utf-8"), digest_size=8).digest()
+            return int.from_bytes(digest, "big") / 2 ** 64 < self.sample_rate
+        return random.random() < self.sample_rate
+
+    def _observe_overhead(self, started: float) -> None:
+        if self.metrics is not None:
+            self.metrics.hop_seconds.observe(time.perf_counter() - started, hop="tracing")
+
+    @contextmanager
+    def span(self, name: str, input: Any = None, session_id: Optional[str] = None):
+        """
+        Trace one request. Yields an object with the ``update(level=...)`` and
+        ``update_trace(output=..., tags=...)`` methods of a Langfuse span, whatever the mode.
+        """
+        if self.mode == "off":
+            yield _NoopSpan()
+            return
+        if self.mode == "inline":
+            with self.client.start_as_current_span(name=name) as span:
+                yield span
+            return
+
+        started = time.perf_counter()
+        sampled = self.is_sampled(session_id)
+        record = TraceRecord(name=name, start_ns=time.time_ns(), input=input, session_id=session_id)
+        self._observe_overhead(started)
+        try:
+            yield _RecordingSpan(record)
+        finally:
+            started = time.perf_counter()
+            record.end_ns = time.time_ns()
+            if sampled or (self.always_sample_errors and record.level == "ERROR"):
+                self.sampled += 1
+                self.exporter.submit(record)
+            else:
+                self.sampled_out += 1
+            self._observe_overhead(started)
+
+    def close(self) -> None:
+        if self.exporter is not None:
+            self.exporter.close()
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            "sample_rate": self.sample_rate,
+            "sampled": self.sampled,
+            "sampled_out": self.sampled_out,
+            "exporter": self.exporter.stats() if self.exporter is not None else None,
+        }
@@ -0,0 +1,104 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+_MISSING = object()
+
+
+def normalize_arguments(arguments: Optional[Dict[str, Any]]) -> str:
+    """Canonical JSON form of tool arguments so equivalent calls share a cache key."""
+    return json.dumps(arguments or {}, sort_keys=True, separators=(",", ":"), default=str)
+
+
+class TTLCache:
+    """
+    Thread-safe, size-bounded LRU cache whose entries expire after a time-to-live.
+
+    Entries are evicted least-recently-used first once ``max_size`` is reached, and lazily on
+    read once their TTL has passed. Hit, miss and eviction counters are kept for monitoring.
+    """
+
+    def __init__(self, max_size: int = 1024, ttl_seconds: float = 60.0):
+        if max_size < 1:
+            raise ValueError(f"max_size must be >= 1, got {max_size}")
+
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._data: "OrderedDict[Hashable, Tuple[float, Any]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: Hashable, default: Any = None, record_stats: bool = True) -> Any:
+        """Value of ``key``, or ``default`` when missing or expired. ``record_stats=False`` leaves the hit/miss counters alone."""
+        with self._lock:
+            item = self._data.get(key, _MISSING)
+            if item is _MISSING:
+                self.misses += record_stats
+                return default
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self.misses += record_stats
+                return default
+            self._data.move_to_end(key)
+            self.hits += record_stats
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl_seconds: Optional[float] = None) -> None:
+        ttl = self.ttl_seconds if ttl_seconds is None else ttl_seconds
+        with self._lock:
+            self._data[key] = (time.monotonic() + ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_size:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_set(self, key: Hashable, factory: Callable[[], Any], ttl_seconds: Optional[float] = None) -> Any:
+        """Return the cached value for ``key`` or compute, store and return it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = factory()
+            self.set(key, value, ttl_seconds)
+        return value
+
+    def keys(self) -> List[Hashable]:
+        """Keys of the entries that have not expired, least recently used first."""
+        now = time.monotonic()
+        with self._lock:
+            return [key for key, (expires_at, _) in self._data.items() if expires_at > now]
+
+    def delete(self, key: Hashable) -> bool:
+        with self._lock:
+            return self._data.pop(key, _MISSING) is not _MISSING
+
+    def invalidate(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop every entry whose key matches ``predicate``; returns how many were dropped."""
+        with self._lock:
+            keys = [k for k in self._data if predicate(k)]
+            for k in keys:
+                del self._data[k]
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "size": len(self._data),
+            "max_size": self.max_size,
+            "ttl_seconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
@@ -0,0 +1,133 @@
+import asyncio
+import contextvars
+import inspect
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional
+
+
+class PoolSaturatedError(Exception):
+    """Raised when every worker is busy and the wait queue is already full."""
+
+
+class QueueTimeoutError(Exception):
+    """Raised when a call waited in the queue longer than the configured timeout."""
+
+
+class AgentWorkerPool:
+    """
+    Runs agent turns off the event loop with a concurrency limit and a bounded wait queue.
+
+    Coroutine functions (e.g. ``agent.invoke_async``) are awaited directly on the running loop,
+    plain callables (e.g. ``agent``) are dispatched to a dedicated thread pool. At most
+    ``max_concurrency`` calls run at once and at most ``max_queue`` calls wait for a slot;
+    anything beyond that is rejected immediately with ``PoolSaturatedError``.
+    """
+
+    def __init__(self, max_concurrency: int = 8, max_queue: int = 32, queue_timeout: Optional[float] = 30.0):
+        if max_concurrency < 1:
+            raise ValueError(f"max_concurrency must be >= 1, got {max_concurrency}")
+        if max_queue < 0:
+            raise ValueError(f"max_queue must be >= 0, got {max_queue}")
+
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._executor = ThreadPoolExecutor(max_workers=max_concurrency, thread_name_prefix="agent-worker")
+
+        self.in_flight = 0
+        self.queued = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+        self.timed_out = 0
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+        self._admitted = 0
+
+    async def _acquire(self) -> float:
+        """Wait for a free slot and return the time spent waiting, in seconds."""
+        if not self._semaphore.locked():
+            # A free slot is taken without suspending, so the queue bookkeeping below stays exact
+            await self._semaphore.acquire()
+            self._admitted += 1
+            return 0.0
+
+        if self.queued >= self.max_queue:
+            self.rejected += 1
+            raise PoolSaturatedError(
+                f"Agent pool saturated ({self.in_flight} in flight, {self.queued} queued)"
+            )
+
+        self.queued += 1
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise QueueTimeoutError(f"Timed out after {self.queue_timeout}s waiting for a free agent worker")
+        finally:
+            self.queued -= 1
+
+        waited = time.perf_counter() - started
+        self._admitted += 1
+        self._wait_total += waited
+        self._wait_max = max(self._wait_max, waited)
+        return waited
+
+    async def run(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """
+        Run ``fn`` once a worker slot is free.
+
+        Args:
+            fn: Coroutine function to await on the loop, or a blocking callable to run in the thread pool
+            *args: Positional arguments forwarded to ``fn``
+            **kwargs: Keyword arguments forwarded to ``fn``
+
+        Returns:
+            Whatever ``fn`` returns
+
+        Raises:
+            PoolSaturatedError: If the wait queue is full
+            QueueTimeoutError: If no slot was freed within ``queue_timeout``
+        """
+        await self._acquire()
+        self.in_flight += 1
+        try:
+            if inspect.iscoroutinefunction(fn):
+                result = await fn(*args, **kwargs)
+            else:
+                # Copy the context so tracing spans opened on the loop stay the parent of the call
+                ctx = contextvars.copy_context()
+                loop = asyncio.get_running_loop()
+                result = await loop.run_in_executor(self._executor, partial(ctx.run, fn, *args, **kwargs))
+            self.completed += 1
+            return result
+        except Exception:
+            self.failed += 1
+            raise
+        finally:
+            self.in_flight -= 1
+            self._semaphore.release()
+
+    def stats(self) -> Dict[str, Any]:
+        """Return queue depth, in-flight count and wait-time figures for capacity planning."""
+        return {
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "in_flight": self.in_flight,
+            "queued": self.queued,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+            "avg_wait_seconds": self._wait_total / self._admitted if self._admitted else 0.0,
+            "max_wait_seconds": self._wait_max,
+        }
+
+    def shutdown(self) -> None:
+        """Stop the thread pool without waiting for queued work."""
+        self._executor.shutdown(wait=False, cancel_futures=True)